@@ -1,48 +1,127 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List, Optional
-from app.core.tasks import process_and_summarize
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
+from app.core.tasks import process_and_summarize, cleanup_files
+from app.core.routing import classify_job, classify_file
+from app.core.events import event_channel
+from app.core.progress import PROGRESS_STATE
+from app.core.batch import save_batch, get_batch_task_ids, get_task_metas
+from app.core.metrics import observe_stage
+from starlette.concurrency import run_in_threadpool
 from app.celery_app import celery_app
 from app.config import settings
 import aiofiles
+import asyncio
+import hashlib
+import json
 import os
 import uuid
 import logging
 from celery.result import AsyncResult
+from app.services.result_cache import get_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 上传文件分块写入的块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def save_upload_file(file: UploadFile, file_path: str, max_size: int) -> str:
+    """分块写入上传文件并计算内容哈希，超过大小限制时中止并删除已写入的部分
+
+    此时表单已由 Starlette 解析完毕，文件已在临时文件中；这里的检查只避免复制超限的文件，
+    整个请求体的大小由 BodySizeLimitMiddleware 在解析之前限制。
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"文件 {file.filename} 超过大小限制 ({max_size // (1024 * 1024)}MB)"
+    )
+    # 已知大小时直接拒绝，不再复制
+    if getattr(file, 'size', None) and file.size > max_size:
+        raise too_large
+    
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with observe_stage('upload'):
+            async with aiofiles.open(file_path, 'wb') as f:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_size:
+                        raise too_large
+                    digest.update(chunk)
+                    await f.write(chunk)
+    except BaseException:
+        cleanup_files([file_path])
+        raise
+    return digest.hexdigest()
+
+def submit_task(task_id: str, saved_files: List[str], file_hashes: List[str],
+                text: Optional[str], url: Optional[str], producer=None,
+                urls: Optional[List[str]] = None) -> str:
+    """按负载类型分配队列并提交任务，返回主任务所在的队列
+
+    文件按扩展名和页数分到 parse / ocr 队列。批量提交时传入同一个 producer 复用 broker 连接。
+    读取 PDF 和提交到 broker 都是阻塞调用，接口中通过 run_in_threadpool 调用。
+    """
+    file_queues = [classify_file(file_path) for file_path in saved_files]
+    queue = classify_job(saved_files, text, url or urls)
+    
+    process_and_summarize.apply_async(
+        kwargs=dict(
+            task_id=task_id,
+            file_paths=saved_files,
+            text=text,
+            url=url,
+            file_hashes=file_hashes,
+            file_queues=file_queues,
+            urls=urls
+        ),
+        queue=queue,
+        producer=producer
+    )
+    logger.debug(f"Task {task_id} file queues: {file_queues}")
+    return queue
+
 @router.post("/summary")
 async def create_summary(
     files: List[UploadFile] = File(None),
     text: str = Form(None),
-    url: str = Form(None)
+    url: str = Form(None),
+    urls: List[str] = Form(None)
 ):
+    """提交总结任务；多个网页可通过重复的 urls 字段提交，在同一个任务中并发抓取后合并总结"""
     try:
-        logger.info(f"Received request - files: {bool(files)}, text: {bool(text)}, url: {bool(url)}")
+        logger.info(f"Received request - files: {bool(files)}, text: {bool(text)}, url: {bool(url)}, urls: {len(urls or [])}")
+        if urls and len(urls) + bool(url) > settings.MAX_URLS_PER_TASK:
+            raise HTTPException(
+                status_code=400,
+                detail=f"单个任务最多提交 {settings.MAX_URLS_PER_TASK} 个URL"
+            )
         task_id = str(uuid.uuid4())
         logger.info(f"Creating new task with ID: {task_id}")
         
-        # 保存文件
+        # 保存文件（分块写入，同时计算内容哈希供解析结果缓存使用）
         saved_files = []
+        file_hashes = []
         if files:
-            for file in files:
-                file_path = os.path.join(settings.UPLOAD_DIR, f"{task_id}_{file.filename}")
-                async with aiofiles.open(file_path, 'wb') as f:
-                    content = await file.read()
-                    await f.write(content)
-                saved_files.append(file_path)
-                logger.info(f"Saved file: {file_path}")
+            try:
+                for file in files:
+                    file_path = os.path.join(settings.UPLOAD_DIR, f"{task_id}_{file.filename}")
+                    file_hashes.append(await save_upload_file(file, file_path, settings.MAX_FILE_SIZE))
+                    saved_files.append(file_path)
+                    logger.info(f"Saved file: {file_path}")
+            except BaseException:
+                cleanup_files(saved_files)
+                raise
         
         # 创建任务
         try:
-            task = process_and_summarize.delay(
-                task_id=task_id,
-                file_paths=saved_files,
-                text=text,
-                url=url
-            )
-            logger.info(f"Created celery task with ID: {task_id}")
+            queue = await run_in_threadpool(submit_task, task_id, saved_files, file_hashes, text, url, urls=urls)
+            logger.info(f"Created celery task with ID: {task_id} on queue {queue}")
         except Exception as e:
             logger.error(f"Failed to create celery task: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -54,6 +133,8 @@ async def create_summary(
             "task_id": task_id,
             "status": "processing"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in create_summary: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -61,31 +142,131 @@ async def create_summary(
             detail=str(e)
         )
 
+def format_task_status(state: str, result) -> dict:
+    """把结果后端中的任务状态转换为接口返回格式"""
+    if state == 'PENDING':
+        return {"status": "pending"}
+    
+    # 处理中：返回 worker 写入的阶段、页数等进度信息
+    if state == PROGRESS_STATE:
+        return {"status": "processing", "progress": result}
+    
+    if isinstance(result, dict):
+        if result.get('status') == 'error':
+            return {
+                "status": "error",
+                "error": result.get('error', 'Unknown error')
+            }
+        elif result.get('status') == 'success':
+            return result
+            
+    return {
+        "status": "error",
+        "error": "Invalid task result format"
+    }
+
+@router.post("/summary/batch")
+async def create_summary_batch(
+    files: List[UploadFile] = File(None),
+    texts: List[str] = Form(None),
+    urls: List[str] = Form(None)
+):
+    """批量提交：每个文件、每段文本、每个 URL 各创建一个任务，返回批量任务ID"""
+    files, texts, urls = files or [], texts or [], urls or []
+    total = len(files) + len(texts) + len(urls)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="请提供需要处理的内容（文件、文本或URL）")
+    if total > settings.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"单次最多提交 {settings.MAX_BATCH_SIZE} 个任务")
+    
+    batch_id = str(uuid.uuid4())
+    logger.info(f"Received batch {batch_id} - files: {len(files)}, texts: {len(texts)}, urls: {len(urls)}")
+    
+    # 先保存全部文件，任一文件失败时整批不提交
+    jobs = []
+    saved_files = []
+    try:
+        for file in files:
+            task_id = str(uuid.uuid4())
+            file_path = os.path.join(settings.UPLOAD_DIR, f"{task_id}_{file.filename}")
+            file_hash = await save_upload_file(file, file_path, settings.MAX_FILE_SIZE)
+            saved_files.append(file_path)
+            jobs.append((task_id, [file_path], [file_hash], None, None))
+    except BaseException:
+        cleanup_files(saved_files)
+        raise
+    jobs.extend((str(uuid.uuid4()), [], [], text, None) for text in texts)
+    jobs.extend((str(uuid.uuid4()), [], [], None, url) for url in urls)
+    
+    # 所有任务复用同一个 broker 连接提交；逐个提交是阻塞调用，整批在线程池中执行，不阻塞事件循环
+    submitted = []
+
+    def submit_jobs():
+        with celery_app.producer_or_acquire() as producer:
+            for job in jobs:
+                submit_task(*job, producer=producer)
+                submitted.append(job[0])
+
+    try:
+        await run_in_threadpool(submit_jobs)
+    except Exception as e:
+        logger.error(f"Failed to submit batch {batch_id} after {len(submitted)} tasks: {str(e)}", exc_info=True)
+        for _, file_paths, _, _, _ in jobs[len(submitted):]:
+            cleanup_files(file_paths)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create task: {str(e)}"
+        )
+    finally:
+        # 已提交的任务也记入批量任务，便于客户端查询
+        task_ids = list(submitted)
+        if task_ids:
+            await run_in_threadpool(save_batch, batch_id, task_ids)
+    
+    logger.info(f"Created batch {batch_id} with {len(task_ids)} tasks")
+    return {
+        "batch_id": batch_id,
+        "task_ids": task_ids,
+        "status": "processing"
+    }
+
+@router.get("/summary/batch/{batch_id}")
+async def get_summary_batch(batch_id: str, include_results: bool = False):
+    """批量查询：一次 Redis 往返读取全部任务状态，并汇总各状态的数量
+
+    include_results 为 false 时只返回状态，不返回总结内容。
+    """
+    task_ids = await run_in_threadpool(get_batch_task_ids, batch_id)
+    if task_ids is None:
+        raise HTTPException(status_code=404, detail="批量任务不存在或已过期")
+    
+    metas = await run_in_threadpool(get_task_metas, task_ids)
+    counts = {"pending": 0, "processing": 0, "success": 0, "error": 0}
+    tasks = []
+    for task_id, meta in zip(task_ids, metas):
+        if meta is None:
+            status = format_task_status('PENDING', None)
+        else:
+            status = format_task_status(meta['status'], meta['result'])
+        counts[status['status']] += 1
+        if not include_results:
+            status = {key: value for key, value in status.items() if key != 'summary'}
+        tasks.append({"task_id": task_id, **status})
+    
+    return {
+        "batch_id": batch_id,
+        "total": len(task_ids),
+        "counts": counts,
+        "done": counts["success"] + counts["error"] == len(task_ids),
+        "tasks": tasks
+    }
+
 @router.get("/summary/{task_id}")
 async def get_summary(task_id: str):
     try:
         task = AsyncResult(task_id)
         logger.debug(f"Task {task_id} state: {task.state}")
-        
-        if task.state == 'PENDING':
-            return {"status": "pending"}
-            
-        result = task.result
-        logger.debug(f"Task result: {result}")
-        
-        if isinstance(result, dict):
-            if result.get('status') == 'error':
-                return {
-                    "status": "error",
-                    "error": result.get('error', 'Unknown error')
-                }
-            elif result.get('status') == 'success':
-                return result
-                
-        return {
-            "status": "error",
-            "error": "Invalid task result format"
-        }
+        return format_task_status(task.state, task.result)
         
     except Exception as e:
         logger.error(f"Error checking task status: {e}", exc_info=True)
@@ -94,6 +275,84 @@ async def get_summary(task_id: str):
             "error": f"Error checking task status: {str(e)}"
         }
 
+# SSE 连接空闲时发送心跳的间隔（秒），同时借此重新检查任务是否已结束
+STREAM_KEEPALIVE_SECONDS = 15
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def get_task_state(task_id: str) -> Tuple[str, Optional[dict]]:
+    """读取任务状态（一次结果后端请求），任务已结束时同时返回最终结果"""
+    meta = celery_app.backend.get_task_meta(task_id)
+    result = meta.get('result')
+    if meta.get('status') == 'SUCCESS' and isinstance(result, dict):
+        return meta['status'], result
+    return meta.get('status', 'PENDING'), None
+
+@router.get("/summary/{task_id}/stream")
+async def stream_summary(task_id: str):
+    """以 SSE 推送任务的处理阶段和总结生成的增量文本，任务结束时推送 done / error 事件
+
+    连接最长保持 STREAM_MAX_SECONDS，到期推送 timeout 事件后关闭，客户端可重新连接或改为轮询；
+    结果后端在 STREAM_UNKNOWN_TASK_SECONDS 内一直没有该任务的记录（任务 ID 不存在、结果已过期，
+    或任务仍在排队）时推送 error 事件后关闭，不为无效的任务 ID 长期占用 pub/sub 连接。
+    """
+    import redis.asyncio as aioredis
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + settings.STREAM_MAX_SECONDS
+        known = False
+        client = aioredis.Redis.from_url(celery_app.conf.result_backend)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(event_channel(task_id))
+            # 先订阅再检查结果，避免错过在订阅前就已结束的任务
+            while True:
+                state, final = await run_in_threadpool(get_task_state, task_id)
+                if final is not None:
+                    event_type = 'done' if final.get('status') == 'success' else 'error'
+                    yield format_sse({"type": event_type, "result": final})
+                    return
+
+                now = loop.time()
+                known = known or state != 'PENDING'
+                if not known and now - started >= settings.STREAM_UNKNOWN_TASK_SECONDS:
+                    yield format_sse({"type": "error", "result": {"status": "error", "error": "任务不存在或已过期"}})
+                    return
+                if now >= deadline:
+                    yield format_sse({"type": "timeout", "elapsed": round(now - started, 1)})
+                    return
+
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=min(STREAM_KEEPALIVE_SECONDS, deadline - now)
+                )
+                while message is not None:
+                    known = True
+                    event = json.loads(message['data'])
+                    yield format_sse(event)
+                    if event['type'] in ('done', 'error'):
+                        return
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=min(STREAM_KEEPALIVE_SECONDS, remaining)
+                    )
+                if message is None:
+                    yield ": keep-alive\n\n"
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/celery/status")
 async def get_celery_status():
     """检查 Celery 状态"""
@@ -122,6 +381,19 @@ async def get_celery_status():
             "message": str(e)
         }
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """查看缓存命中统计"""
+    caches = {}
+    for name in ['extraction', 'summary', 'url']:
+        cache = get_cache(name)
+        # 统计前会清理已过期的条目，不在事件循环中执行
+        caches[name] = await run_in_threadpool(cache.stats) if cache else {"enabled": False}
+    return {
+        "status": "ok",
+        "caches": caches
+    }
+
 @router.get("/health/redis")
 async def check_redis_health():
     """检查 Redis 健康状态"""
@@ -0,0 +1,79 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BodySizeLimitMiddleware:
+    """限制请求体大小，在表单解析之前拒绝过大的上传
+
+    Starlette 解析 multipart 表单时会把整个请求体写入临时文件，接口函数拿到 UploadFile 时
+    上传已经结束，在接口里检查大小只能避免再复制一份。这里在读取请求体之前检查 Content-Length，
+    超过上限直接返回 413；没有 Content-Length（分块传输）或声明不实时按实际读取的字节数计数，
+    超过上限后不再读取，丢弃应用的响应并返回 413。
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or self.max_body_size <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope['headers']).get(b'content-length', b'')
+        if declared.isdigit() and int(declared) > self.max_body_size:
+            logger.warning(f"Rejected {scope['path']}: Content-Length {int(declared)} exceeds {self.max_body_size}")
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_body_size:
+                    # 让应用按客户端断开处理，不再继续读取和落盘
+                    exceeded = True
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                return
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            logger.warning(f"Rejected {scope['path']}: request body exceeds {self.max_body_size} bytes")
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps(
+            {'detail': f"请求体超过大小限制 ({self.max_body_size // (1024 * 1024)}MB)"},
+            ensure_ascii=False,
+        ).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'connection', b'close'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
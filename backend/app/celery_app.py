@@ -1,6 +1,8 @@
 from celery import Celery
+from celery.signals import worker_init
 from kombu import Queue
 from app.config import settings
+from app.core.routing import ALL_QUEUES, QUEUE_LLM, QUEUE_PARSE
 import redis
 import logging
 
@@ -21,20 +23,6 @@ for logger_name in ['app.core.tasks', 'celery', 'celery.task']:
     logger = logging.getLogger(logger_name)
     logger.setLevel(logging.INFO)
 
-# 测试 Redis 连接
-def test_redis_connection():
-    try:
-        client = redis.Redis.from_url(REDIS_URL)
-        client.ping()
-        return True
-    except redis.ConnectionError as e:
-        print(f"Redis connection error: {e}")
-        return False
-
-# 确保 Redis 连接正常
-if not test_redis_connection():
-    raise Exception("Cannot connect to Redis")
-
 # 创建 Celery 实例
 celery_app = Celery(
     'app',
@@ -82,9 +70,7 @@ celery_app.conf.update(
         'interval_max': 0.5,
     },
     task_default_queue='default',
-    task_queues=(
-        Queue('default', routing_key='default'),
-    ),
+    task_queues=tuple(Queue(name, routing_key=name) for name in ALL_QUEUES),
     task_default_exchange='default',
     task_default_routing_key='default',
     worker_send_task_events=True,
@@ -107,8 +93,12 @@ celery_app.conf.update(
 )
 
 # 显式注册任务路由
+# 提交时会按负载类型显式指定队列（见 app.core.routing），这里是未指定时的默认路由
 celery_app.conf.task_routes = {
-    'app.core.tasks.process_and_summarize': {'queue': 'default'}
+    'app.core.tasks.process_and_summarize': {'queue': 'default'},
+    'app.core.tasks.parse_file': {'queue': QUEUE_PARSE},
+    'app.core.tasks.combine_and_summarize': {'queue': QUEUE_LLM},
+    'app.core.tasks.store_pipeline_error': {'queue': QUEUE_LLM},
 }
 
 # 自动发现任务
@@ -127,6 +117,8 @@ def check_redis_connection():
         print(f"Redis connection error: {e}")
         return False
 
-# 在启动时检查
-if not check_redis_connection():
-    raise Exception("Cannot connect to Redis") 
\ No newline at end of file
+# 只在 worker 启动时检查，导入本模块（如 API 进程）不再连接 Redis
+@worker_init.connect
+def check_redis_on_worker_init(**kwargs):
+    if not check_redis_connection():
+        raise Exception("Cannot connect to Redis")
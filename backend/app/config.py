@@ -20,7 +20,44 @@ class Settings(BaseSettings):
     # 文件上传配置
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
-    
+    MAX_REQUEST_SIZE: int = 300 * 1024 * 1024  # 单个请求体上限（多个文件合计，300MB），在解析表单之前检查
+    MAX_BATCH_SIZE: int = 1000  # 批量提交接口单次最多创建的任务数
+
+    # OCR配置
+    PDF_RENDER_THREADS: int = 0  # PDF 转图片线程数，0 表示使用 CPU 核数
+    OCR_WORKERS: int = 0  # OCR 进程池大小，0 表示使用 CPU 核数（prefork worker 中按子进程数平分），1 表示串行
+    PDF_RENDER_WINDOW: int = 10  # 每次转换的页数（流式OCR），0 表示一次性转换全部页面
+    PDF_RENDER_SPILL_DIR: str = ""  # 非空时先将页面图片写入该目录再逐页读取
+    OCR_BINARIZE: bool = False  # OCR 前是否二值化
+    OCR_DESKEW: bool = False  # OCR 前是否纠偏
+    OCR_HEAVY_PAGE_THRESHOLD: int = 200  # 页数达到该值的 PDF 进入 OCR 队列
+    PDF_TEXT_SAMPLE_PAGES: int = 3  # 提交时抽查前几页判断 PDF 是否有文本层
+    OCR_BACKEND: str = "cli"  # cli：每页调用 tesseract 命令行；tesserocr：常驻引擎（需安装 tesserocr）
+
+    # 缓存配置
+    CACHE_REDIS_DB: int = 1  # 缓存使用的 Redis 库，与 Celery 分开
+    CACHE_DIR: str = "cache"  # 磁盘缓存目录
+    EXTRACTION_CACHE_BACKEND: str = "redis"  # 文件解析结果缓存：redis / disk / none
+    EXTRACTION_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB
+    EXTRACTION_CACHE_TTL: int = 7 * 24 * 3600  # 7天
+    SUMMARY_CACHE_BACKEND: str = "redis"  # 总结结果缓存：redis / disk / none
+    SUMMARY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+    SUMMARY_CACHE_TTL: int = 24 * 3600  # 1天
+    URL_CACHE_BACKEND: str = "redis"  # 网页正文缓存（含 ETag / Last-Modified）：redis / disk / none
+    URL_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB
+    URL_CACHE_TTL: int = 7 * 24 * 3600  # 条目保留7天，过了新鲜期后用条件请求重新验证
+    URL_CACHE_FRESHNESS: int = 600  # 新鲜期（秒），期间直接使用缓存不发请求；0 表示每次都重新验证
+
+    # 网页解析配置
+    CONTENT_EXTRACTOR: str = "readability"  # readability：lxml + 文本密度打分；soup：BeautifulSoup 取 main/article
+    URL_FETCH_MAX_CONNECTIONS: int = 20  # 每个 worker 进程同时抓取的网页数上限
+    URL_FETCH_PER_HOST: int = 4  # 同一主机同时抓取的网页数上限
+    URL_FETCH_TIMEOUT: float = 30.0  # 单次网页请求超时（秒）
+    URL_FETCH_RETRIES: int = 2  # 连接失败、超时或 429/5xx 时的重试次数
+    URL_MAX_BYTES: int = 5 * 1024 * 1024  # 单个网页响应体上限（解压后），超过时中止下载；0 表示不限制
+    MAX_URLS_PER_TASK: int = 20  # 单个任务最多提交的 URL 数
+    FILTER_RULES_FILE: str = ""  # 过滤规则文件（JSON），修改后自动重新加载；为空时使用内置规则
+
     # ModelScope配置
     MODELSCOPE_TOKEN: str = ""
     
@@ -29,6 +66,23 @@ class Settings(BaseSettings):
     
     # 阿里云API配置
     ALI_API_KEY: str = ""
+    ALI_API_BASE_URL: str = "https://dashscope.aliyuncs.com/api/v1"  # 本地测试时可指向 scripts/llm_stub_server.py
+    LLM_TIMEOUT: float = 120.0  # 单次模型请求超时（秒）
+    LLM_MAX_CONNECTIONS: int = 20  # 每个 worker 进程的模型接口连接池大小
+
+    # 长文本总结配置
+    SUMMARY_CHUNK_TOKENS: int = 4000  # 单次请求的最大输入 token 数，超过时按句子分段总结再合并（同时受模型输入上限约束）
+    SUMMARY_CHUNK_OVERLAP_TOKENS: int = 200  # 相邻分段重复的 token 数（完整句子），保留段落衔接处的上下文
+    SUMMARY_MAP_CONCURRENCY: int = 4  # 同时进行的模型请求数
+
+    # 监控配置
+    METRICS_WORKER_PORT: int = 9808  # Celery worker 暴露 Prometheus 指标的端口，0 表示不开启
+
+    # 任务进度配置
+    PROGRESS_MIN_INTERVAL: float = 1.0  # 同一阶段内两次写入进度的最小间隔（秒）
+    STREAM_MAX_SECONDS: int = 1800  # SSE 推送连接最长保持时间（秒），到期推送 timeout 事件后关闭
+    STREAM_UNKNOWN_TASK_SECONDS: int = 120  # 结果后端一直没有任务记录（ID 无效、已过期或仍在排队）时，超过该时间关闭 SSE 连接
+    TOKEN_EVENT_INTERVAL: float = 0.2  # 总结增量文本合并推送的最小间隔（秒），避免每个 token 一次 Redis PUBLISH
 
     class Config:
         case_sensitive = True
@@ -1,2 +1 @@
-# 空文件，标记为Python包 
-from . import tasks 
\ No newline at end of file
+# 空文件，标记为Python包
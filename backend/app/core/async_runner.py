@@ -0,0 +1,36 @@
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+# 每个 worker 进程一个常驻事件循环，在后台线程中运行。
+# 同步的 Celery 任务通过 run_async 提交协程，事件循环及其上的连接池在任务之间复用。
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """获取当前进程的常驻事件循环（首次使用时创建，fork 后在子进程中重新创建）"""
+    global _loop, _loop_pid
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid() or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='async-runner', daemon=True)
+            thread.start()
+            _loop, _loop_pid = loop, os.getpid()
+            logger.info("Started background event loop")
+        return _loop
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """在常驻事件循环中运行协程并同步等待结果"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
@@ -0,0 +1,57 @@
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from app.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+# 批量任务的成员列表与任务结果一起保存在结果后端的 Redis 中
+
+
+def batch_key(batch_id: str) -> str:
+    return f"summary:batch:{batch_id}"
+
+
+def _result_ttl() -> int:
+    expires = celery_app.conf.result_expires
+    if isinstance(expires, timedelta):
+        return int(expires.total_seconds())
+    return int(expires or 24 * 3600)
+
+
+def save_batch(batch_id: str, task_ids: List[str]):
+    """记录批量任务包含的任务ID，过期时间与任务结果一致"""
+    key = batch_key(batch_id)
+    pipe = celery_app.backend.client.pipeline()
+    pipe.delete(key)
+    pipe.rpush(key, *task_ids)
+    pipe.expire(key, _result_ttl())
+    pipe.execute()
+
+
+def get_batch_task_ids(batch_id: str) -> Optional[List[str]]:
+    """返回批量任务的任务ID列表（按提交顺序），批量任务不存在或已过期时返回 None"""
+    task_ids = celery_app.backend.client.lrange(batch_key(batch_id), 0, -1)
+    if not task_ids:
+        return None
+    return [task_id.decode() if isinstance(task_id, bytes) else task_id for task_id in task_ids]
+
+
+def get_task_metas(task_ids: List[str]) -> List[Optional[dict]]:
+    """一次 MGET 读取多个任务在结果后端中的状态，尚无记录的任务返回 None"""
+    if not task_ids:
+        return []
+    backend = celery_app.backend
+    values = backend.client.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+    metas = []
+    for task_id, value in zip(task_ids, values):
+        if value is None:
+            metas.append(None)
+            continue
+        try:
+            metas.append(backend.decode_result(value))
+        except Exception as e:
+            logger.warning(f"Failed to decode result for task {task_id}: {str(e)}")
+            metas.append(None)
+    return metas
@@ -0,0 +1,174 @@
+import logging
+import re
+import string
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 句子边界：中文句末标点；英文句末标点后跟空白；换行。句末的右引号、右括号和空白归入当前句子
+SENTENCE_END = re.compile(
+    r'(?:[。！？；…]+[”’"\'）)\]」』】]*'
+    r'|[.!?;]+[”’"\'）)\]」』】]*(?=\s)'
+    r'|\n)\s*'
+)
+# 块末尾的英文句末标点，要看下一块开头是不是空白才能确定是否为句子边界
+TRAILING_TERMINATOR = re.compile(r'[.!?;]+[”’"\'）)\]」』】]*\Z')
+# 跨块保留的边界字符数上限，超过时不再等待（很长的空白串不会被反复扫描）
+MAX_CARRY_CHARS = 64
+
+# 估算 token 数时删除的字节
+_LETTERS = string.ascii_letters.encode()
+_LETTERS_AND_SPACES = _LETTERS + string.whitespace.encode()
+
+# 各模型的输入上限（token），用于限制分段大小
+MODEL_INPUT_TOKENS = {
+    'qwen-max': 30720,
+    'qwen-plus': 129024,
+    'qwen-turbo': 129024,
+}
+DEFAULT_INPUT_TOKENS = 6144
+# 为系统提示词和提示词模板预留的 token 数
+PROMPT_RESERVE_TOKENS = 512
+# 句子超过 token 上限这么多倍的字符数时，不再等待句子结束，直接切开
+MAX_SENTENCE_CHARS_PER_TOKEN = 8
+
+TokenCounter = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """不依赖分词器估算 token 数（偏保守）：英文字母每 3 个算一个 token，汉字、数字、标点各算一个
+
+    各段估算值之和不小于合并后的估算值，按句累加得到的分段 token 数不会低估。
+    """
+    data = text.encode('ascii', 'replace')  # 非 ASCII 字符替换为 '?'，长度不变
+    letters = len(data) - len(data.translate(None, _LETTERS))
+    return len(data.translate(None, _LETTERS_AND_SPACES)) - (-letters // 3)
+
+
+_token_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(model: str) -> TokenCounter:
+    """获取模型对应的 token 计数函数
+
+    安装了 tiktoken 时使用 dashscope 自带的通义千问分词器精确计数，否则按字符类别估算。
+    """
+    if model not in _token_counters:
+        try:
+            from dashscope import get_tokenizer
+
+            tokenizer = get_tokenizer(model)
+            _token_counters[model] = lambda text: len(tokenizer.encode(text))
+            logger.info(f"Using {model} tokenizer for chunking")
+        except Exception as e:
+            logger.info(f"Tokenizer for {model} is not available, estimating token counts: {str(e)}")
+            _token_counters[model] = estimate_tokens
+    return _token_counters[model]
+
+
+def chunk_token_budget(model: str, requested: int, max_output_tokens: int = 0) -> int:
+    """单个分段的 token 上限：不超过配置值，也不超过模型输入上限减去输出和提示词预留"""
+    available = MODEL_INPUT_TOKENS.get(model, DEFAULT_INPUT_TOKENS) - max_output_tokens - PROMPT_RESERVE_TOKENS
+    return max(1, min(requested, available))
+
+
+def iter_sentences(pieces: Iterable[str], max_chars: int) -> Iterator[str]:
+    """从连续的文本块中逐句产出（保留原有空白，拼接后与原文一致）
+
+    句子可以跨文本块。每个文本块只扫描一次：上一块末尾可能与下一块组成句子边界的几个字符
+    （落在块末尾的句末标点和空白、等待后续空白的英文句末标点）留到下一块一起扫描，
+    其余未完成的句子暂存在列表中，产出时才拼接。超过 max_chars 仍没有边界的内容直接切开。
+    总耗时与输入长度成正比，与文本块的大小和数量无关。
+    """
+    parts: List[str] = []  # 当前句子已扫描过的部分
+    pending = 0  # parts 的总长度
+    carry = ''
+    for piece in pieces:
+        text = carry + piece
+        carry = ''
+        start = 0
+        for match in SENTENCE_END.finditer(text):
+            if match.end() == len(text) and match.end() - match.start() <= MAX_CARRY_CHARS:
+                # 边界落在末尾时，后面的引号或空白可能在下一块中，从边界开头留到下一块
+                carry = text[match.start():]
+                break
+            parts.append(text[start:match.end()])
+            yield ''.join(parts)
+            parts, pending = [], 0
+            start = match.end()
+        if not carry:
+            tail = TRAILING_TERMINATOR.search(text, max(start, len(text) - MAX_CARRY_CHARS))
+            if tail:
+                carry = text[tail.start():]
+        rest = text[start:len(text) - len(carry)]
+        if rest:
+            parts.append(rest)
+            pending += len(rest)
+        if pending > max_chars:
+            joined = ''.join(parts)
+            position = 0
+            while len(joined) - position > max_chars:
+                yield joined[position:position + max_chars]
+                position += max_chars
+            parts, pending = [joined[position:]], len(joined) - position
+    parts.append(carry)
+    if any(parts):
+        yield ''.join(parts)
+
+
+def _split_long(sentence: str, max_tokens: int, count_tokens: TokenCounter) -> Iterator[Tuple[str, int]]:
+    """产出 (片段, token 数)；超过 token 上限的句子切成若干段，尽量在空白处切开"""
+    while sentence:
+        total = count_tokens(sentence)
+        if total <= max_tokens:
+            yield sentence, total
+            return
+        cut = max(1, len(sentence) * max_tokens // total)
+        while cut > 1 and count_tokens(sentence[:cut]) > max_tokens:
+            cut = cut * 9 // 10
+        space = sentence.rfind(' ', cut // 2, cut)
+        if space > 0:
+            cut = space + 1
+        part = sentence[:cut]
+        yield part, count_tokens(part)
+        sentence = sentence[cut:]
+
+
+def iter_chunks(text: Union[str, Iterable[str]], max_tokens: int, overlap_tokens: int = 0,
+                count_tokens: Optional[TokenCounter] = None) -> Iterator[str]:
+    """按句子边界把文本切成不超过 max_tokens 的分段，逐段产出
+
+    text 可以是字符串，也可以是文本块的迭代器（如 DocumentParser.iter_txt），不需要先拼成整篇。
+    相邻分段之间重复最多 overlap_tokens 个 token 的完整句子，保留上下文。
+    每个句子只计数一次，总耗时与输入长度成正比。
+    """
+    count_tokens = count_tokens or estimate_tokens
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    pieces = [text] if isinstance(text, str) else text
+
+    window = deque()  # (句子, token 数)
+    total = 0
+    fresh = False  # 窗口中是否有尚未产出过的句子
+    for sentence in iter_sentences(pieces, max_tokens * MAX_SENTENCE_CHARS_PER_TOKEN):
+        for part, tokens in _split_long(sentence, max_tokens, count_tokens):
+            if fresh and total + tokens > max_tokens:
+                chunk = ''.join(s for s, _ in window).strip()
+                if chunk:
+                    yield chunk
+                # 末尾不超过 overlap_tokens 的句子留作下一段的开头
+                kept, kept_tokens = deque(), 0
+                while window and kept_tokens + window[-1][1] <= overlap_tokens:
+                    kept.appendleft(window.pop())
+                    kept_tokens += kept[0][1]
+                window, total, fresh = kept, kept_tokens, False
+            # 重叠部分加上新句子仍超限时，从最早的句子开始丢弃
+            while window and total + tokens > max_tokens:
+                total -= window.popleft()[1]
+            window.append((part, tokens))
+            total += tokens
+            fresh = True
+    if fresh:
+        chunk = ''.join(s for s, _ in window).strip()
+        if chunk:
+            yield chunk
@@ -0,0 +1,63 @@
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from app.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+# 任务事件通过 Redis pub/sub 从 worker 推送到 API，由 GET /api/summary/{task_id}/stream 转发给客户端
+# 事件类型：stage（处理阶段）、token（总结增量文本）、done（最终结果）、error（失败）；
+# timeout 只由 /stream 在连接达到最长保持时间时发出，任务本身仍在继续
+
+
+def event_channel(task_id: str) -> str:
+    return f"summary:events:{task_id}"
+
+
+def publish_event(task_id: str, event_type: str, **data):
+    """发布任务事件；推送只用于实时展示，失败时不影响任务本身"""
+    try:
+        message = json.dumps({"type": event_type, **data}, ensure_ascii=False)
+        celery_app.backend.client.publish(event_channel(task_id), message)
+    except Exception as e:
+        logger.warning(f"Failed to publish {event_type} event for task {task_id}: {str(e)}")
+
+
+class TokenPublisher:
+    """合并推送总结的增量文本
+
+    作为 on_token 回调在 worker 的常驻事件循环中调用：只把增量文本放入缓冲区，
+    每隔 interval 秒由专用线程发布一次合并后的 token 事件，Redis 的同步 PUBLISH
+    不在事件循环中执行，Redis 变慢时也不会阻塞同一循环上的其他模型请求和网页抓取。
+    上一次发布还没完成时继续累积，不会堆积发布请求。
+    单线程按提交顺序发布，close() 推送剩余文本并等待发布完成，之后再发布 done 事件。
+    """
+
+    def __init__(self, task_id: str, interval: float):
+        self.task_id = task_id
+        self.interval = interval
+        self._parts: List[str] = []
+        self._pending: Optional[Future] = None
+        self._last_flush = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='token-publisher')
+
+    def __call__(self, delta: str):
+        self._parts.append(delta)
+        idle = self._pending is None or self._pending.done()
+        if idle and time.monotonic() - self._last_flush >= self.interval:
+            self._flush()
+
+    def _flush(self):
+        text = ''.join(self._parts)
+        self._parts = []
+        self._last_flush = time.monotonic()
+        if text:
+            self._pending = self._executor.submit(publish_event, self.task_id, 'token', text=text)
+
+    def close(self):
+        """推送剩余的增量文本并等待全部发布完成（在任务线程中调用，模型调用结束之后）"""
+        self._flush()
+        self._executor.shutdown(wait=True)
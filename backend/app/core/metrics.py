@@ -0,0 +1,161 @@
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+from celery.signals import (
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_shutdown,
+)
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# API 通过 GET /metrics 暴露指标，worker 在 METRICS_WORKER_PORT 端口上单独暴露。
+# prefork 等多进程 worker 需要设置环境变量 PROMETHEUS_MULTIPROC_DIR，由各子进程写入共享目录后汇总。
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    'summary_stage_duration_seconds',
+    '各处理阶段耗时：upload / fetch / extract / filter / llm / store',
+    ['stage'],
+    buckets=DURATION_BUCKETS,
+)
+STAGE_FAILURES = Counter(
+    'summary_stage_failures_total',
+    '各处理阶段抛出异常的次数',
+    ['stage'],
+)
+PARSE_SECONDS = Histogram(
+    'summary_parse_duration_seconds',
+    '文件解析耗时，按文件类型和解析方式（text / ocr / mixed）区分',
+    ['file_type', 'method'],
+    buckets=DURATION_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    'summary_cache_requests_total',
+    '结果缓存查询次数，result 为 hit / miss / error',
+    ['cache', 'result'],
+)
+URL_REVALIDATIONS = Counter(
+    'summary_url_revalidations_total',
+    '网页缓存过了新鲜期后条件请求的结果，result 为 not_modified / modified',
+    ['result'],
+)
+RESULTS = Counter(
+    'summary_results_total',
+    '写入结果后端的最终结果数，按 success / error 区分',
+    ['status'],
+)
+TASK_SECONDS = Histogram(
+    'summary_celery_task_duration_seconds',
+    'Celery 任务执行耗时',
+    ['task', 'state'],
+    buckets=DURATION_BUCKETS,
+)
+TASK_RETRIES = Counter(
+    'summary_celery_task_retries_total',
+    'Celery 任务重试次数',
+    ['task'],
+)
+TASK_FAILURES = Counter(
+    'summary_celery_task_failures_total',
+    'Celery 任务抛出异常的次数',
+    ['task'],
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """记录代码块的耗时，抛出异常时同时记一次失败"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_FAILURES.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def metrics_registry():
+    """多进程模式下汇总共享目录中各进程的指标，否则直接使用本进程的指标"""
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics():
+    """返回 Prometheus 文本格式的指标和对应的 Content-Type"""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+# ---------------------------------------------------------------- Celery 信号
+
+_task_started = {}
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    start = _task_started.pop(task_id, None)
+    if start is not None and task is not None:
+        TASK_SECONDS.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - start)
+
+
+@task_retry.connect
+def record_task_retry(sender=None, **kwargs):
+    TASK_RETRIES.labels(getattr(sender, 'name', 'unknown')).inc()
+
+
+@task_failure.connect
+def record_task_failure(sender=None, **kwargs):
+    TASK_FAILURES.labels(getattr(sender, 'name', 'unknown')).inc()
+
+
+@worker_init.connect
+def start_worker_metrics_server(**kwargs):
+    """worker 主进程启动时开启指标 HTTP 服务；多进程模式下先清空上次运行留下的指标文件"""
+    if MULTIPROC_DIR:
+        shutil.rmtree(MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    if not settings.METRICS_WORKER_PORT:
+        return
+    try:
+        start_http_server(settings.METRICS_WORKER_PORT, registry=metrics_registry())
+        logger.info(f"Worker metrics available on port {settings.METRICS_WORKER_PORT}")
+    except OSError as e:
+        logger.warning(f"Failed to start worker metrics server on port {settings.METRICS_WORKER_PORT}: {str(e)}")
+
+
+@worker_process_shutdown.connect
+def mark_worker_process_dead(pid=None, **kwargs):
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
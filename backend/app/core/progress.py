@@ -0,0 +1,170 @@
+import json
+import logging
+import time
+from typing import List, Optional
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.core.events import publish_event
+
+logger = logging.getLogger(__name__)
+
+# 进度写入结果后端时使用的任务状态，GET /api/summary/{task_id} 读取后返回给客户端
+PROGRESS_STATE = 'PROGRESS'
+
+
+class ProgressReporter:
+    """把任务进度（阶段、页数、字节数等）写入结果后端
+
+    阶段切换时立即写入，同一阶段内的更新按 PROGRESS_MIN_INTERVAL 限流，
+    避免逐页 OCR 时频繁写 Redis。每次写入同时推送一条事件：阶段切换时为 stage，
+    同一阶段内的更新为 progress。
+    """
+
+    def __init__(self, task_id: str, backend=None, min_interval: Optional[float] = None):
+        self.task_id = task_id
+        self.backend = backend or celery_app.backend
+        self.min_interval = settings.PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.started_at = time.time()
+        self.stage = None
+        self.stage_started_at = self.started_at
+        self._last_report = 0.0
+
+    def update(self, stage: str, force: bool = False, **meta):
+        """更新进度；meta 中的 pages_done / pages_total 用于估算当前阶段的剩余时间"""
+        now = time.time()
+        stage_changed = stage != self.stage
+        if stage_changed:
+            self.stage = stage
+            self.stage_started_at = now
+        if not (force or stage_changed) and now - self._last_report < self.min_interval:
+            return
+        self._last_report = now
+
+        progress = {
+            "stage": stage,
+            "elapsed": round(now - self.started_at, 2),
+            "stage_elapsed": round(now - self.stage_started_at, 2),
+            "updated_at": now,
+            **meta,
+        }
+        done, total = meta.get('pages_done'), meta.get('pages_total')
+        if done and total:
+            progress["eta_seconds"] = round((now - self.stage_started_at) / done * (total - done), 1)
+
+        self._write(progress, 'stage' if stage_changed else 'progress')
+
+    def _write(self, progress: dict, event_type: str):
+        try:
+            self.backend.store_result(self.task_id, progress, PROGRESS_STATE)
+        except Exception as e:
+            logger.warning(f"Failed to store progress for task {self.task_id}: {str(e)}")
+        publish_event(self.task_id, event_type, **progress)
+
+
+def file_progress_key(task_id: str, file_index: int) -> str:
+    return f"summary:progress:{task_id}:file:{file_index}"
+
+
+def init_file_progress(backend, task_id: str, file_names: List[str], started_at: float) -> dict:
+    """分发文件解析子任务前写入每个文件的初始进度，返回汇总后的任务进度字段"""
+    now = time.time()
+    entries = [
+        {"file_name": name, "done": False, "job_started_at": started_at, "parsing_started_at": now}
+        for name in file_names
+    ]
+    for i, entry in enumerate(entries):
+        try:
+            backend.set(file_progress_key(task_id, i), json.dumps(entry, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"Failed to store file progress for task {task_id}: {str(e)}")
+            break
+    return aggregate_file_progress(entries, now)
+
+
+def aggregate_file_progress(entries: List[dict], now: float) -> dict:
+    """汇总各文件的进度：已完成文件数、总页数、每个文件的进度，按整体完成比例估算剩余时间
+
+    已完成的文件计为 1，已知页数的文件按页数比例计算，尚未开始或没有页数（如 DOCX）的文件计为 0。
+    """
+    files = [{
+        "file_name": entry.get("file_name"),
+        "done": bool(entry.get("done")),
+        "pages_done": entry.get("pages_done"),
+        "pages_total": entry.get("pages_total"),
+    } for entry in entries]
+    completed = 0.0
+    for file in files:
+        if file["done"]:
+            completed += 1
+        elif file["pages_done"] and file["pages_total"]:
+            completed += file["pages_done"] / file["pages_total"]
+    progress = {
+        "files_total": len(files),
+        "files_done": sum(1 for file in files if file["done"]),
+        "pages_done": sum(file["pages_done"] or 0 for file in files),
+        "pages_total": sum(file["pages_total"] or 0 for file in files),
+        "files": files,
+    }
+    started = [entry["parsing_started_at"] for entry in entries if entry.get("parsing_started_at")]
+    fraction = completed / len(files) if files else 0
+    if started and 0 < fraction < 1:
+        progress["eta_seconds"] = round((now - min(started)) / fraction * (1 - fraction), 1)
+    return progress
+
+
+class FileProgressReporter(ProgressReporter):
+    """多文件任务中单个文件解析子任务的进度
+
+    chord 中各文件的解析子任务并行运行，进度都写到同一个父任务 ID 下。每个子任务只把本文件的
+    进度写入自己的键，再读取全部文件的进度，汇总成任务级别的进度写入结果后端，
+    避免各子任务互相覆盖、进度在文件之间跳动。所有文件完成时阶段为 parsed。
+    """
+
+    def __init__(self, task_id: str, file_index: int, files_total: int, file_name: str,
+                 backend=None, min_interval: Optional[float] = None):
+        super().__init__(task_id, backend, min_interval)
+        self.file_index = file_index
+        self.files_total = files_total
+        self._entry = {"file_name": file_name, "done": False}
+        self._entry_loaded = False
+
+    def report(self, done: bool = False, **meta):
+        """更新本文件的进度（pages_done / pages_total），done 为 True 时立即写入"""
+        now = time.time()
+        self._entry.update(meta, done=done)
+        if not done and now - self._last_report < self.min_interval:
+            return
+        self._last_report = now
+
+        keys = [file_progress_key(self.task_id, i) for i in range(self.files_total)]
+        try:
+            if not self._entry_loaded:
+                # 保留父任务写入的开始时间
+                stored = self.backend.get(keys[self.file_index])
+                if stored:
+                    self._entry = {**json.loads(stored), **self._entry}
+                self._entry_loaded = True
+            self.backend.set(keys[self.file_index], json.dumps(self._entry, ensure_ascii=False))
+            values = self.backend.mget(keys)
+        except Exception as e:
+            logger.warning(f"Failed to store file progress for task {self.task_id}: {str(e)}")
+            return
+        if isinstance(values, dict):
+            values = [values.get(key) for key in keys]
+        entries = [json.loads(value) if value else {"done": False} for value in values]
+
+        progress = aggregate_file_progress(entries, now)
+        stage = 'parsed' if progress["files_done"] == self.files_total else 'parsing'
+        job_started = min((entry["job_started_at"] for entry in entries if entry.get("job_started_at")),
+                          default=self.started_at)
+        parsing_started = min((entry["parsing_started_at"] for entry in entries if entry.get("parsing_started_at")),
+                              default=self.started_at)
+        progress = {
+            "stage": stage,
+            "elapsed": round(now - job_started, 2),
+            "stage_elapsed": round(now - parsing_started, 2),
+            "updated_at": now,
+            **progress,
+        }
+        self._write(progress, 'stage' if stage == 'parsed' else 'progress')
@@ -0,0 +1,58 @@
+import logging
+import os
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 按负载类型划分的队列，每个队列由独立配置的 worker 消费（见 docker-compose.yml）
+QUEUE_DEFAULT = 'default'
+QUEUE_LLM = 'llm'      # 纯文本输入、合并与调用大模型：IO 密集，延迟敏感
+QUEUE_FETCH = 'fetch'  # 抓取网页：IO 密集
+QUEUE_PARSE = 'parse'  # 轻量文件解析：TXT、DOCX、带文本层的 PDF
+QUEUE_OCR = 'ocr'      # OCR：扫描 PDF、图片、超大 PDF，CPU 密集
+
+ALL_QUEUES = [QUEUE_DEFAULT, QUEUE_LLM, QUEUE_FETCH, QUEUE_PARSE, QUEUE_OCR]
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff'}
+
+
+def classify_job(file_paths, text, url) -> str:
+    """按输入类型确定主任务的队列"""
+    if url:
+        return QUEUE_FETCH
+    # 文件任务的主任务只负责分发解析子任务，与纯文本任务一样是轻量任务
+    return QUEUE_LLM
+
+
+def classify_file(file_path: str) -> str:
+    """按扩展名和页数确定文件解析子任务的队列"""
+    extension = file_path.lower().split('.')[-1]
+    if extension in IMAGE_EXTENSIONS:
+        return QUEUE_OCR
+    if extension == 'pdf':
+        try:
+            page_count, has_text = _inspect_pdf(file_path)
+        except ImportError:
+            # API 镜像中没有安装 PyMuPDF 时无法判断，交给能处理所有 PDF 的 OCR 队列
+            logger.debug(f"PyMuPDF not available, routing {os.path.basename(file_path)} to OCR queue")
+            return QUEUE_OCR
+        except Exception as e:
+            logger.warning(f"Failed to inspect PDF {file_path}, routing to OCR queue: {str(e)}")
+            return QUEUE_OCR
+        if not has_text or page_count >= settings.OCR_HEAVY_PAGE_THRESHOLD:
+            return QUEUE_OCR
+    return QUEUE_PARSE
+
+
+def _inspect_pdf(file_path: str):
+    """读取 PDF 页数，并抽查前几页是否有文本层"""
+    # 只在需要判断 PDF 类型时导入，API 进程启动时不加载 PyMuPDF
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        page_count = len(doc)
+        sample = min(page_count, settings.PDF_TEXT_SAMPLE_PAGES)
+        has_text = sample > 0 and all(doc[i].get_text("text").strip() for i in range(sample))
+    logger.debug(f"PDF {os.path.basename(file_path)}: {page_count} pages, text layer: {has_text}")
+    return page_count, has_text
@@ -1,35 +1,14 @@
 from typing import List
-import numpy as np
+
+from app.core.chunker import iter_chunks
 
 class Summarizer:
     def __init__(self):
         pass
         
-    async def split_text(self, text: str, max_length: int = 1000) -> List[str]:
-        """智能分段文本"""
-        if len(text) <= max_length:
-            return [text]
-            
-        segments = []
-        sentences = text.split('。')
-        current_segment = []
-        current_length = 0
-        
-        for sentence in sentences:
-            sentence = sentence.strip() + '。'
-            if current_length + len(sentence) <= max_length:
-                current_segment.append(sentence)
-                current_length += len(sentence)
-            else:
-                if current_segment:
-                    segments.append(''.join(current_segment))
-                current_segment = [sentence]
-                current_length = len(sentence)
-                
-        if current_segment:
-            segments.append(''.join(current_segment))
-            
-        return segments
+    async def split_text(self, text: str, max_tokens: int = 1000, overlap_tokens: int = 0) -> List[str]:
+        """智能分段文本：按中英文句子边界切分，每段不超过 max_tokens 个 token（流式处理请直接用 iter_chunks）"""
+        return list(iter_chunks(text, max_tokens, overlap_tokens))
     
     async def summarize(self, text: str) -> str:
         """临时的摘要实现，后续替换为实际的模型"""
@@ -1,11 +1,15 @@
 from app.celery_app import celery_app
+from celery import chord, group
+from celery.signals import worker_init
 from typing import List, Optional
-from app.services.ali_summary_service import AliSummaryService
 from app.config import settings
+from app.core.async_runner import run_async
+from app.core.routing import QUEUE_LLM, QUEUE_PARSE
+from app.core.events import TokenPublisher, publish_event
+from app.core.progress import FileProgressReporter, ProgressReporter, init_file_progress
+from app.core.metrics import RESULTS, observe_stage
 import logging
-import asyncio
 import os
-from app.services.document_parser import DocumentParser
 from redis.lock import Lock
 from contextlib import contextmanager
 import time
@@ -15,8 +19,49 @@ import json
 # 确保使用正确的日志记录器
 logger = logging.getLogger('app.core.tasks')
 
-summary_service = AliSummaryService()
-document_parser = DocumentParser()
+# 解析器和总结服务在首次使用时创建，API 进程导入本模块时不加载 PyMuPDF、dashscope 等依赖
+_summary_service = None
+_document_parser = None
+
+def get_summary_service():
+    """获取总结服务（首次使用时创建）"""
+    global _summary_service
+    if _summary_service is None:
+        from app.services.ali_summary_service import AliSummaryService
+        _summary_service = AliSummaryService()
+    return _summary_service
+
+def get_document_parser():
+    """获取文档解析器（首次使用时创建）"""
+    global _document_parser
+    if _document_parser is None:
+        from app.services.document_parser import DocumentParser
+        _document_parser = DocumentParser()
+    return _document_parser
+
+def ocr_workers_per_child(worker) -> Optional[int]:
+    """prefork worker 的每个子进程各自创建 OCR 进程池，按子进程数平分 CPU 核数；其他池类型返回 None"""
+    from celery import concurrency
+
+    try:
+        pool_cls = concurrency.get_implementation(worker.pool_cls)
+    except Exception:
+        return None
+    if pool_cls.__module__ != 'celery.concurrency.prefork' or not worker.concurrency:
+        return None
+    return max(1, (os.cpu_count() or 1) // worker.concurrency)
+
+@worker_init.connect
+def preload_services(sender=None, **kwargs):
+    """worker 主进程启动时预先创建解析器和总结服务，fork 出的子进程（包括回收重启的）直接复用"""
+    parser = get_document_parser()
+    # 未配置 OCR_WORKERS 时，避免 prefork 的每个子进程都按 CPU 核数创建 OCR 进程池
+    workers = ocr_workers_per_child(sender) if sender is not None and not settings.OCR_WORKERS else None
+    if workers:
+        parser.ocr_workers = workers
+        logger.info(f"OCR process pool size per worker child: {workers}")
+    if settings.USE_LLM:
+        get_summary_service()
 
 @contextmanager
 def redis_lock(backend, lock_key, timeout=60):
@@ -44,9 +89,14 @@ def redis_lock(backend, lock_key, timeout=60):
     track_started=True,
     acks_late=True
 )
-def process_and_summarize(self, task_id: str, file_paths: List[str], text: Optional[str], url: Optional[str]):
-    """处理和总结内容的 Celery 任务"""
+def process_and_summarize(self, task_id: str, file_paths: List[str], text: Optional[str], url: Optional[str],
+                          file_hashes: Optional[List[str]] = None, file_queues: Optional[List[str]] = None,
+                          urls: Optional[List[str]] = None):
+    """处理和总结内容的 Celery 任务；url 和 urls 可同时提供，按 url、urls 的顺序并发抓取"""
     results = []
+    url_list = [u.strip() for u in ([url] if url else []) + (urls or []) if u and u.strip()]
+    dispatched = False
+    progress = ProgressReporter(task_id, self.backend)
     try:
         logger.info(f"Starting task {task_id}")
         
@@ -54,7 +104,7 @@ def process_and_summarize(self, task_id: str, file_paths: List[str], text: Optio
         input_count = sum([
             bool(file_paths),
             bool(text and text.strip()),
-            bool(url and url.strip())
+            bool(url_list)
         ])
         
         if input_count == 0:
@@ -69,96 +119,210 @@ def process_and_summarize(self, task_id: str, file_paths: List[str], text: Optio
                 "error": "请只选择一种输入方式（文件、文本或URL）"
             })
 
-        # 处理 URL
-        if url:
-            logger.info(f"Processing URL: {url}")
-            url_content = document_parser.parse_url(url)
-            if url_content is None:
-                return store_result(self.backend, task_id, {
-                    "status": "error",
-                    "error": "无法解析URL内容，请检查URL是否有效或直接复制内容"
-                })
-            results.append(url_content)
+        # 处理 URL：所有 URL 并发抓取，结果按提交顺序合并
+        if url_list:
+            logger.info(f"Processing {len(url_list)} URL(s): {url_list}")
+            progress.update('fetching', urls_total=len(url_list))
+            fetched = {'urls_done': 0, 'bytes_fetched': 0}
 
-        # 处理文件
-        if file_paths:
-            logger.info(f"Processing {len(file_paths)} files")
-            for file_path in file_paths:
-                try:
-                    content = document_parser.parse_file(file_path)
-                    if content:
-                        file_name = os.path.basename(file_path)
-                        results.append(f"文件 {file_name} 内容:\n{content}")
-                        logger.info(f"Successfully processed file {file_name}")
-                    else:
-                        logger.warning(f"No content extracted from file: {file_path}")
-                except Exception as e:
-                    logger.error(f"Error processing file {file_path}: {str(e)}")
+            def on_fetched(index: int, size: int):
+                fetched['urls_done'] += 1
+                fetched['bytes_fetched'] += size
+                progress.update('fetching', force=True, urls_total=len(url_list), **fetched)
+
+            url_contents = get_document_parser().parse_urls(url_list, on_progress=on_fetched)
+            for page_url, url_content in zip(url_list, url_contents):
+                # 提取出空白正文与解析失败同样处理，不对空页面生成总结
+                if url_content is None or not url_content.strip():
+                    error = "无法解析URL内容，请检查URL是否有效或直接复制内容"
                     return store_result(self.backend, task_id, {
                         "status": "error",
-                        "error": f"处理文件失败: {str(e)}"
+                        "error": error if len(url_list) == 1 else f"{error}: {page_url}"
                     })
+                results.append(url_content if len(url_list) == 1 else f"URL {page_url} 内容:\n{url_content}")
+
+        # 处理文件：每个文件一个解析子任务，全部完成后由 combine_and_summarize 合并总结
+        if file_paths:
+            logger.info(f"Dispatching {len(file_paths)} file parse subtasks")
+            # 解析子任务按提交时的分类进入 parse / ocr 队列
+            header = group(
+                parse_file.s(
+                    file_path, file_hashes[i] if file_hashes else None, task_id,
+                    file_index=i, files_total=len(file_paths)
+                ).set(queue=file_queues[i] if file_queues else QUEUE_PARSE)
+                for i, file_path in enumerate(file_paths)
+            )
+            callback = combine_and_summarize.s(task_id=task_id).set(queue=QUEUE_LLM).on_error(
+                store_pipeline_error.s(task_id=task_id).set(queue=QUEUE_LLM)
+            )
+            # 先写入进度再分发，避免子任务很快完成时最终结果被进度覆盖；
+            # 各文件的进度由解析子任务分别写入，汇总为任务级别的进度
+            progress.update('parsing', **init_file_progress(
+                self.backend, task_id, [original_file_name(path, task_id) for path in file_paths], progress.started_at
+            ))
+            chord(header)(callback)
+            # 文件由各解析子任务清理
+            dispatched = True
+            return {"status": "processing"}
 
         # 处理文本
         if text:
             logger.info("Processing text input")
             results.append(f"文本内容:\n{text}")
 
-        # 检查是否有内容被处理
-        if not results:
-            return store_result(self.backend, task_id, {
-                "status": "error",
-                "error": "没有找到需要处理的内容"
-            })
+        return summarize_and_store(self.backend, task_id, results, self.request)
+
+    except Exception as e:
+        logger.error(f"Task {task_id} failed: {str(e)}", exc_info=True)
+        return store_result(self.backend, task_id, {
+            "status": "error",
+            "error": str(e)
+        })
+    finally:
+        # 清理文件
+        if not dispatched:
+            cleanup_files(file_paths)
+
+def original_file_name(file_path: str, task_id: Optional[str]) -> str:
+    """上传文件保存为 {task_id}_{原文件名}，去掉任务 ID 前缀
+
+    文件名会写入合并后的文本，带上每次都不同的任务 ID 会使总结缓存永远无法命中。
+    """
+    file_name = os.path.basename(file_path)
+    prefix = f"{task_id}_"
+    if task_id and file_name.startswith(prefix):
+        return file_name[len(prefix):]
+    return file_name
+
+@celery_app.task(
+    bind=True,
+    name='app.core.tasks.parse_file',
+    ignore_result=False,
+    acks_late=True
+)
+def parse_file(self, file_path: str, content_hash: Optional[str] = None, task_id: Optional[str] = None,
+               file_index: Optional[int] = None, files_total: Optional[int] = None) -> dict:
+    """解析单个文件的子任务，出错时返回错误信息而不抛出异常，避免整个 chord 失败
+
+    file_index / files_total 为本文件在父任务中的位置和文件总数，用于汇总任务级别的进度。
+    """
+    file_name = original_file_name(file_path, task_id)
+    progress = None
+    on_progress = None
+    if task_id and file_index is not None and files_total:
+        progress = FileProgressReporter(task_id, file_index, files_total, file_name, self.backend)
+        on_progress = lambda done, total: progress.report(pages_done=done, pages_total=total)
+    try:
+        content = get_document_parser().parse_file(file_path, content_hash, on_progress)
+        if content:
+            logger.info(f"Successfully processed file {file_name}")
+        else:
+            logger.warning(f"No content extracted from file: {file_path}")
+        return {"file_name": file_name, "content": content, "error": None}
+    except Exception as e:
+        logger.error(f"Error processing file {file_path}: {str(e)}")
+        return {"file_name": file_name, "content": None, "error": str(e)}
+    finally:
+        if progress:
+            progress.report(done=True)
+        cleanup_files([file_path])
 
-        # 合并所有内容
-        combined_text = "\n\n".join(results)
-        logger.info(f"Combined text length: {len(combined_text)}")
-
-        # 根据配置决定是否使用大模型
-        if settings.USE_LLM:
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                summary = loop.run_until_complete(summary_service.summarize(combined_text))
-                loop.close()
-                result_summary = summary
-            except Exception as e:
-                logger.error(f"Error summarizing content: {str(e)}")
+@celery_app.task(
+    bind=True,
+    name='app.core.tasks.combine_and_summarize',
+    ignore_result=False,
+    acks_late=True
+)
+def combine_and_summarize(self, parsed_files: List[dict], task_id: str):
+    """合并各文件的解析结果（按上传顺序）并生成总结"""
+    try:
+        results = []
+        for parsed in parsed_files:
+            if parsed["error"]:
                 return store_result(self.backend, task_id, {
                     "status": "error",
-                    "error": f"总结失败: {str(e)}"
+                    "error": f"处理文件失败: {parsed['error']}"
                 })
-        else:
-            result_summary = combined_text
-
-        # 存储成功结果
-        result = {
-            "status": "success",
-            "summary": result_summary
-        }
-        return store_result(self.backend, task_id, result, self.request)
-
+            if parsed["content"]:
+                results.append(f"文件 {parsed['file_name']} 内容:\n{parsed['content']}")
+        return summarize_and_store(self.backend, task_id, results)
     except Exception as e:
         logger.error(f"Task {task_id} failed: {str(e)}", exc_info=True)
         return store_result(self.backend, task_id, {
             "status": "error",
             "error": str(e)
         })
-    finally:
-        # 清理文件
-        cleanup_files(file_paths)
+
+@celery_app.task(name='app.core.tasks.store_pipeline_error')
+def store_pipeline_error(request, exc, traceback, task_id: str):
+    """chord 失败（如子任务被强制终止）时记录错误结果，避免客户端一直等待"""
+    logger.error(f"Pipeline for task {task_id} failed: {exc}")
+    store_result(celery_app.backend, task_id, {
+        "status": "error",
+        "error": f"处理失败: {exc}"
+    })
+
+def summarize_and_store(backend, task_id: str, results: List[str], request=None) -> dict:
+    """合并内容，按配置生成总结并存储结果"""
+    # 检查是否有内容被处理
+    if not results:
+        return store_result(backend, task_id, {
+            "status": "error",
+            "error": "没有找到需要处理的内容"
+        })
+
+    # 合并所有内容
+    combined_text = "\n\n".join(results)
+    logger.info(f"Combined text length: {len(combined_text)}")
+
+    # 根据配置决定是否使用大模型
+    cached = False
+    if settings.USE_LLM:
+        try:
+            # 相同内容、模型和参数的总结直接使用缓存，不再调用远程接口
+            summary_service = get_summary_service()
+            summary = summary_service.get_cached_summary(combined_text)
+            cached = summary is not None
+            if not cached:
+                ProgressReporter(task_id, backend).update('summarizing', content_length=len(combined_text))
+                # 在 worker 常驻的事件循环中运行，模型接口连接池在任务之间复用；
+                # 生成的增量文本合并后由后台线程推送给 /stream 的订阅者，不阻塞事件循环
+                publisher = TokenPublisher(task_id, settings.TOKEN_EVENT_INTERVAL)
+                try:
+                    summary = run_async(summary_service.summarize(combined_text, on_token=publisher))
+                finally:
+                    publisher.close()
+            result_summary = summary
+        except Exception as e:
+            logger.error(f"Error summarizing content: {str(e)}")
+            return store_result(backend, task_id, {
+                "status": "error",
+                "error": f"总结失败: {str(e)}"
+            })
+    else:
+        result_summary = combined_text
+
+    # 存储成功结果
+    result = {
+        "status": "success",
+        "summary": result_summary,
+        "cached": cached
+    }
+    return store_result(backend, task_id, result, request)
 
 def store_result(backend, task_id: str, result: dict, request=None) -> dict:
     """存储任务结果到 Redis"""
     try:
         logger.info(f"Storing result for task {task_id}")
-        backend.store_result(
-            task_id,
-            result,
-            'SUCCESS',
-            request=request
-        )
+        with observe_stage('store'):
+            backend.store_result(
+                task_id,
+                result,
+                'SUCCESS',
+                request=request
+            )
+        RESULTS.labels(result.get('status', 'unknown')).inc()
+        publish_event(task_id, 'done' if result.get('status') == 'success' else 'error', result=result)
         return result
     except Exception as e:
         logger.error(f"Failed to store result for task {task_id}: {str(e)}")
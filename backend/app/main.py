@@ -1,16 +1,21 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.api.endpoints import summary
+from app.api.middleware import BodySizeLimitMiddleware
 from app.config import settings
 from app.core import tasks
 from app.celery_app import celery_app
+from app.core.metrics import render_metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Anything Summary API")
 
+# 请求体大小限制（在表单解析前生效）；先添加的中间件在内层，413 响应也会带上 CORS 头
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.MAX_REQUEST_SIZE)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +37,12 @@ async def health_check():
         }
     }
 
+# Prometheus 指标（API 进程；worker 的指标见 METRICS_WORKER_PORT）
+@app.get("/metrics")
+async def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 def check_redis():
     try:
         from redis import Redis
@@ -1,16 +1,41 @@
-import dashscope
 from app.config import settings
+from app.core.chunker import TokenCounter, chunk_token_budget, get_token_counter, iter_chunks
+from app.services.llm_client import DashScopeClient
+from app.services.result_cache import get_cache, make_cache_key
+from typing import Awaitable, Callable, Iterable, List, Optional
+import asyncio
+import itertools
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+
+async def gather_or_cancel(coros: List[Awaitable[str]]) -> List[str]:
+    """并发运行并按顺序返回结果；任一失败时取消其余仍在进行的调用再抛出异常
+
+    asyncio.gather 在一个调用失败后不会取消其他调用，任务已经失败，其余模型请求仍会继续消耗配额。
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        # 取出所有已完成调用的异常，避免事件循环报告未处理的异常
+        errors = [task.exception() for task in tasks if task in done and task.exception() is not None]
+        if errors:
+            raise errors[0]
+        return [task.result() for task in tasks]
+    finally:
+        # 出错或外部取消时，取消仍在进行的调用并等待其结束
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
 class AliSummaryService:
-    def __init__(self):
-        dashscope.api_key = settings.ALI_API_KEY
-        self.model = 'qwen-max'
-        
-    def _generate_prompt(self, content: str) -> str:
-        return f"""请对以下内容进行总结，要求：
+    SYSTEM_PROMPT = '你是一个专业的文本总结助手，善于提取文本的核心内容并进行精炼总结。'
+    PROMPT_TEMPLATE = """请对以下内容进行总结，要求：
 1. 提取核心要点
 2. 保持客观准确
 3. 语言简洁清晰
@@ -20,41 +45,175 @@ class AliSummaryService:
 内容如下：
 {content}
 """
+    # 长文本分段总结时，对单个片段的提示词
+    MAP_PROMPT_TEMPLATE = """以下是一篇长文档中的一个片段，请提取其中的核心要点，保持客观准确，语言简洁。
 
-    async def summarize(self, content: str) -> str:
-        try:
+片段内容：
+{content}
+"""
+    # 合并多个片段摘要的提示词
+    REDUCE_PROMPT_TEMPLATE = """以下是同一文档不同部分的摘要，请将它们合并为一份连贯的摘要，去除重复内容，保留全部核心要点。
 
-            logger.info("Starting summarization with content length: %d", len(content))
-            messages = [{
-                'role': 'system',
-                'content': '你是一个专业的文本总结助手，善于提取文本的核心内容并进行精炼总结。'
-            }, {
-                'role': 'user',
-                'content': self._generate_prompt(content)
-            }]
+摘要如下：
+{content}
+"""
 
-            logger.info("Calling Ali API with model: %s", self.model)
-            response = dashscope.Generation.call(
-                model=self.model,
-                messages=messages,
-                result_format='message',
-                max_tokens=800,
-                temperature=0.3,
+    def __init__(self):
+        self.model = 'qwen-max'
+        self.max_tokens = 800
+        self.temperature = 0.3
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self) -> DashScopeClient:
+        """获取当前事件循环上的模型客户端（连接池与事件循环绑定，同一循环内复用）"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = DashScopeClient(
+                api_key=settings.ALI_API_KEY,
+                base_url=settings.ALI_API_BASE_URL,
+                timeout=settings.LLM_TIMEOUT,
+                max_connections=settings.LLM_MAX_CONNECTIONS,
             )
-            logger.info("Received response from Ali API with status code: %d", response.status_code)
+            self._client_loop = loop
+        return self._client
+        
+    def _generate_prompt(self, content: str) -> str:
+        return self.PROMPT_TEMPLATE.format(content=content)
+
+    def _cache_key(self, content: str) -> str:
+        """总结缓存键：规范化后的输入 + 模型 + 提示词模板 + 生成参数"""
+        normalized = re.sub(r'\s+', ' ', content).strip()
+        return make_cache_key(
+            normalized,
+            self.model,
+            self.SYSTEM_PROMPT,
+            self.PROMPT_TEMPLATE,
+            self.MAP_PROMPT_TEMPLATE,
+            self.REDUCE_PROMPT_TEMPLATE,
+            settings.SUMMARY_CHUNK_TOKENS,
+            settings.SUMMARY_CHUNK_OVERLAP_TOKENS,
+            self.max_tokens,
+            self.temperature,
+        )
+
+    def _chunk_budget(self) -> int:
+        """单次请求的输入 token 上限"""
+        return chunk_token_budget(self.model, settings.SUMMARY_CHUNK_TOKENS, self.max_tokens)
+
+    def get_cached_summary(self, content: str) -> Optional[str]:
+        """查询总结缓存，未命中或未启用缓存时返回 None"""
+        cache = get_cache('summary')
+        if not cache:
+            return None
+        return cache.get(self._cache_key(content))
+
+    async def summarize(self, content: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """生成总结；传入 on_token 时，最终一次模型调用以流式方式进行，每收到一段增量文本就回调一次
+
+        on_token 在事件循环中同步调用，不能阻塞（如直接发送网络请求）
+        """
+        try:
 
-            if response.status_code == 200:
-                result = response.output.choices[0]['message']['content']
-                logger.info("Successfully generated summary with length: %d", len(result))
-                return result
+            logger.info("Starting summarization with content length: %d", len(content))
+            semaphore = asyncio.Semaphore(max(1, settings.SUMMARY_MAP_CONCURRENCY))
+            budget = self._chunk_budget()
+            count_tokens = get_token_counter(self.model)
+            # 逐段产出，只有出现第二段时才走分段总结，不需要先对全文计数
+            chunks = iter_chunks(content, budget, settings.SUMMARY_CHUNK_OVERLAP_TOKENS, count_tokens)
+            first, second = next(chunks, ''), next(chunks, None)
+            if second is None:
+                result = await self._call_model(self._generate_prompt(content), semaphore, on_token)
             else:
-                logger.error(f"Ali API error: {response.code} - {response.message}")
-                raise Exception(f"调用API失败: {response.message}")
+                result = await self._map_reduce(
+                    itertools.chain((first, second), chunks), budget, count_tokens, semaphore, on_token
+                )
+            logger.info("Successfully generated summary with length: %d", len(result))
+            cache = get_cache('summary')
+            if cache:
+                cache.set(self._cache_key(content), result)
+            return result
 
         except Exception as e:
             logger.error(f"Error in summarize: {str(e)}", exc_info=True)
             raise Exception(f"总结失败: {str(e)}")
 
+    async def _map_reduce(self, chunks: Iterable[str], budget: int, count_tokens: TokenCounter,
+                          semaphore: asyncio.Semaphore,
+                          on_token: Optional[Callable[[str], None]] = None) -> str:
+        """长文本分段总结：各段并发总结（map），再逐层合并摘要（reduce），直到能放入一次请求"""
+        prompts = [self.MAP_PROMPT_TEMPLATE.format(content=chunk) for chunk in chunks]
+        logger.info("Map-reduce summarization: %d chunks, concurrency %d",
+                    len(prompts), settings.SUMMARY_MAP_CONCURRENCY)
+        summaries = await gather_or_cancel([self._call_model(prompt, semaphore) for prompt in prompts])
+
+        depth = 1
+        while count_tokens('\n\n'.join(summaries)) > budget and len(summaries) > 1:
+            groups = self._group_summaries(summaries, budget, count_tokens)
+            depth += 1
+            logger.info("Reducing %d partial summaries in %d groups (level %d)", len(summaries), len(groups), depth)
+            summaries = await gather_or_cancel([
+                self._call_model(self.REDUCE_PROMPT_TEMPLATE.format(content='\n\n'.join(group)), semaphore)
+                for group in groups
+            ])
+
+        logger.info("Final reduce over %d partial summaries (depth %d)", len(summaries), depth + 1)
+        return await self._call_model(self._generate_prompt('\n\n'.join(summaries)), semaphore, on_token)
+
+    @staticmethod
+    def _group_summaries(summaries: List[str], budget: int, count_tokens: TokenCounter) -> List[List[str]]:
+        """按 token 上限将部分摘要分组，每组至少两个，保证每一层都能减少摘要数量"""
+        groups, current, current_tokens = [], [], 0
+        for summary in summaries:
+            tokens = count_tokens(summary) + 1
+            if len(current) >= 2 and current_tokens + tokens > budget:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        elif current:
+            groups.append(current)
+        return groups
+
+    async def _call_model(self, prompt: str, semaphore: asyncio.Semaphore,
+                          on_token: Optional[Callable[[str], None]] = None) -> str:
+        """调用模型生成一次回复，semaphore 限制同时进行的请求数；传入 on_token 时流式生成"""
+        messages = [{
+            'role': 'system',
+            'content': self.SYSTEM_PROMPT
+        }, {
+            'role': 'user',
+            'content': prompt
+        }]
+
+        async with semaphore:
+            logger.info("Calling Ali API with model: %s", self.model)
+            try:
+                if on_token is None:
+                    result = await self._get_client().generate(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                    )
+                else:
+                    parts = []
+                    async for delta in self._get_client().generate_stream(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                    ):
+                        parts.append(delta)
+                        on_token(delta)
+                    result = ''.join(parts)
+            except Exception as e:
+                raise Exception(f"调用API失败: {str(e)}")
+        logger.info("Received response from Ali API with length: %d", len(result))
+        return result
+
     async def summarize_url(self, url: str) -> str:
         # 这里可以添加网页内容抓取的逻辑
         try:
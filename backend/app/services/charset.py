@@ -0,0 +1,124 @@
+import codecs
+import logging
+import re
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 统计检测只看开头这么多字节，耗时与文件大小无关
+DETECTION_SAMPLE_BYTES = 64 * 1024
+# <meta> 声明只在文档开头查找（HTML 规范的预扫描范围是 1024 字节，这里放宽一些）
+META_SCAN_BYTES = 4096
+
+CONTENT_TYPE_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)',
+    re.IGNORECASE,
+)
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# 常见的错误声明按超集解码（与浏览器的处理一致）
+SUPERSETS = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'ascii': 'cp1252',
+    'latin-1': 'cp1252',
+    'iso8859-1': 'cp1252',
+}
+
+
+def normalize_encoding(name: Optional[str]) -> Optional[str]:
+    """返回 Python 可用的编码名（按超集替换），无法识别时返回 None"""
+    if not name:
+        return None
+    try:
+        canonical = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    return SUPERSETS.get(canonical, canonical)
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """从 Content-Type 头中取 charset"""
+    if not content_type:
+        return None
+    match = CONTENT_TYPE_CHARSET_PATTERN.search(content_type)
+    return normalize_encoding(match.group(1)) if match else None
+
+
+def charset_from_meta(content: bytes) -> Optional[str]:
+    """从 HTML 开头的 <meta charset> 或 <meta http-equiv="Content-Type"> 中取 charset"""
+    match = META_CHARSET_PATTERN.search(content[:META_SCAN_BYTES])
+    if not match:
+        return None
+    encoding = normalize_encoding(match.group(1).decode('ascii', 'ignore'))
+    # 能读出 ASCII 的 <meta> 说明内容不是 UTF-16/32，这类声明按 UTF-8 处理（与 HTML 规范一致）
+    if encoding and encoding.startswith(('utf-16', 'utf-32')):
+        return 'utf-8'
+    return encoding
+
+
+def sniff_encoding(content: bytes, sample_size: int = DETECTION_SAMPLE_BYTES, truncated: bool = False) -> str:
+    """按内容猜测编码：BOM > 样本能否按 UTF-8 / GB18030 解码 > 对样本做统计检测
+
+    只检查开头的 sample_size 字节，不对整个内容做统计检测。UTF-8 之后先试 GB18030
+    （GBK 的超集，与原来 UTF-8 失败后改用 GBK 的顺序一致），短文本上统计检测并不可靠。
+    truncated 表示 content 本身就是截取的样本，末尾可能是半个字符。
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    sample = content[:sample_size]
+    final = not truncated and len(sample) == len(content)
+    for encoding in ('utf-8', 'gb18030'):
+        try:
+            # 样本末尾可能截断了一个多字节字符，按增量方式解码时不算错误
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=final)
+            return encoding
+        except UnicodeDecodeError:
+            pass
+    import charset_normalizer
+
+    detected = normalize_encoding(charset_normalizer.detect(sample)['encoding'])
+    return detected or 'utf-8'
+
+
+def fallback_encodings(encoding: str) -> List[str]:
+    """严格解码失败时依次尝试的编码：检测结果，然后是 GB18030（与原来 UTF-8 失败后改用 GBK 一致）"""
+    candidates = [encoding]
+    if codecs.lookup(encoding).name != 'gb18030':
+        candidates.append('gb18030')
+    return candidates
+
+
+def decode_text(content: bytes, encoding: Optional[str] = None) -> str:
+    """解码完整的文本内容：按样本检测的编码严格解码，失败时改用 GB18030，
+    都失败时才按检测出的编码把非法字节替换为 U+FFFD（样本只覆盖开头，之后可能出现其他编码）
+    """
+    encoding = encoding or sniff_encoding(content)
+    for candidate in fallback_encodings(encoding):
+        try:
+            return content.decode(candidate)
+        except UnicodeDecodeError as e:
+            logger.warning(f"Content is not valid {candidate} near byte {e.start}")
+    return content.decode(encoding, errors='replace')
+
+
+def detect_encoding(content: bytes, content_type: Optional[str] = None, html: bool = False) -> str:
+    """确定文本编码：BOM > Content-Type 头 > HTML <meta> 声明 > 按样本猜测"""
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    declared = charset_from_content_type(content_type)
+    if not declared and html:
+        declared = charset_from_meta(content)
+    if declared:
+        return declared
+    return sniff_encoding(content)
@@ -0,0 +1,317 @@
+import logging
+import math
+import re
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 不含正文、直接删除的元素
+STRIP_TAGS = [
+    'script', 'style', 'noscript', 'template', 'iframe', 'object', 'embed', 'svg', 'canvas',
+    'form', 'button', 'input', 'select', 'textarea', 'meta', 'link', 'head',
+    'header', 'footer', 'nav', 'aside',
+]
+
+# 输出文本时按行分隔的块级元素
+BLOCK_TAGS = {
+    'address', 'article', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul', 'br', 'body', 'html',
+}
+
+# readability 的 class / id 启发式规则。UNLIKELY_PATTERN 只匹配完整的词（以空白、- 或 _ 分隔，
+# 允许复数），避免 threads 中的 ads、downloads 中的 ads 之类的子串误判
+UNLIKELY_PATTERN = re.compile(
+    r'(?:^|[\s_-])(?:combx|comment|community|disqus|extra|foot|footer|header|menu|remark|rss|'
+    r'shoutbox|sidebar|sponsor|ad-break|agegate|pagination|pager|popup|banner|breadcrumb|'
+    r'share|social|related|recommend|cookie|subscribe|newsletter|login|copyright|ad|advert|'
+    r'advertisement|promo)s?(?=$|[\s_-])',
+    re.IGNORECASE,
+)
+MAYBE_CANDIDATE_PATTERN = re.compile(r'and|article|body|column|main|shadow|content', re.IGNORECASE)
+POSITIVE_PATTERN = re.compile(
+    r'article|body|content|entry|hentry|main|page|post|text|blog|story|detail', re.IGNORECASE
+)
+NEGATIVE_PATTERN = re.compile(
+    r'combx|comment|contact|foot|footer|footnote|masthead|media|meta|outbrain|promo|related|'
+    r'scroll|shoutbox|sidebar|sponsor|shopping|tags|tool|widget|share|social|recommend|ads|advert|banner',
+    re.IGNORECASE,
+)
+# 中英文标点，正文段落中通常较多
+PUNCTUATION_PATTERN = re.compile(r'[,，。、；;！!？?]')
+XML_DECLARATION_PATTERN = re.compile(r'^\s*<\?xml[^>]*\?>', re.IGNORECASE)
+
+SCORED_TAGS = ('p', 'pre', 'td', 'blockquote', 'li', 'div', 'section', 'article')
+MIN_PARAGRAPH_LENGTH = 25
+# 选出的正文过短时（例如页面没有明显的正文块），退回整页文本
+MIN_CONTENT_LENGTH = 140
+
+
+def _text_lines(text: str) -> str:
+    """按行清理文本：去除首尾空白，忽略空行和单字符行"""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and len(line) > 1:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+class SoupExtractor:
+    """BeautifulSoup + html.parser：删除脚本、导航等元素后，取第一个 main / article / div.content"""
+
+    name = 'soup'
+
+    def extract(self, html: str) -> str:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # 移除不需要的元素
+        for element in soup(["script", "style", "meta", "link", "noscript", "header", "footer", "nav"]):
+            element.decompose()
+
+        # 获取主要内容
+        main_content = (
+            soup.find('main') or
+            soup.find('article') or
+            soup.find('div', class_='content') or
+            soup
+        )
+
+        return _text_lines(main_content.get_text(separator='\n', strip=True))
+
+
+class ReadabilityExtractor:
+    """lxml（libxml2）解析 + readability 式文本密度打分选取正文
+
+    1. 删除脚本、导航、表单等元素，以及 class / id 明显属于评论、侧栏、广告的元素
+       （包含 main / article 或页面大部分文本的元素除外）；
+    2. 每个足够长的段落按标点数和长度给父节点加分、祖父节点加一半；
+    3. 候选节点得分按链接密度折减，取最高者，并合并得分接近的兄弟节点；
+    4. 选出的正文过短时，重新解析页面、不做第 1 步的 class / id 删除再提取一次
+       （与 Readability.js 相同），仍然过短则退回整页文本。
+    """
+
+    name = 'readability'
+
+    def extract(self, html: str) -> str:
+        html = XML_DECLARATION_PATTERN.sub('', html, count=1)
+        if not html.strip():
+            return ''
+        text = self._extract(html, strip_unlikely=True)
+        if text is not None and len(text) < MIN_CONTENT_LENGTH:
+            # class / id 规则可能误删了正文所在的容器，重新解析后不做这一步
+            retry = self._extract(html, strip_unlikely=False)
+            if retry and len(retry) > len(text):
+                logger.debug(f"Unlikely-candidate pass removed main content, kept {len(retry)} chars without it")
+                return retry
+        return text or ''
+
+    def _extract(self, html: str, strip_unlikely: bool) -> Optional[str]:
+        """解析并提取一次正文，页面无法解析时返回 None"""
+        import lxml.html
+        from lxml import etree
+
+        try:
+            doc = lxml.html.document_fromstring(html)
+        except (etree.ParserError, ValueError) as e:
+            logger.warning(f"lxml failed to parse page: {str(e)}")
+            return None
+
+        etree.strip_elements(doc, etree.Comment, *STRIP_TAGS, with_tail=False)
+        body = doc.find('body')
+        if body is None:
+            body = doc
+        if strip_unlikely:
+            self._remove_unlikely(body)
+
+        content = self._select_content(body)
+        text = _text_lines(self._block_text(content)) if content is not None else ''
+        if len(text) < MIN_CONTENT_LENGTH:
+            full_text = _text_lines(self._block_text(body))
+            if len(full_text) > len(text):
+                return full_text
+        return text
+
+    @staticmethod
+    def _class_id(element) -> str:
+        return f"{element.get('class', '')} {element.get('id', '')}"
+
+    def _remove_unlikely(self, body):
+        """删除 class / id 明显不是正文的元素
+
+        class / id 含正文常用的容器名、元素内有 main / article、或元素包含页面一半以上的文本时保留，
+        这类元素往往是包住整篇正文的外层容器（如 container has-sidebar、site-header-wrap）。
+        """
+        to_remove = []
+        body_length = None
+        for element in body.iter('div', 'section', 'ul', 'ol', 'table', 'span', 'p'):
+            class_id = self._class_id(element)
+            if len(class_id) < 2:
+                continue
+            if not UNLIKELY_PATTERN.search(class_id) or MAYBE_CANDIDATE_PATTERN.search(class_id):
+                continue
+            if element.find('.//main') is not None or element.find('.//article') is not None:
+                continue
+            if body_length is None:
+                body_length = len(body.text_content().strip())
+            if len(element.text_content().strip()) * 2 > body_length:
+                continue
+            to_remove.append(element)
+        for element in to_remove:
+            if element.getparent() is not None:
+                element.drop_tree()
+
+    def _class_weight(self, element) -> int:
+        weight = 0
+        for value in (element.get('class'), element.get('id')):
+            if not value:
+                continue
+            if NEGATIVE_PATTERN.search(value):
+                weight -= 25
+            if POSITIVE_PATTERN.search(value):
+                weight += 25
+        return weight
+
+    def _base_score(self, element) -> float:
+        tag = element.tag
+        if tag in ('div', 'article', 'main', 'section'):
+            score = 5
+        elif tag in ('pre', 'td', 'blockquote'):
+            score = 3
+        elif tag in ('address', 'ol', 'ul', 'dl', 'dd', 'dt', 'li', 'form'):
+            score = -3
+        elif tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'th'):
+            score = -5
+        else:
+            score = 0
+        return score + self._class_weight(element)
+
+    @staticmethod
+    def _link_density(element, text_length: int) -> float:
+        if not text_length:
+            return 0.0
+        link_length = sum(len(link.text_content()) for link in element.iter('a'))
+        return min(1.0, link_length / text_length)
+
+    def _select_content(self, body):
+        scores: Dict = {}
+        lengths: Dict = {}
+
+        def text_length(element) -> int:
+            if element not in lengths:
+                lengths[element] = len(element.text_content().strip())
+            return lengths[element]
+
+        for element in body.iter(*SCORED_TAGS):
+            # div 等容器只有直接包含文本时才按段落计分，避免把整块内容重复计入
+            if element.tag in ('div', 'section', 'article') and not (element.text and element.text.strip()):
+                continue
+            length = text_length(element)
+            if length < MIN_PARAGRAPH_LENGTH:
+                continue
+            parent = element.getparent()
+            if parent is None:
+                continue
+            text = element.text_content()
+            score = 1 + len(PUNCTUATION_PATTERN.findall(text)) + min(length / 100, 3)
+            for ancestor, share in ((parent, 1.0), (parent.getparent(), 0.5)):
+                if ancestor is None or not isinstance(ancestor.tag, str):
+                    continue
+                if ancestor not in scores:
+                    scores[ancestor] = self._base_score(ancestor)
+                scores[ancestor] += score * share
+
+        if not scores:
+            return body
+
+        best, best_score = None, -math.inf
+        for candidate, score in scores.items():
+            score *= 1 - self._link_density(candidate, text_length(candidate))
+            scores[candidate] = score
+            if score > best_score:
+                best, best_score = candidate, score
+
+        return self._merge_siblings(best, best_score, scores, text_length)
+
+    def _merge_siblings(self, best, best_score: float, scores: Dict, text_length):
+        """合并与最佳候选得分接近、或本身就是低链接密度长段落的兄弟节点"""
+        parent = best.getparent()
+        if parent is None:
+            return best
+        threshold = max(10.0, best_score * 0.2)
+        merged: List = []
+        for sibling in parent:
+            if not isinstance(sibling.tag, str):
+                continue
+            if sibling is best:
+                merged.append(sibling)
+                continue
+            if scores.get(sibling, -math.inf) >= threshold:
+                merged.append(sibling)
+            elif sibling.tag == 'p':
+                length = text_length(sibling)
+                density = self._link_density(sibling, length)
+                if (length > 80 and density < 0.25) or (0 < length <= 80 and density == 0 and PUNCTUATION_PATTERN.search(sibling.text_content())):
+                    merged.append(sibling)
+        if len(merged) == 1:
+            return best
+
+        import lxml.html
+
+        container = lxml.html.Element('div')
+        for element in merged:
+            # 复制一份，不改动原文档结构
+            container.append(lxml.html.fromstring(lxml.html.tostring(element)))
+        return container
+
+    @staticmethod
+    def _block_text(element) -> str:
+        """提取文本，块级元素之间换行"""
+        from lxml import etree
+
+        parts = []
+        for event, node in etree.iterwalk(element, events=('start', 'end')):
+            if not isinstance(node.tag, str):
+                continue
+            if event == 'start':
+                if node.tag in BLOCK_TAGS:
+                    parts.append('\n')
+                if node.text:
+                    parts.append(node.text)
+            else:
+                if node.tag in BLOCK_TAGS:
+                    parts.append('\n')
+                if node.tail and node is not element:
+                    parts.append(node.tail)
+        return ''.join(parts)
+
+
+EXTRACTORS = {
+    SoupExtractor.name: SoupExtractor,
+    ReadabilityExtractor.name: ReadabilityExtractor,
+}
+
+_extractors: Dict[str, object] = {}
+
+
+def get_content_extractor(name: Optional[str] = None):
+    """获取网页正文提取器（按名称缓存），默认使用 CONTENT_EXTRACTOR 配置
+
+    readability 依赖 lxml，未安装时退回 BeautifulSoup。
+    """
+    name = name or settings.CONTENT_EXTRACTOR
+    if name not in _extractors:
+        if name not in EXTRACTORS:
+            raise ValueError(f"Unknown content extractor: {name}")
+        if name == ReadabilityExtractor.name:
+            try:
+                import lxml.html  # noqa: F401
+            except ImportError:
+                logger.warning("lxml is not installed, falling back to BeautifulSoup extractor")
+                return get_content_extractor(SoupExtractor.name)
+        _extractors[name] = EXTRACTORS[name]()
+    return _extractors[name]
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认规则，配置了 FILTER_RULES_FILE 时以文件为准
+# 敏感词列表（示例）
+DEFAULT_SENSITIVE_WORDS = {
+    'spam', 'scam', 'hack', 'crack',
+    # 添加其他敏感词
+}
+
+# 广告相关标识
+DEFAULT_AD_PATTERNS = [
+    r'advertisement',
+    r'sponsored',
+    r'promotion',
+    r'ads-container',
+    r'banner-ads',
+]
+
+SENSITIVE_REPLACEMENT = '[FILTERED]'
+# 只含字母、数字、空白和连字符的广告规则按字面量处理，与敏感词一样编入前缀树
+LITERAL_PATTERN = re.compile(r'[\w\s-]+')
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """把词表编译成前缀树形状的正则（如 hack|hacker|help -> h(?:ack(?:er)?|elp)）
+
+    相同前缀只比较一次，匹配开销与词表大小基本无关。
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        optional = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        pattern = '(?:' + '|'.join(branches) + ')'
+        return pattern + '?' if optional else pattern
+
+    return build(trie)
+
+
+class ContentFilter:
+    """一次扫描完成敏感词替换和广告删除的过滤器
+
+    敏感词（整词、不区分大小写）和字面量广告规则分别编译成前缀树正则，其余广告规则并入同一个
+    交替表达式，整个文本只扫描一遍，不再按规则逐条 re.sub。
+    """
+
+    def __init__(self, sensitive_words: Iterable[str], ad_patterns: Iterable[str]):
+        self.sensitive_words = sorted({word.lower() for word in sensitive_words if word})
+        self.ad_patterns = list(ad_patterns)
+
+        literal_ads, regex_ads = set(), []
+        for pattern in self.ad_patterns:
+            if LITERAL_PATTERN.fullmatch(pattern):
+                literal_ads.add(pattern.lower())
+            else:
+                regex_ads.append(pattern)
+
+        alternatives = []
+        if self.sensitive_words:
+            alternatives.append(r'(?P<sensitive>\b' + _trie_regex(self.sensitive_words) + r'\b)')
+        ad_branches = ([_trie_regex(sorted(literal_ads))] if literal_ads else []) + [f'(?:{p})' for p in regex_ads]
+        if ad_branches:
+            alternatives.append('(?P<ad>' + '|'.join(ad_branches) + ')')
+        self._pattern = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+    @staticmethod
+    def _replace(match) -> str:
+        return SENSITIVE_REPLACEMENT if match.lastgroup == 'sensitive' else ''
+
+    def filter(self, text: str) -> str:
+        """替换敏感词、删除广告标识"""
+        if self._pattern is None or not text:
+            return text
+        return self._pattern.sub(self._replace, text)
+
+    @staticmethod
+    def remove_duplicates(text: str) -> str:
+        """去除空行和重复行，保留首次出现的顺序"""
+        seen = set()
+        unique_lines = []
+        for line in text.split('\n'):
+            if line not in seen and line.strip():
+                seen.add(line)
+                unique_lines.append(line)
+        return '\n'.join(unique_lines)
+
+
+def load_rules(path: str) -> Dict[str, List[str]]:
+    """读取规则文件（JSON）：{"sensitive_words": [...], "ad_patterns": [...]}，缺少的项使用默认规则"""
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    return {
+        'sensitive_words': list(rules.get('sensitive_words', DEFAULT_SENSITIVE_WORDS)),
+        'ad_patterns': list(rules.get('ad_patterns', DEFAULT_AD_PATTERNS)),
+    }
+
+
+_filter: Optional[ContentFilter] = None
+_rules_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+
+def get_content_filter() -> ContentFilter:
+    """获取当前的过滤器
+
+    配置了 FILTER_RULES_FILE 时，每次获取都检查文件修改时间，规则文件变化后自动重新编译，
+    无需重启服务；新规则有误时继续使用旧规则。
+    """
+    global _filter, _rules_mtime
+    path = settings.FILTER_RULES_FILE
+    mtime = None
+    if path:
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            if _filter is None:
+                logger.warning(f"Filter rules file {path} is not readable, using default rules: {str(e)}")
+    if _filter is not None and mtime == _rules_mtime:
+        return _filter
+
+    with _lock:
+        if _filter is not None and mtime == _rules_mtime:
+            return _filter
+        try:
+            if mtime is not None:
+                rules = load_rules(path)
+                new_filter = ContentFilter(rules['sensitive_words'], rules['ad_patterns'])
+                logger.info(
+                    f"Loaded filter rules from {path}: {len(new_filter.sensitive_words)} sensitive words, "
+                    f"{len(new_filter.ad_patterns)} ad patterns"
+                )
+            else:
+                new_filter = ContentFilter(DEFAULT_SENSITIVE_WORDS, DEFAULT_AD_PATTERNS)
+        except Exception as e:
+            if _filter is None:
+                logger.error(f"Failed to load filter rules from {path}, using default rules: {str(e)}")
+                new_filter = ContentFilter(DEFAULT_SENSITIVE_WORDS, DEFAULT_AD_PATTERNS)
+            else:
+                logger.error(f"Failed to reload filter rules from {path}, keeping previous rules: {str(e)}")
+                new_filter = _filter
+        _filter, _rules_mtime = new_filter, mtime
+    return _filter
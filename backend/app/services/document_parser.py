@@ -1,52 +1,70 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import pytesseract
 from PIL import Image
 import docx
 import fitz  # PyMuPDF
+import asyncio
 import io
 import os
 import logging
-from typing import Optional, Dict, Any
-import PyPDF2
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Tuple
 import sys
-import requests
-from bs4 import BeautifulSoup
+import httpx
 from urllib.parse import urlparse, urljoin
 import time
-import re
 import html
-from requests.exceptions import RequestException, Timeout
 import json
-import hashlib
+import tempfile
 from datetime import datetime
-import bleach
 import validators
 import mimetypes
-import youtube_dl
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.config import settings
+from app.services.result_cache import get_cache, hash_file, make_cache_key
+from app.services.ocr_backend import get_ocr_backend
+from app.services.content_extractor import get_content_extractor
+from app.services.content_filter import DEFAULT_AD_PATTERNS, DEFAULT_SENSITIVE_WORDS, get_content_filter
+from app.services.url_fetcher import AsyncURLFetcher, FetchedPage, PageTooLargeError
+from app.services.charset import detect_encoding
+from app.services.text_reader import detect_file_encoding, iter_text_file
+from app.core.async_runner import run_async
+from app.core.metrics import PARSE_SECONDS, STAGE_FAILURES, URL_REVALIDATIONS, observe_stage
 
 logger = logging.getLogger(__name__)
 
 class DocumentParser:
-    # 敏感词列表（示例）
-    SENSITIVE_WORDS = {
-        'spam', 'scam', 'hack', 'crack',
-        # 添加其他敏感词
-    }
-    
-    # 广告相关标识
-    AD_PATTERNS = [
-        r'advertisement',
-        r'sponsored',
-        r'promotion',
-        r'ads-container',
-        r'banner-ads',
-    ]
+    # 过滤规则的默认值，实际使用的规则见 content_filter.get_content_filter
+    SENSITIVE_WORDS = DEFAULT_SENSITIVE_WORDS
+    AD_PATTERNS = DEFAULT_AD_PATTERNS
+
+    # 解析逻辑变化时递增，使旧的解析结果缓存失效
+    PARSER_VERSION = 2
+
+    # 支持解析的网页内容类型，其他类型不下载响应体
+    WEB_CONTENT_TYPES = ('text/html', 'application/json', 'text/plain')
+
+    # OCR 参数
+    OCR_LANG = 'chi_sim+eng'
+    OCR_DPI = 300  # 提高DPI以获得更好的文本识别效果
+    # 使用更准确的OCR模式
+    OCR_PSM = 1
+    OCR_OEM = 1
+
+    # 依赖检查每个进程只做一次（worker 主进程中检查后，fork 出的子进程不再重复）
+    _dependencies_checked = False
 
     def __init__(self):
-        self._check_dependencies()
-        self.session = self._create_session()
+        if not DocumentParser._dependencies_checked:
+            self._check_dependencies()
+            DocumentParser._dependencies_checked = True
+        # 网页抓取客户端，在事件循环中首次使用时创建
+        self._fetcher = None
+        self._fetcher_loop = None
+        # PDF 转图片线程数与 OCR 进程池大小
+        self.render_threads = settings.PDF_RENDER_THREADS or os.cpu_count() or 1
+        self.ocr_workers = settings.OCR_WORKERS or os.cpu_count() or 1
         
     def _check_dependencies(self):
         """检查必要的依赖是否已安装"""
@@ -93,65 +111,157 @@ class DocumentParser:
         except Exception as e:
             logger.error(f"Error checking dependencies: {str(e)}")
 
-    def parse_file(self, file_path: str) -> Optional[str]:
-        """解析文件内容"""
+    def parse_file(self, file_path: str, content_hash: Optional[str] = None,
+                   on_progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+        """解析文件内容（优先读取解析结果缓存）
+
+        content_hash 为文件内容的 SHA-256，上传时已计算过的可直接传入，避免重复读取文件。
+        on_progress(pages_done, pages_total) 在解析 PDF 时逐页调用。
+        """
+        cache = get_cache('extraction')
+        cache_key = None
+        if cache:
+            try:
+                cache_key = self._extraction_cache_key(file_path, content_hash)
+            except Exception as e:
+                logger.warning(f"Failed to compute cache key for {file_path}: {str(e)}")
+            if cache_key:
+                content = cache.get(cache_key)
+                if content is not None:
+                    return content
+        
+        content = self._parse_file(file_path, on_progress)
+        if cache_key and content:
+            cache.set(cache_key, content)
+        return content
+
+    def _extraction_cache_key(self, file_path: str, content_hash: Optional[str] = None) -> str:
+        """解析结果缓存键：文件内容哈希 + 解析器版本 + 影响结果的解析参数"""
+        return make_cache_key(
+            content_hash or hash_file(file_path),
+            file_path.lower().split('.')[-1],
+            self.PARSER_VERSION,
+            self.OCR_LANG,
+            self.OCR_DPI,
+            self.OCR_PSM,
+            self.OCR_OEM,
+            settings.OCR_BACKEND,
+            settings.OCR_BINARIZE,
+            settings.OCR_DESKEW,
+        )
+
+    def _parse_file(self, file_path: str, on_progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+        """按文件类型解析文件内容"""
         try:
             file_extension = file_path.lower().split('.')[-1]
+            start = time.perf_counter()
+            method = 'text'
             
             if file_extension == 'pdf':
-                return self._parse_pdf(file_path)
+                content, method = self._parse_pdf(file_path, on_progress)
             elif file_extension in ['doc', 'docx']:
-                return self._parse_docx(file_path)
+                content = self._parse_docx(file_path)
             elif file_extension == 'txt':
-                return self._parse_txt(file_path)
+                content = self._parse_txt(file_path)
             elif file_extension in ['png', 'jpg', 'jpeg', 'bmp', 'tiff']:
-                return self.parse_image(file_path)
+                content = self.parse_image(file_path)
+                method = 'ocr'
             else:
                 logger.warning(f"Unsupported file type: {file_extension}")
                 return None
+            
+            PARSE_SECONDS.labels(file_extension, method).observe(time.perf_counter() - start)
+            return content
         except Exception as e:
+            STAGE_FAILURES.labels('parse').inc()
             logger.error(f"Error parsing file {file_path}: {str(e)}", exc_info=True)
             return None
 
-    def _parse_pdf(self, file_path: str) -> Optional[str]:
-        """解析PDF文件"""
+    def _parse_pdf(self, file_path: str,
+                   on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[Optional[str], str]:
+        """解析PDF文件，返回 (文本, 解析方式)；解析方式为 text / ocr / mixed，用于按方式统计耗时"""
         try:
             # 首先尝试使用 PyMuPDF
             doc = fitz.open(file_path)
-            text_content = []
-            
+        except Exception as e:
+            logger.error(f"Error parsing PDF with PyMuPDF: {str(e)}", exc_info=True)
+            logger.info("PyMuPDF failed, trying OCR")
+            return self._ocr_pdf(file_path, on_progress), 'ocr'
+
+        try:
             # 获取页数
             num_pages = len(doc)
             logger.info(f"PDF has {num_pages} pages")
+            page_texts = [None] * num_pages
+            ocr_page_nums = []
             
-            # 提取所有页面的文本
+            # 优先使用文本层，没有文本层的页面留给OCR
             for page_num in range(num_pages):
                 try:
-                    page = doc[page_num]
-                    text = page.get_text("text")
-                    if text.strip():
-                        text_content.append(text.strip())
-                        logger.debug(f"Extracted text from page {page_num + 1}")
-                    else:
-                        logger.warning(f"No text found in page {page_num + 1}")
+                    text = doc[page_num].get_text("text").strip()
                 except Exception as e:
                     logger.error(f"Error extracting text from page {page_num + 1}: {str(e)}")
-                    continue
-
-            doc.close()
+                    text = ''
+                if text:
+                    page_texts[page_num] = text
+                    logger.debug(f"Extracted text from page {page_num + 1}")
+                else:
+                    ocr_page_nums.append(page_num)
+            text_pages = num_pages - len(ocr_page_nums)
+            if on_progress:
+                on_progress(text_pages, num_pages)
             
-            if text_content:
-                full_text = '\n\n'.join(text_content)  # 使用双换行分隔页面
-                logger.info(f"Successfully extracted {len(full_text)} characters using PyMuPDF")
-                return full_text
-            else:
-                logger.info("No text extracted using PyMuPDF, trying OCR")
-                return self._ocr_pdf(file_path)
-
+            # 只对没有文本层的页面进行OCR，直接从已打开的文档渲染
+            if ocr_page_nums:
+                logger.info(f"{len(ocr_page_nums)} of {num_pages} pages have no text layer, running OCR on them")
+                images = (self._render_page(doc, page_num) for page_num in ocr_page_nums)
+                rss_start = peak_rss = _get_rss_mb()
+                for i, text in self._ocr_pages(images, len(ocr_page_nums)):
+                    peak_rss = max(peak_rss, _get_rss_mb())
+                    page_num = ocr_page_nums[i]
+                    if text and text.strip():
+                        page_texts[page_num] = text.strip()
+                        logger.debug(f"OCR extracted text from page {page_num + 1}")
+                    else:
+                        logger.warning(f"No text found in page {page_num + 1}")
+                    if on_progress:
+                        on_progress(text_pages + i + 1, num_pages)
+                logger.info(f"OCR peak RSS: {peak_rss:.1f} MB (started at {rss_start:.1f} MB)")
         except Exception as e:
             logger.error(f"Error parsing PDF with PyMuPDF: {str(e)}", exc_info=True)
             logger.info("PyMuPDF failed, trying OCR")
-            return self._ocr_pdf(file_path)
+            doc.close()
+            return self._ocr_pdf(file_path, on_progress), 'ocr'
+
+        doc.close()
+        
+        if not ocr_page_nums:
+            method = 'text'
+        elif len(ocr_page_nums) == num_pages:
+            method = 'ocr'
+        else:
+            method = 'mixed'
+        
+        text_content = [text for text in page_texts if text]
+        if not text_content:
+            logger.error("No text could be extracted from PDF using either method")
+            return None, method
+        
+        full_text = '\n\n'.join(text_content)  # 使用双换行分隔页面
+        logger.info(
+            f"Successfully extracted {len(full_text)} characters from PDF "
+            f"({num_pages - len(ocr_page_nums)} text pages, {len(ocr_page_nums)} OCR pages)"
+        )
+        return full_text, method
+
+    def _render_page(self, doc, page_num: int) -> Optional[Image.Image]:
+        """将 fitz 文档中的页面渲染为图片，供OCR使用"""
+        try:
+            pix = doc[page_num].get_pixmap(dpi=self.OCR_DPI)
+            return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        except Exception as e:
+            logger.error(f"Error rendering page {page_num + 1}: {str(e)}")
+            return None
 
     def _parse_docx(self, file_path: str) -> Optional[str]:
         """解析DOCX文件"""
@@ -179,72 +289,67 @@ class DocumentParser:
             return None
 
     def _parse_txt(self, file_path: str) -> Optional[str]:
-        """解析TXT文件"""
+        """解析TXT文件：按样本检测编码，逐块解码后合并"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                logger.info(f"Successfully read {len(content)} characters from TXT")
-                return content
-        except UnicodeDecodeError:
-            try:
-                # 如果UTF-8解码失败，尝试使用GBK编码
-                with open(file_path, 'r', encoding='gbk') as file:
-                    content = file.read()
-                    logger.info(f"Successfully read {len(content)} characters from TXT using GBK encoding")
-                    return content
-            except Exception as e:
-                logger.error(f"Error parsing TXT file with GBK encoding: {str(e)}", exc_info=True)
-                return None
+            content = ''.join(self.iter_txt(file_path))
+            logger.info(f"Successfully read {len(content)} characters from TXT")
+            return content
         except Exception as e:
             logger.error(f"Error parsing TXT file: {str(e)}", exc_info=True)
             return None
 
+    def iter_txt(self, file_path: str) -> Iterator[str]:
+        """逐块产出TXT文件的文本，供流式处理（分块、总结）直接消费，峰值内存约为一个块"""
+        encoding = detect_file_encoding(file_path)
+        logger.info(f"Reading TXT {os.path.basename(file_path)} as {encoding}")
+        return iter_text_file(file_path, encoding)
+
     def parse_image(self, file_path: str) -> str:
         """解析图片文件"""
         try:
             image = Image.open(file_path)
             # 使用中文和英文语言包
-            text = pytesseract.image_to_string(image, lang='chi_sim+eng')
+            text = get_ocr_backend().recognize(image, lang=self.OCR_LANG)
             return text
         except Exception as e:
             logger.error(f"Error parsing image: {str(e)}", exc_info=True)
             raise 
 
-    def _ocr_pdf(self, file_path: str) -> Optional[str]:
+    def _ocr_pdf(self, file_path: str, on_progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
         """使用OCR处理PDF文件"""
         try:
             # 将PDF转换为图片
-            logger.info("Converting PDF to images...")
-            images = convert_from_path(
-                file_path,
-                dpi=300,  # 提高DPI以获得更好的文本识别效果
-                fmt='jpeg',
-                thread_count=os.cpu_count() or 1  # 使用多线程加速
-            )
-            logger.info(f"Converted {len(images)} pages to images")
+            window = settings.PDF_RENDER_WINDOW
+            if window > 0:
+                logger.info(f"Streaming PDF pages to OCR in windows of {window} pages...")
+                num_pages = pdfinfo_from_path(file_path)['Pages']
+                images = self._iter_pdf_images(file_path, window, num_pages)
+            else:
+                logger.info("Converting PDF to images...")
+                images = convert_from_path(
+                    file_path,
+                    dpi=self.OCR_DPI,
+                    fmt='jpeg',
+                    thread_count=self.render_threads  # 使用多线程加速
+                )
+                num_pages = len(images)
+                logger.info(f"Converted {num_pages} pages to images")
             
-            # 对每个页面进行OCR
+            # 对每个页面进行OCR（按页序返回），同时记录内存峰值
             text_content = []
-            for i, image in enumerate(images):
-                try:
-                    # 预处理图像以提高OCR质量
-                    image = Image.fromarray(self._preprocess_image(image))
-                    
-                    # 使用中文和英文语言包
-                    text = pytesseract.image_to_string(
-                        image,
-                        lang='chi_sim+eng',
-                        config='--psm 1 --oem 1'  # 使用更准确的OCR模式
-                    )
-                    
-                    if text.strip():
-                        text_content.append(text.strip())
-                        logger.debug(f"OCR extracted text from page {i + 1}")
-                    else:
-                        logger.warning(f"OCR found no text in page {i + 1}")
-                except Exception as e:
-                    logger.error(f"Error performing OCR on page {i + 1}: {str(e)}")
+            rss_start = peak_rss = _get_rss_mb()
+            for i, text in self._ocr_pages(images, num_pages):
+                peak_rss = max(peak_rss, _get_rss_mb())
+                if on_progress:
+                    on_progress(i + 1, num_pages)
+                if text is None:
                     continue
+                if text.strip():
+                    text_content.append(text.strip())
+                    logger.debug(f"OCR extracted text from page {i + 1}")
+                else:
+                    logger.warning(f"OCR found no text in page {i + 1}")
+            logger.info(f"OCR peak RSS: {peak_rss:.1f} MB (started at {rss_start:.1f} MB)")
             
             if not text_content:
                 logger.error("No text could be extracted from PDF using either method")
@@ -257,65 +362,374 @@ class DocumentParser:
             logger.error(f"Error performing OCR on PDF: {str(e)}", exc_info=True)
             return None
 
-    def _preprocess_image(self, image):
-        """预处理图像以提高OCR质量"""
+    def _iter_pdf_images(self, file_path: str, window: int, num_pages: Optional[int] = None) -> Iterator[Image.Image]:
+        """按固定页数窗口流式地将PDF转换为图片，内存占用只与窗口大小有关
+
+        配置了 PDF_RENDER_SPILL_DIR 时，每个窗口先由 poppler 写入临时目录，
+        再逐页读入内存并删除文件。
+        """
+        if num_pages is None:
+            num_pages = pdfinfo_from_path(file_path)['Pages']
+        spill_dir = settings.PDF_RENDER_SPILL_DIR or None
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        
+        for first_page in range(1, num_pages + 1, window):
+            last_page = min(first_page + window - 1, num_pages)
+            options = dict(
+                dpi=self.OCR_DPI,
+                fmt='jpeg',
+                thread_count=min(self.render_threads, last_page - first_page + 1),
+                first_page=first_page,
+                last_page=last_page,
+            )
+            logger.debug(f"Rendering PDF pages {first_page}-{last_page} of {num_pages}")
+            
+            if spill_dir:
+                with tempfile.TemporaryDirectory(dir=spill_dir) as output_folder:
+                    paths = convert_from_path(file_path, output_folder=output_folder, paths_only=True, **options)
+                    for path in paths:
+                        image = Image.open(path)
+                        image.load()
+                        os.remove(path)
+                        yield image
+            else:
+                images = convert_from_path(file_path, **options)
+                images.reverse()
+                # 逐页弹出，已交给OCR的页面不再被本窗口引用
+                while images:
+                    yield images.pop()
+
+    def _ocr_pages(self, images: Iterable[Image.Image], num_pages: Optional[int] = None) -> Iterator[Tuple[int, Optional[str]]]:
+        """对页面图像进行OCR，按页序产出 (序号, 文本)，失败的页面文本为 None
+
+        ocr_workers > 1 时使用有界进程池并行识别，同时在途的页面数不超过
+        进程数的两倍，避免一次性把所有页面序列化到进程池队列中。
+        """
+        workers = self.ocr_workers
+        if num_pages is None and isinstance(images, list):
+            num_pages = len(images)
+        if num_pages is not None:
+            workers = min(workers, num_pages)
+        
+        if workers <= 1:
+            for i, image in enumerate(images):
+                yield i, self._ocr_page_safe(i, image)
+            return
+        
+        try:
+            _get_ocr_executor(self.ocr_workers)
+        except Exception as e:
+            logger.warning(f"Failed to start OCR process pool, falling back to serial OCR: {str(e)}")
+            for i, image in enumerate(images):
+                yield i, self._ocr_page_safe(i, image)
+            return
+        
+        logger.info(f"Running OCR with {workers} worker processes")
+        pending = deque()
+        broken = False
+        try:
+            for i, image in enumerate(images):
+                if not broken:
+                    try:
+                        pending.append((i, image) + self._submit_page(image))
+                    except Exception as e:
+                        # 进程池不可用（如在守护进程中无法创建子进程），剩余页面改为串行处理
+                        logger.warning(f"OCR process pool unavailable, falling back to serial OCR: {str(e)}")
+                        _discard_ocr_executor()
+                        broken = True
+                if broken:
+                    pending.append((i, image, None, None))
+                # 限制在途页面数，并按页序产出结果
+                while len(pending) >= workers * 2:
+                    yield self._collect_page(*pending.popleft())
+            while pending:
+                yield self._collect_page(*pending.popleft())
+        finally:
+            # 进程池常驻复用，只取消本文档尚未开始的页面
+            for _, _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _submit_page(self, image: Image.Image) -> Tuple[Future, ProcessPoolExecutor]:
+        """把单页提交到 OCR 进程池，返回 (future, 进程池)；进程池已崩溃时换用新的进程池"""
+        executor = _get_ocr_executor(self.ocr_workers)
+        try:
+            return executor.submit(_ocr_page, image), executor
+        except BrokenProcessPool:
+            _discard_ocr_executor(executor)
+            executor = _get_ocr_executor(self.ocr_workers)
+            return executor.submit(_ocr_page, image), executor
+
+    def _collect_page(self, page_num: int, image: Image.Image, future,
+                      executor: Optional[ProcessPoolExecutor]) -> Tuple[int, Optional[str]]:
+        """获取单页OCR结果；进程池崩溃时在新的进程池中重试一次该页
+
+        崩溃的工作进程多半正在处理这一页（段错误、内存不足被杀），不能在当前进程中重试，
+        否则会连同 Celery worker 一起崩溃，任务重新投递后反复崩溃。重试仍然失败时记为失败页面。
+        """
+        if future is None:
+            return page_num, self._ocr_page_safe(page_num, image)
+        try:
+            return page_num, future.result()
+        except BrokenProcessPool:
+            logger.warning(f"OCR worker crashed, retrying page {page_num + 1} in a new process pool")
+            _discard_ocr_executor(executor)
+        except Exception as e:
+            logger.error(f"Error performing OCR on page {page_num + 1}: {str(e)}")
+            return page_num, None
+        try:
+            future, executor = self._submit_page(image)
+            return page_num, future.result()
+        except BrokenProcessPool:
+            logger.error(f"OCR worker crashed again on page {page_num + 1}, skipping the page")
+            _discard_ocr_executor(executor)
+        except Exception as e:
+            logger.error(f"Error performing OCR on page {page_num + 1}: {str(e)}")
+        return page_num, None
+
+    def _ocr_page_safe(self, page_num: int, image: Image.Image) -> Optional[str]:
+        """在当前进程中对单页进行OCR，出错时返回 None"""
+        try:
+            return _ocr_page(image)
+        except Exception as e:
+            logger.error(f"Error performing OCR on page {page_num + 1}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _preprocess_image(image, binarize: bool = False, deskew: bool = False):
+        """预处理图像以提高OCR质量
+
+        灰度化后在同一个 uint8 缓冲区上就地完成对比度拉伸、锐化和可选的二值化，
+        中间结果按行分块计算，临时内存只与块大小有关。返回二维 uint8 数组。
+        """
         import numpy as np
-        from PIL import ImageEnhance
         
-        # 转换为numpy数组
-        img_array = np.array(image)
+        # 灰度化，得到唯一的可写工作缓冲区
+        if image.mode != 'L':
+            image = image.convert('L')
+        gray = np.array(image, dtype=np.uint8)
+        del image
         
-        # 转换为PIL图像进行增强
-        img = Image.fromarray(img_array)
+        # 对比度拉伸：按直方图 1%/99% 分位数线性拉伸
+        cdf = np.cumsum(Image.fromarray(gray).histogram())
+        low = int(np.searchsorted(cdf, cdf[-1] * 0.01))
+        high = int(np.searchsorted(cdf, cdf[-1] * 0.99))
+        if high > low:
+            lut = np.clip((np.arange(256) - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+            _apply_lut(gray, lut)
         
-        # 增加对比度
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(1.5)
+        # 锐化：原图叠加 1/2 倍拉普拉斯算子（四邻域）
+        _sharpen(gray)
         
-        # 增加锐度
-        enhancer = ImageEnhance.Sharpness(img)
-        img = enhancer.enhance(1.5)
+        # 二值化：Otsu 阈值
+        if binarize:
+            hist = np.array(Image.fromarray(gray).histogram(), dtype=np.float64)
+            weight = hist.cumsum()
+            mean = (hist * np.arange(256)).cumsum()
+            background = weight[-1] - weight
+            with np.errstate(divide='ignore', invalid='ignore'):
+                between = (mean[-1] * weight - mean * weight[-1]) ** 2 / (weight * background)
+            threshold = int(np.argmax(np.nan_to_num(between[:-1])))
+            lut = np.where(np.arange(256) > threshold, 255, 0).astype(np.uint8)
+            _apply_lut(gray, lut)
         
-        return np.array(img) 
-
-    def _create_session(self) -> requests.Session:
-        """创建具有重试机制的会话"""
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+        # 纠偏：在缩略图上估计倾斜角度，再旋转整页
+        if deskew:
+            angle = DocumentParser._estimate_skew(gray)
+            if angle:
+                logger.debug(f"Deskewing page by {angle:.1f} degrees")
+                rotated = Image.fromarray(gray).rotate(angle, resample=Image.BILINEAR, fillcolor=255)
+                gray = np.array(rotated, dtype=np.uint8)
+        
+        return gray
+
+    @staticmethod
+    def _estimate_skew(gray, max_angle: float = 5.0, step: float = 0.5) -> float:
+        """投影法估计页面倾斜角度：文字行水平时各行像素和的方差最大"""
+        import numpy as np
+        
+        thumb = Image.fromarray(gray)
+        scale = 800 / max(thumb.size)
+        if scale < 1:
+            thumb = thumb.resize((int(thumb.width * scale), int(thumb.height * scale)))
+        # 反色使文字为高值，旋转补白为 0
+        thumb = Image.fromarray(255 - np.asarray(thumb))
+        
+        best_angle, best_score = 0.0, -1.0
+        for angle in np.arange(-max_angle, max_angle + step / 2, step):
+            rows = np.asarray(thumb.rotate(float(angle), resample=Image.NEAREST), dtype=np.float32).sum(axis=1)
+            score = float(np.var(rows))
+            if score > best_score:
+                best_angle, best_score = float(angle), score
+        return best_angle
+
+    def parse_url(self, url: str, on_progress: Optional[Callable[[int], None]] = None) -> Optional[str]:
+        """从 URL 解析内容；on_progress(bytes_fetched) 在下载完成后调用"""
+        callback = (lambda index, fetched: on_progress(fetched)) if on_progress else None
+        return self.parse_urls([url], callback)[0]
+
+    def parse_urls(self, urls: List[str],
+                   on_progress: Optional[Callable[[int, int], None]] = None) -> List[Optional[str]]:
+        """抓取并解析多个 URL，结果与输入顺序一致，失败的位置为 None
 
-    def parse_url(self, url: str) -> Optional[str]:
-        """从 URL 解析内容"""
+        下载在 worker 常驻的事件循环中并发进行（全局和单个主机的并发数受 URL_FETCH_* 配置限制），
+        总耗时接近最慢的一个 URL；正文提取和过滤随后在当前线程中逐个进行。
+        启用网页缓存时，新鲜期内直接使用缓存的正文；过期后带 If-None-Match / If-Modified-Since
+        重新请求，服务器返回 304 时跳过下载和正文提取。
+        on_progress(index, bytes_fetched) 在每个 URL 处理完下载后调用。
+        """
+        results: List[Optional[str]] = [None] * len(urls)
+        cache = get_cache('url')
+        pending = []
+        for index, url in enumerate(urls):
+            try:
+                logger.info(f"Starting to parse URL: {url}")
+                
+                # URL验证
+                if not self._validate_url(url):
+                    raise ValueError("Invalid URL format or potentially dangerous URL")
+                
+                cache_key = self._url_cache_key(url) if cache else None
+                entry = self._load_url_entry(cache, cache_key)
+                if entry and time.time() - entry['fetched_at'] < entry['freshness']:
+                    logger.info(f"Using fresh cached content for {url}")
+                    cache.incr('fresh')
+                    if on_progress:
+                        on_progress(index, 0)
+                    results[index] = self._finish_web_content(entry['content'])
+                else:
+                    pending.append((index, url, cache_key, entry))
+            except Exception as e:
+                self._handle_error(e)
+        if not pending:
+            return results
+        
+        # 并发获取响应
+        with observe_stage('fetch'):
+            responses = run_async(self._fetch_all(
+                [(url, self._conditional_headers(entry)) for _, url, _, entry in pending]
+            ))
+        
+        for (index, url, cache_key, entry), response in zip(pending, responses):
+            try:
+                if isinstance(response, Exception):
+                    STAGE_FAILURES.labels('fetch').inc()
+                    raise self._fetch_error(response)
+                self._check_response(response, conditional=entry is not None)
+                if on_progress:
+                    on_progress(index, len(response.content))
+                
+                if response.status_code == 304:
+                    logger.info(f"Cached content for {url} is still valid (HTTP 304)")
+                    URL_REVALIDATIONS.labels('not_modified').inc()
+                    cache.incr('not_modified')
+                    content = entry['content']
+                    self._store_url_entry(cache, cache_key, response, content, previous=entry)
+                else:
+                    if entry:
+                        URL_REVALIDATIONS.labels('modified').inc()
+                        cache.incr('modified')
+                    # 解析内容
+                    with observe_stage('extract'):
+                        content = self._parse_web_content(response)
+                    if cache:
+                        self._store_url_entry(cache, cache_key, response, content)
+                
+                results[index] = self._finish_web_content(content)
+            except Exception as e:
+                self._handle_error(e)
+        return results
+
+    def _finish_web_content(self, content: str) -> str:
+        """内容过滤和清理（规则可热更新，缓存的是过滤前的正文）"""
+        with observe_stage('filter'):
+            return self._filter_content(content)
+
+    async def _fetch_all(self, requests: List[Tuple[str, Dict[str, str]]]) -> list:
+        return await self._get_fetcher().fetch_all(requests)
+
+    def _get_fetcher(self) -> AsyncURLFetcher:
+        """获取当前事件循环上的网页抓取客户端（连接池与事件循环绑定，同一循环内复用）"""
+        loop = asyncio.get_running_loop()
+        if self._fetcher is None or self._fetcher_loop is not loop:
+            self._fetcher = AsyncURLFetcher(
+                max_connections=settings.URL_FETCH_MAX_CONNECTIONS,
+                per_host=settings.URL_FETCH_PER_HOST,
+                timeout=settings.URL_FETCH_TIMEOUT,
+                retries=settings.URL_FETCH_RETRIES,
+                max_bytes=settings.URL_MAX_BYTES,
+                content_types=self.WEB_CONTENT_TYPES,
+            )
+            self._fetcher_loop = loop
+        return self._fetcher
+
+    def _url_cache_key(self, url: str) -> str:
+        """网页缓存键：URL + 解析器版本 + 正文提取方式"""
+        return make_cache_key('url', url, self.PARSER_VERSION, settings.CONTENT_EXTRACTOR)
+
+    @staticmethod
+    def _load_url_entry(cache, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not cache_key:
+            return None
+        raw = cache.get(cache_key)
+        if raw is None:
+            return None
         try:
-            logger.info(f"Starting to parse URL: {url}")
-            
-            # URL验证
-            if not self._validate_url(url):
-                raise ValueError("Invalid URL format or potentially dangerous URL")
-            
-            # 获取响应
-            response = self._get_response(url)
-            
-            # 解析内容
-            content = self._parse_web_content(response)
-            
-            # 内容过滤和清理
-            content = self._filter_content(content)
-            
-            # 返回处理后的文本
-            return content
-            
-        except Exception as e:
-            self._handle_error(e)
+            return json.loads(raw)
+        except ValueError:
+            logger.warning(f"Ignoring corrupted URL cache entry {cache_key[:12]}")
             return None
 
+    @staticmethod
+    def _conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def _freshness(response: FetchedPage) -> Optional[int]:
+        """新鲜期：取配置值，服务器的 Cache-Control 更严格时以服务器为准；不允许缓存时返回 None"""
+        freshness = settings.URL_CACHE_FRESHNESS
+        cache_control = response.headers.get('cache-control', '').lower()
+        directives = {}
+        for item in cache_control.split(','):
+            name, _, value = item.strip().partition('=')
+            directives[name] = value.strip('"')
+        if 'no-store' in directives:
+            return None
+        if 'no-cache' in directives:
+            return 0
+        if directives.get('max-age', '').isdigit():
+            freshness = min(freshness, int(directives['max-age']))
+        return freshness
+
+    def _store_url_entry(self, cache, cache_key: str, response: FetchedPage, content: Optional[str],
+                         previous: Optional[Dict[str, Any]] = None):
+        """保存正文及验证信息；304 响应只更新时间和服务器返回的新验证信息"""
+        freshness = self._freshness(response)
+        if freshness is None or not content:
+            return
+        previous = previous or {}
+        etag = response.headers.get('etag') or previous.get('etag')
+        last_modified = response.headers.get('last-modified') or previous.get('last_modified')
+        if not (etag or last_modified or freshness):
+            # 既不能重新验证也没有新鲜期，缓存没有意义
+            return
+        cache.set(cache_key, json.dumps({
+            'url': response.url,
+            'content': content,
+            'etag': etag,
+            'last_modified': last_modified,
+            'freshness': freshness,
+            'fetched_at': time.time(),
+        }, ensure_ascii=False))
+
     def _validate_url(self, url: str) -> bool:
         """验证URL"""
         if not validators.url(url):
@@ -334,141 +748,161 @@ class DocumentParser:
             
         return True
 
-    def _get_response(self, url: str) -> requests.Response:
-        """获取URL响应"""
-        try:
-            # 通用请求头
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Cache-Control': 'max-age=0'
-            }
-            
-            response = self.session.get(
-                url,
-                headers=headers,
-                timeout=30,
-                allow_redirects=True,
-                verify=True
-            )
-            
-            # 检查状态码
-            if response.status_code == 403:
-                raise ValueError(f"访问被拒绝 (HTTP 403)，该网页可能需要登录或不允许访问")
-            elif response.status_code == 404:
-                raise ValueError(f"页面未找到 (HTTP 404)")
-            elif response.status_code == 429:
-                raise ValueError(f"请求过于频繁 (HTTP 429)，请稍后再试")
-            elif response.status_code >= 400:
-                raise ValueError(f"请求失败，HTTP状态码: {response.status_code}")
-            
-            response.raise_for_status()
-            
-            # 检查内容类型
-            content_type = response.headers.get('content-type', '').lower()
-            if not any(t in content_type for t in ['text/html', 'application/json', 'text/plain']):
-                raise ValueError(f"不支持的内容类型: {content_type}")
-            
-            return response
-            
-        except requests.Timeout:
-            raise ValueError("请求超时，请检查网络连接或稍后重试")
-        except requests.ConnectionError:
-            raise ValueError("网络连接错误，请检查网络连接")
-        except requests.TooManyRedirects:
-            raise ValueError("重定向次数过多，可能是无效的URL")
-        except requests.HTTPError as e:
-            raise ValueError(f"HTTP请求错误: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"请求失败: {str(e)}")
+    @staticmethod
+    def _fetch_error(error: Exception) -> ValueError:
+        """把抓取异常转换为面向用户的错误信息"""
+        if isinstance(error, PageTooLargeError):
+            return ValueError(f"网页内容超过大小限制 ({settings.URL_MAX_BYTES // (1024 * 1024)}MB)")
+        if isinstance(error, httpx.TimeoutException):
+            return ValueError("请求超时，请检查网络连接或稍后重试")
+        if isinstance(error, httpx.TooManyRedirects):
+            return ValueError("重定向次数过多，可能是无效的URL")
+        if isinstance(error, httpx.TransportError):
+            return ValueError("网络连接错误，请检查网络连接")
+        return ValueError(f"请求失败: {str(error)}")
 
-    def _parse_web_content(self, response: requests.Response) -> str:
-        """解析网页内容"""
-        # 检测编码
-        response.encoding = response.apparent_encoding
+    @staticmethod
+    def _check_response(response: FetchedPage, conditional: bool = False):
+        """检查状态码和内容类型；conditional 表示请求带了条件请求头，此时允许 304"""
+        # 检查状态码
+        if response.status_code == 403:
+            raise ValueError(f"访问被拒绝 (HTTP 403)，该网页可能需要登录或不允许访问")
+        elif response.status_code == 404:
+            raise ValueError(f"页面未找到 (HTTP 404)")
+        elif response.status_code == 429:
+            raise ValueError(f"请求过于频繁 (HTTP 429)，请稍后再试")
+        elif response.status_code >= 400:
+            raise ValueError(f"请求失败，HTTP状态码: {response.status_code}")
         
-        # 使用 BeautifulSoup 解析 HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        if response.status_code == 304:
+            if not conditional:
+                raise ValueError("服务器返回了 304，但请求未携带条件请求头")
+            return
         
-        # 移除不需要的元素
-        for element in soup(["script", "style", "meta", "link", "noscript", "header", "footer", "nav"]):
-            element.decompose()
-        
-        # 获取主要内容
-        main_content = (
-            soup.find('main') or 
-            soup.find('article') or 
-            soup.find('div', class_='content') or 
-            soup
-        )
-        
-        # 获取文本内容
-        text = main_content.get_text(separator='\n', strip=True)
-        
-        # 清理文本
-        lines = []
-        for line in text.splitlines():
-            line = line.strip()
-            if line and len(line) > 1:  # 忽略单字符行
-                lines.append(line)
+        # 检查内容类型
+        content_type = response.headers.get('content-type', '').lower()
+        if not any(t in content_type for t in DocumentParser.WEB_CONTENT_TYPES):
+            raise ValueError(f"不支持的内容类型: {content_type}")
+
+    def _parse_web_content(self, response: FetchedPage) -> str:
+        """解析网页内容，正文提取方式由 CONTENT_EXTRACTOR 配置"""
+        # 检测编码：Content-Type 头 > <meta> 声明 > 对开头一段内容做统计检测
+        content_type = response.headers.get('content-type', '')
+        encoding = detect_encoding(response.content, content_type, html='html' in content_type.lower())
         
-        return '\n'.join(lines)
+        return get_content_extractor().extract(response.content.decode(encoding, errors='replace'))
 
     def _filter_content(self, text: str) -> str:
-        """过滤和清理内容"""
-        # 敏感内容过滤
-        text = self._filter_sensitive_content(text)
-        
-        # 广告过滤
-        text = self._filter_advertisements(text)
+        """过滤和清理内容：敏感词和广告一次扫描完成，再去重、转义"""
+        content_filter = get_content_filter()
+        text = content_filter.filter(text)
         
         # 去除重复内容
-        text = self._remove_duplicates(text)
-        
-        # 清理 HTML
-        text = bleach.clean(text)
+        text = content_filter.remove_duplicates(text)
         
-        # 转义特殊字符
-        text = html.escape(text)
-        
-        return text
-
-    def _filter_sensitive_content(self, text: str) -> str:
-        """过滤敏感内容"""
-        for word in self.SENSITIVE_WORDS:
-            text = re.sub(r'\b' + re.escape(word) + r'\b', '[FILTERED]', text, flags=re.IGNORECASE)
-        return text
-    
-    def _filter_advertisements(self, text: str) -> str:
-        """过滤广告"""
-        for pattern in self.AD_PATTERNS:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        return text
-    
-    def _remove_duplicates(self, text: str) -> str:
-        """去除重复内容"""
-        lines = text.split('\n')
-        unique_lines = []
-        seen = set()
-        
-        for line in lines:
-            line_hash = hashlib.md5(line.encode()).hexdigest()
-            if line_hash not in seen and line.strip():
-                seen.add(line_hash)
-                unique_lines.append(line)
-        
-        return '\n'.join(unique_lines)
+        # 转义特殊字符（纯文本转义后已不含可执行的 HTML，无需再经过 bleach）
+        return html.escape(text)
 
     def _handle_error(self, error: Exception):
         """错误处理"""
-        if isinstance(error, Timeout):
+        if isinstance(error, httpx.TimeoutException):
             logger.error("Request timed out")
-        elif isinstance(error, RequestException):
+        elif isinstance(error, httpx.HTTPError):
             logger.error(f"Request failed: {str(error)}")
         elif isinstance(error, ValueError):
             logger.error(f"Invalid input: {str(error)}")
         else:
-            logger.error(f"Unexpected error: {str(error)}", exc_info=True) 
\ No newline at end of file
+            logger.error(f"Unexpected error: {str(error)}", exc_info=True)
+
+
+# 图像预处理按行分块的块高度
+_PREPROCESS_STRIP_ROWS = 256
+
+
+def _apply_lut(gray, lut):
+    """按行分块对 uint8 图像就地查表"""
+    import numpy as np
+    for top in range(0, gray.shape[0], _PREPROCESS_STRIP_ROWS):
+        block = gray[top:top + _PREPROCESS_STRIP_ROWS]
+        np.take(lut, block, out=block)
+
+
+def _sharpen(gray):
+    """按行分块就地锐化：gray += (4 * gray - 上下左右四邻域之和) / 2"""
+    import numpy as np
+    height = gray.shape[0]
+    prev_row = None  # 上一块最后一行锐化前的原值
+    for top in range(0, height, _PREPROCESS_STRIP_ROWS):
+        bottom = min(top + _PREPROCESS_STRIP_ROWS, height)
+        block = gray[top:bottom]
+        detail = np.multiply(block, 4, dtype=np.int16)
+        detail[1:] -= block[:-1]
+        detail[:-1] -= block[1:]
+        if prev_row is not None:
+            detail[0] -= prev_row
+        if bottom < height:
+            detail[-1] -= gray[bottom]
+        detail[:, 1:] -= block[:, :-1]
+        detail[:, :-1] -= block[:, 1:]
+        prev_row = block[-1].copy()
+        detail >>= 1
+        detail += block
+        np.clip(detail, 0, 255, out=detail)
+        np.copyto(block, detail, casting='unsafe')
+
+
+def _get_rss_mb() -> float:
+    """获取当前进程的常驻内存（MB）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        # 非 Linux 平台退化为进程生命周期内的内存峰值
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# 常驻的 OCR 进程池，跨文档复用，使每个工作进程中的 OCR 引擎只初始化一次
+_ocr_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_ocr_executor(workers: int) -> ProcessPoolExecutor:
+    """获取当前进程的 OCR 进程池（首次使用时创建）"""
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker)
+    return _ocr_executor
+
+
+def _discard_ocr_executor(executor: Optional[ProcessPoolExecutor] = None):
+    """丢弃已损坏的进程池，下次使用时重新创建"""
+    global _ocr_executor
+    if executor is None or executor is _ocr_executor:
+        broken, _ocr_executor = _ocr_executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_ocr_worker():
+    """OCR 工作进程初始化：限制 tesseract 内部线程数，避免与进程池争抢 CPU，并预先创建 OCR 后端"""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    get_ocr_backend()
+
+
+def _ocr_page(image: Image.Image) -> str:
+    """对单页图像进行预处理和OCR（定义在模块顶层，以便进程池序列化调用）"""
+    # 预处理图像以提高OCR质量
+    image = Image.fromarray(DocumentParser._preprocess_image(
+        image,
+        binarize=settings.OCR_BINARIZE,
+        deskew=settings.OCR_DESKEW
+    ))
+    
+    # 使用中文和英文语言包
+    return get_ocr_backend().recognize(
+        image,
+        lang=DocumentParser.OCR_LANG,
+        psm=DocumentParser.OCR_PSM,
+        oem=DocumentParser.OCR_OEM
+    )
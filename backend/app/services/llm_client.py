@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """模型接口返回错误"""
+
+
+class DashScopeClient:
+    """DashScope 文本生成 HTTP 接口的异步客户端
+
+    基于 httpx.AsyncClient，在同一事件循环内复用连接池（keep-alive），
+    多个请求可以同时进行，不必每次重新建立 TCP/TLS 连接。
+    客户端与创建它的事件循环绑定，不能跨事件循环使用。
+    """
+
+    GENERATION_PATH = '/services/aigc/text-generation/generation'
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = 120.0, max_connections: int = 20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            # 显式传入 transport 时 AsyncClient 会忽略 limits 参数，连接池上限要设置在 transport 上
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,  # 连接失败时重试
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            ),
+            headers={'Authorization': f'Bearer {api_key}'} if api_key else None,
+        )
+
+    def _payload(self, model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> dict:
+        return {
+            'model': model,
+            'input': {'messages': messages},
+            'parameters': {
+                'result_format': 'message',
+                'max_tokens': max_tokens,
+                'temperature': temperature,
+            },
+        }
+
+    async def generate(self, model: str, messages: List[Dict[str, str]],
+                       max_tokens: int, temperature: float) -> str:
+        """生成一次完整回复"""
+        with observe_stage('llm'):
+            response = await self._client.post(
+                self.GENERATION_PATH,
+                json=self._payload(model, messages, max_tokens, temperature),
+            )
+            data = self._parse_response(response)
+        return data['output']['choices'][0]['message']['content']
+
+    async def generate_stream(self, model: str, messages: List[Dict[str, str]],
+                              max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        """以 SSE 方式流式生成回复，逐段产出增量文本"""
+        payload = self._payload(model, messages, max_tokens, temperature)
+        payload['parameters']['incremental_output'] = True
+        with observe_stage('llm'):
+            async with self._client.stream(
+                'POST',
+                self.GENERATION_PATH,
+                json=payload,
+                headers={'X-DashScope-SSE': 'enable', 'Accept': 'text/event-stream'},
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._parse_response(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    data = json.loads(line[5:])
+                    if 'output' not in data:
+                        raise LLMError(data.get('message') or 'Unknown streaming error')
+                    choices = data['output'].get('choices') or []
+                    delta = choices[0]['message']['content'] if choices else ''
+                    if delta:
+                        yield delta
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> dict:
+        try:
+            data = response.json()
+        except ValueError:
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+        if response.status_code != 200:
+            logger.error(f"Ali API error: {data.get('code')} - {data.get('message')}")
+            raise LLMError(data.get('message') or f"HTTP {response.status_code}")
+        return data
+
+    async def aclose(self):
+        await self._client.aclose()
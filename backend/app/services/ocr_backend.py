@@ -0,0 +1,94 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import pytesseract
+from PIL import Image
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TesseractCliBackend:
+    """通过 pytesseract 调用 tesseract 命令行
+
+    每次识别都会写临时文件并启动新的 tesseract 进程，重新加载语言模型。
+    """
+
+    name = 'cli'
+
+    def recognize(self, image: Image.Image, lang: str, psm: Optional[int] = None, oem: Optional[int] = None) -> str:
+        options = []
+        if psm is not None:
+            options.append(f'--psm {psm}')
+        if oem is not None:
+            options.append(f'--oem {oem}')
+        return pytesseract.image_to_string(image, lang=lang, config=' '.join(options))
+
+
+class TesserocrBackend:
+    """通过 tesserocr 调用 tesseract C API
+
+    每个进程按 (语言, psm, oem) 保留常驻的引擎实例，语言模型只加载一次，
+    图像直接以内存中的 PIL 对象传入，不经过临时文件。
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._engines: Dict[Tuple[str, Optional[int], Optional[int]], object] = {}
+        self._lock = threading.Lock()
+
+    def _get_engine(self, lang: str, psm: Optional[int], oem: Optional[int]):
+        key = (lang, psm, oem)
+        engine = self._engines.get(key)
+        if engine is None:
+            kwargs = {'lang': lang}
+            if psm is not None:
+                kwargs['psm'] = psm
+            if oem is not None:
+                kwargs['oem'] = oem
+            engine = self._tesserocr.PyTessBaseAPI(**kwargs)
+            self._engines[key] = engine
+            logger.info(f"Loaded tesseract engine (lang={lang}, psm={psm}, oem={oem})")
+        return engine
+
+    def recognize(self, image: Image.Image, lang: str, psm: Optional[int] = None, oem: Optional[int] = None) -> str:
+        # 引擎实例不是线程安全的
+        with self._lock:
+            engine = self._get_engine(lang, psm, oem)
+            engine.SetImage(image)
+            try:
+                return engine.GetUTF8Text()
+            finally:
+                engine.Clear()
+
+    def close(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.End()
+            self._engines.clear()
+
+
+_backend = None
+
+
+def get_ocr_backend():
+    """获取当前进程的 OCR 后端（首次使用时创建）
+
+    OCR_BACKEND 为 tesserocr 但未安装时退回命令行方式。
+    """
+    global _backend
+    if _backend is None:
+        if settings.OCR_BACKEND == 'tesserocr':
+            try:
+                _backend = TesserocrBackend()
+            except ImportError:
+                logger.warning("tesserocr is not installed, falling back to tesseract CLI")
+                _backend = TesseractCliBackend()
+        else:
+            _backend = TesseractCliBackend()
+    return _backend
@@ -0,0 +1,350 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """分块计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """由任意可 JSON 序列化的参数生成缓存键"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class RedisCacheBackend:
+    """Redis 缓存后端
+
+    值保存在独立的键中并设置 TTL；按最近访问时间维护有序集合，
+    总大小超过上限时从最久未访问的条目开始淘汰（LRU）。值键按 TTL 过期后，
+    索引和大小统计中的记录在淘汰和查看统计时清理。
+    命中统计保存在 Redis 中，多个 worker 共享。
+    """
+
+    # 清理过期条目时每批检查的条目数
+    PURGE_BATCH = 500
+
+    def __init__(self, name: str, max_bytes: int, ttl: int):
+        self.prefix = f"cache:{name}"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.CACHE_REDIS_DB,
+                socket_timeout=5.0,
+                socket_connect_timeout=5.0,
+            )
+        return self._client
+
+    def _value_key(self, key: str) -> str:
+        return f"{self.prefix}:v:{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self._value_key(key))
+        pipe.zscore(f"{self.prefix}:lru", key)
+        value, indexed = pipe.execute()
+        if value is None:
+            # LRU 索引中还有记录说明条目已过期，需要从大小统计中移除；从未写入过的键不做清理
+            if indexed is not None:
+                self._forget([key])
+            return None
+        self.client.zadd(f"{self.prefix}:lru", {key: time.time()})
+        return value.decode('utf-8')
+
+    def set(self, key: str, value: str):
+        data = value.encode('utf-8')
+        old_size = self.client.hget(f"{self.prefix}:size", key)
+        pipe = self.client.pipeline()
+        pipe.set(self._value_key(key), data, ex=self.ttl or None)
+        pipe.zadd(f"{self.prefix}:lru", {key: time.time()})
+        pipe.hset(f"{self.prefix}:size", key, len(data))
+        pipe.incrby(f"{self.prefix}:bytes", len(data) - int(old_size or 0))
+        total = pipe.execute()[-1]
+        if self.max_bytes and total > self.max_bytes:
+            self._evict(total)
+
+    def _evict(self, total: int):
+        """先移除已过期的条目，再按 LRU 顺序淘汰，直到总大小回落到上限的 90%"""
+        total -= self._purge_expired()
+        target = int(self.max_bytes * 0.9)
+        while total > target:
+            oldest = self.client.zpopmin(f"{self.prefix}:lru", 16)
+            if not oldest:
+                break
+            keys = [member.decode('utf-8') for member, _ in oldest]
+            total -= self._forget(keys)
+            logger.debug(f"Evicted {len(keys)} entries from {self.prefix}")
+
+    def _forget(self, keys) -> int:
+        """删除条目及其统计信息，返回释放的字节数"""
+        sizes = self.client.hmget(f"{self.prefix}:size", keys)
+        freed = sum(int(size) for size in sizes if size)
+        pipe = self.client.pipeline()
+        pipe.delete(*[self._value_key(key) for key in keys])
+        pipe.zrem(f"{self.prefix}:lru", *keys)
+        pipe.hdel(f"{self.prefix}:size", *keys)
+        if freed:
+            pipe.decrby(f"{self.prefix}:bytes", freed)
+        pipe.execute()
+        return freed
+
+    def _purge_expired(self) -> int:
+        """从 LRU 索引和大小统计中移除值已按 TTL 过期的条目，返回释放的字节数
+
+        值键到期后由 Redis 自动删除，索引中的记录只在访问或淘汰时移除；不清理时统计会偏大，
+        淘汰时已过期条目也计入总大小，仍然有效的条目会被提前淘汰。
+        """
+        freed = 0
+        batch = []
+        for member, _ in self.client.zscan_iter(f"{self.prefix}:lru", count=self.PURGE_BATCH):
+            batch.append(member.decode('utf-8'))
+            if len(batch) >= self.PURGE_BATCH:
+                freed += self._forget_expired(batch)
+                batch = []
+        if batch:
+            freed += self._forget_expired(batch)
+        return freed
+
+    def _forget_expired(self, keys) -> int:
+        """移除值键已不存在的条目，返回释放的字节数"""
+        import redis
+
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(self._value_key(key))
+        expired = [key for key, exists in zip(keys, pipe.execute()) if not exists]
+        if not expired:
+            return 0
+        value_keys = [self._value_key(key) for key in expired]
+        with self.client.pipeline() as pipe:
+            try:
+                # 监视值键：检查之后有条目被重新写入时放弃本批，留到下次清理
+                pipe.watch(*value_keys)
+                if pipe.exists(*value_keys):
+                    return 0
+                sizes = pipe.hmget(f"{self.prefix}:size", expired)
+                freed = sum(int(size) for size in sizes if size)
+                pipe.multi()
+                pipe.zrem(f"{self.prefix}:lru", *expired)
+                pipe.hdel(f"{self.prefix}:size", *expired)
+                if freed:
+                    pipe.decrby(f"{self.prefix}:bytes", freed)
+                pipe.execute()
+            except redis.WatchError:
+                return 0
+        logger.debug(f"Purged {len(expired)} expired entries from {self.prefix}")
+        return freed
+
+    def incr(self, field: str):
+        self.client.hincrby(f"{self.prefix}:stats", field, 1)
+
+    def stats(self) -> Dict[str, int]:
+        self._purge_expired()
+        stats = {k.decode('utf-8'): int(v) for k, v in self.client.hgetall(f"{self.prefix}:stats").items()}
+        stats['entries'] = self.client.zcard(f"{self.prefix}:lru")
+        stats['bytes'] = int(self.client.get(f"{self.prefix}:bytes") or 0)
+        return stats
+
+
+class DiskCacheBackend:
+    """本地磁盘缓存后端
+
+    每个条目一个文件：mtime 记录写入时间（用于 TTL），atime 记录最近访问时间
+    （用于 LRU 淘汰）。命中统计只在当前进程内有效。
+    """
+
+    def __init__(self, name: str, directory: str, max_bytes: int, ttl: int):
+        self.directory = os.path.join(directory, name)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._total = None
+        self._counters = Counter()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if self.ttl and now - st.st_mtime > self.ttl:
+            self._remove(path, st.st_size)
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            value = f.read()
+        # 显式更新访问时间，不依赖文件系统的 atime 设置
+        os.utime(path, (now, st.st_mtime))
+        return value
+
+    def set(self, key: str, value: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = value.encode('utf-8')
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        # 先写临时文件再替换，避免其他进程读到写了一半的内容
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        if self._total is None:
+            self._total = self._scan_total()
+        else:
+            self._total += len(data) - old_size
+        if self.max_bytes and self._total > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    yield path, os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+    def _scan_total(self) -> int:
+        return sum(st.st_size for _, st in self._entries())
+
+    def _evict(self):
+        """删除过期条目，再按最近访问时间淘汰，直到总大小回落到上限的 90%"""
+        now = time.time()
+        entries = []
+        total = 0
+        for path, st in self._entries():
+            if self.ttl and now - st.st_mtime > self.ttl:
+                self._remove(path, 0)
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+            total += st.st_size
+
+        target = int(self.max_bytes * 0.9)
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path, 0)
+            total -= size
+            evicted += 1
+        self._total = total
+        logger.debug(f"Evicted {evicted} entries from {self.directory}")
+
+    def _remove(self, path: str, size: int):
+        try:
+            os.remove(path)
+            if self._total is not None:
+                self._total -= size
+        except FileNotFoundError:
+            pass
+
+    def incr(self, field: str):
+        self._counters[field] += 1
+
+    def stats(self) -> Dict[str, int]:
+        stats = dict(self._counters)
+        entries = list(self._entries())
+        stats['entries'] = len(entries)
+        stats['bytes'] = sum(st.st_size for _, st in entries)
+        return stats
+
+
+class ResultCache:
+    """带命中统计的结果缓存
+
+    缓存只用于加速，后端出错时记录日志并按未命中处理，不影响主流程。
+    """
+
+    def __init__(self, name: str, backend):
+        self.name = name
+        self.backend = backend
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+            CACHE_REQUESTS.labels(self.name, 'hit' if value is not None else 'miss').inc()
+            self.backend.incr('hits' if value is not None else 'misses')
+        except Exception as e:
+            CACHE_REQUESTS.labels(self.name, 'error').inc()
+            logger.warning(f"Cache {self.name} get failed: {str(e)}")
+            return None
+        if value is not None:
+            logger.info(f"Cache {self.name} hit: {key[:12]}")
+        return value
+
+    def set(self, key: str, value: str):
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"Cache {self.name} set failed: {str(e)}")
+
+    def incr(self, field: str):
+        """累加自定义统计项（出现在 stats() 中）"""
+        try:
+            self.backend.incr(field)
+        except Exception as e:
+            logger.warning(f"Cache {self.name} incr failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            stats = self.backend.stats()
+        except Exception as e:
+            return {"error": str(e)}
+        hits = stats.setdefault('hits', 0)
+        misses = stats.setdefault('misses', 0)
+        stats['hit_rate'] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+        return stats
+
+
+_caches: Dict[str, Optional[ResultCache]] = {}
+
+
+def get_cache(name: str) -> Optional[ResultCache]:
+    """按名称获取缓存实例（首次使用时创建）
+
+    配置项为 {NAME}_CACHE_BACKEND（redis / disk / none）、{NAME}_CACHE_MAX_BYTES
+    和 {NAME}_CACHE_TTL；未启用时返回 None。
+    """
+    if name not in _caches:
+        prefix = name.upper()
+        backend_type = getattr(settings, f"{prefix}_CACHE_BACKEND", 'none').lower()
+        max_bytes = getattr(settings, f"{prefix}_CACHE_MAX_BYTES", 0)
+        ttl = getattr(settings, f"{prefix}_CACHE_TTL", 0)
+        if backend_type == 'redis':
+            _caches[name] = ResultCache(name, RedisCacheBackend(name, max_bytes, ttl))
+        elif backend_type == 'disk':
+            _caches[name] = ResultCache(name, DiskCacheBackend(name, settings.CACHE_DIR, max_bytes, ttl))
+        else:
+            _caches[name] = None
+    return _caches[name]
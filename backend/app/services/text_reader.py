@@ -0,0 +1,96 @@
+import codecs
+import io
+import logging
+import os
+from typing import Iterator, Optional
+
+from app.services.charset import DETECTION_SAMPLE_BYTES, fallback_encodings, sniff_encoding
+
+logger = logging.getLogger(__name__)
+
+# 每次从文件读取的字节数，解码后的一个文本块大致也是这个大小
+READ_BLOCK_BYTES = 1024 * 1024
+# 除开头外，再从文件中间均匀取几段样本，避免开头全是 ASCII 时误判
+SAMPLE_WINDOWS = 4
+
+
+def sample_file(file_path: str, sample_size: int = DETECTION_SAMPLE_BYTES, windows: int = SAMPLE_WINDOWS) -> bytes:
+    """读取文件开头和中间若干段内容作为编码检测样本，总大小不超过 sample_size
+
+    每段样本都截取到完整的行（UTF-8 和 GBK 中换行符都不会出现在多字节字符内部），
+    这样样本不会以半个字符开头或结尾。
+    """
+    size = os.path.getsize(file_path)
+    if size <= sample_size:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    window = sample_size // (windows + 1)
+    parts = []
+    with open(file_path, 'rb') as f:
+        for i in range(windows + 1):
+            f.seek(size * i // (windows + 1))
+            data = f.read(window)
+            start = data.find(b'\n') + 1 if i else 0
+            end = data.rfind(b'\n')
+            if end >= start:
+                parts.append(data[start:end])
+            elif not i:
+                # 开头一段没有换行（如单行的大文件），整段作为样本
+                parts.append(data)
+    return b'\n'.join(parts)
+
+
+def detect_file_encoding(file_path: str) -> str:
+    """按样本检测文本文件编码，读取量与文件大小无关"""
+    return sniff_encoding(sample_file(file_path), truncated=os.path.getsize(file_path) > DETECTION_SAMPLE_BYTES)
+
+
+def iter_text_file(file_path: str, encoding: Optional[str] = None, block_size: int = READ_BLOCK_BYTES) -> Iterator[str]:
+    """逐块读取并解码文本文件，产出文本块
+
+    编码未指定时按样本检测；增量解码，块边界处被截断的多字节字符和 \\r\\n 会留到下一块，
+    换行统一为 \\n（与文本模式 open 一致）。同一时刻只有一个块在内存中，峰值内存与文件大小无关。
+
+    按检测出的编码严格解码。样本之外出现无法解码的字节时（如开头是 ASCII、后面才是 GBK），
+    从出错的字节开始改用 GB18030 解码，之前的内容不受影响；之前全是 ASCII 时，结果与从头按 GB18030
+    读取相同。GB18030 也失败时才把非法字节替换为 U+FFFD。
+    """
+    encoding = encoding or detect_file_encoding(file_path)
+    candidates = fallback_encodings(encoding)
+    errors = 'strict'
+    decoder = _make_decoder(candidates.pop(0), errors)
+    with open(file_path, 'rb') as f:
+        while True:
+            position = f.tell()
+            state = decoder.getstate()
+            data = f.read(block_size)
+            try:
+                text = decoder.decode(data, final=not data)
+            except UnicodeDecodeError as e:
+                # e.start 相对于上一块末尾缓存的字节加上本块；出错位置之前的内容仍按原编码解码
+                good = e.start - len(state[0])
+                decoder.setstate(state)
+                text = decoder.decode(data[:good]) if good > 0 else ''
+                if text:
+                    yield text
+                pending_cr = decoder.getstate()[1] & 1
+                if candidates:
+                    encoding = candidates.pop(0)
+                else:
+                    errors = 'replace'
+                logger.warning(
+                    f"{os.path.basename(file_path)} is not valid {e.encoding} at byte {position + good}, "
+                    f"decoding the rest as {encoding} (errors={errors})"
+                )
+                decoder = _make_decoder(encoding, errors)
+                decoder.setstate((b'', pending_cr))
+                f.seek(position + good)
+                continue
+            if text:
+                yield text
+            if not data:
+                break
+
+
+def _make_decoder(encoding: str, errors: str) -> io.IncrementalNewlineDecoder:
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(errors=errors), translate=True)
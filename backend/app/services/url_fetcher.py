@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 通用请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Cache-Control': 'max-age=0',
+}
+
+# 这些状态码按退避间隔重试
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PageTooLargeError(Exception):
+    """响应体超过大小上限"""
+
+
+class FetchedPage:
+    """抓取结果：状态码、响应头、最终 URL（跟随重定向后）和已解压的响应体"""
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class AsyncURLFetcher:
+    """并发抓取网页的异步客户端
+
+    基于 httpx.AsyncClient 复用连接池；同时进行的请求总数不超过 max_connections，
+    同一主机不超过 per_host，避免一个任务里的大量同站链接占满连接或触发对方限流。
+    每个 URL 有整体超时（包括重试），超时或出错只影响该 URL。
+    响应体流式读取：超过 max_bytes（按解压后的大小计算）立即中止；非 2xx 响应和
+    Content-Type 不在 content_types 中的响应不读取响应体，下载的时间和内存都有上限。
+    客户端和信号量与创建它的事件循环绑定，不能跨事件循环使用。
+    """
+
+    def __init__(self, max_connections: int = 20, per_host: int = 4, timeout: float = 30.0,
+                 retries: int = 2, backoff: float = 1.0, max_redirects: int = 10,
+                 max_bytes: int = 0, content_types: Optional[Iterable[str]] = None):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.max_bytes = max_bytes
+        self.content_types = tuple(content_types) if content_types else None
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            # 显式传入 transport 时 AsyncClient 会忽略 limits 参数，连接池上限要设置在 transport 上
+            transport=httpx.AsyncHTTPTransport(
+                retries=1,  # 建立连接失败时重试
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            ),
+            follow_redirects=True,
+            max_redirects=max_redirects,
+        )
+        # 在事件循环内首次使用时创建（Python 3.9 的 Semaphore 创建时即绑定当前事件循环）
+        self._global_slots: Optional[asyncio.Semaphore] = None
+        # 主机 -> [信号量, 正在使用或等待的请求数]，没有请求时删除，避免无限增长
+        self._host_slots: Dict[str, list] = {}
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchedPage:
+        """抓取单个 URL，超时抛出 httpx.TimeoutException，响应体过大抛出 PageTooLargeError"""
+        try:
+            return await asyncio.wait_for(self._fetch_with_retry(url, headers), self.timeout * (self.retries + 1))
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException(f"Fetching {url} timed out")
+
+    async def fetch_all(self, requests: Sequence[Tuple[str, Optional[Dict[str, str]]]]
+                        ) -> List[Union[FetchedPage, Exception]]:
+        """并发抓取多个 (url, headers)，结果与输入顺序一致；出错的位置返回异常对象"""
+        return await asyncio.gather(
+            *(self.fetch(url, headers) for url, headers in requests),
+            return_exceptions=True,
+        )
+
+    async def _fetch_with_retry(self, url: str, headers: Optional[Dict[str, str]]) -> FetchedPage:
+        host = urlparse(url).netloc
+        attempt = 0
+        while True:
+            try:
+                # 先占主机名额再占全局名额，等待同一主机时不占用全局名额
+                async with self._host_slot(host), self._global_slot():
+                    async with self._client.stream('GET', url, headers=headers) as response:
+                        page = await self._read_page(response)
+                if page.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return page
+                logger.warning(f"HTTP {page.status_code} from {url}, retrying")
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                if attempt >= self.retries:
+                    raise
+                logger.warning(f"Fetching {url} failed, retrying: {str(e)}")
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    async def _read_page(self, response: httpx.Response) -> FetchedPage:
+        """按需流式读取响应体，累计大小超过上限时中止（不再继续下载）"""
+        content = b''
+        content_type = response.headers.get('content-type', '').lower()
+        wanted = self.content_types is None or any(t in content_type for t in self.content_types)
+        if response.is_success and wanted:
+            declared = response.headers.get('content-length', '')
+            if self.max_bytes and declared.isdigit() and int(declared) > self.max_bytes:
+                raise PageTooLargeError(f"Content-Length {declared} exceeds {self.max_bytes} bytes")
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if self.max_bytes and size > self.max_bytes:
+                    raise PageTooLargeError(f"Response body exceeds {self.max_bytes} bytes")
+                chunks.append(chunk)
+            content = b''.join(chunks)
+        return FetchedPage(str(response.url), response.status_code, response.headers, content)
+
+    def _global_slot(self) -> asyncio.Semaphore:
+        if self._global_slots is None:
+            self._global_slots = asyncio.Semaphore(self.max_connections)
+        return self._global_slots
+
+    def _host_slot(self, host: str):
+        return _HostSlot(self._host_slots, host, self.per_host)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class _HostSlot:
+    """单个主机的并发名额，最后一个使用者退出时移除该主机的信号量"""
+
+    def __init__(self, slots: Dict[str, list], host: str, limit: int):
+        self.slots = slots
+        self.host = host
+        self.limit = limit
+
+    async def __aenter__(self):
+        slot = self.slots.get(self.host)
+        if slot is None:
+            slot = self.slots[self.host] = [asyncio.Semaphore(self.limit), 0]
+        slot[1] += 1
+        try:
+            await slot[0].acquire()
+        except BaseException:
+            self._leave(slot)
+            raise
+
+    async def __aexit__(self, *exc_info):
+        slot = self.slots[self.host]
+        slot[0].release()
+        self._leave(slot)
+
+    def _leave(self, slot: list):
+        slot[1] -= 1
+        if not slot[1]:
+            self.slots.pop(self.host, None)
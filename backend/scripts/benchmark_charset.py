@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""对比网页编码检测：对整个响应体做统计检测（原 apparent_encoding）与 头部 / <meta> / 样本检测
+
+同时检查超大网页的下载上限：本地服务持续输出不带 Content-Length 的响应体，
+parse_url 应在读到 URL_MAX_BYTES 后立即放弃，耗时和内存与页面大小无关。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_charset.py [--size-mb 4] [--repeats 3]
+"""
+import argparse
+import http.server
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.charset import detect_encoding
+
+PARAGRAPH_ZH = '网页正文提取之后会交给大模型生成摘要，编码识别错误会导致整篇内容变成乱码。'
+PARAGRAPH_EN = 'Charset detection should not need to look at every byte of a multi-megabyte page. '
+
+
+def make_page(size: int, encoding: str, meta: bool) -> bytes:
+    head = f'<meta charset="{encoding}">' if meta else ''
+    paragraph = f'<p>{PARAGRAPH_ZH} {PARAGRAPH_EN}</p>\n'
+    body = paragraph * (size // len(paragraph.encode(encoding)) + 1)
+    return f'<html><head>{head}<title>测试</title></head><body>{body}</body></html>'.encode(encoding)
+
+
+def legacy_encoding(content: bytes) -> str:
+    """requests 的 apparent_encoding：对整个响应体做统计检测"""
+    import charset_normalizer
+
+    return charset_normalizer.detect(content)['encoding'] or 'utf-8'
+
+
+def best_time(func, repeats: int):
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class EndlessPageHandler(http.server.BaseHTTPRequestHandler):
+    """不带 Content-Length、持续输出的页面，模拟超大或恶意网页"""
+
+    protocol_version = 'HTTP/1.0'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        chunk = make_page(64 * 1024, 'utf-8', False)
+        try:
+            for _ in range(100000):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_download_cap():
+    import logging
+    logging.getLogger().setLevel(logging.ERROR)
+    settings.URL_CACHE_BACKEND = 'none'
+
+    from app.services.document_parser import DocumentParser
+    from benchmark_preprocess import current_rss
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), EndlessPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        parser = DocumentParser()
+        rss_before = current_rss()
+        start = time.perf_counter()
+        result = parser.parse_url(f'http://127.0.0.1:{server.server_address[1]}/endless')
+        elapsed = time.perf_counter() - start
+        rss_delta = (current_rss() - rss_before) / 1024 / 1024
+    finally:
+        server.shutdown()
+    print(
+        f"\nendless page, cap {settings.URL_MAX_BYTES // (1024 * 1024)} MB: "
+        f"{'rejected' if result is None else 'ACCEPTED'} after {elapsed * 1000:.0f} ms, RSS +{rss_delta:.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=4, help='测试页面大小（MB）')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    cases = [
+        ('utf-8, charset header', 'utf-8', False, 'text/html; charset=utf-8'),
+        ('utf-8, no declaration', 'utf-8', False, 'text/html'),
+        ('gbk, <meta charset>', 'gbk', True, 'text/html'),
+        ('gbk, no declaration', 'gbk', False, 'text/html'),
+    ]
+    print(f"{'page':<26}{'whole-body ms':>15}{'new ms':>10}{'speedup':>10}  encodings (same text)")
+    for name, encoding, meta, content_type in cases:
+        content = make_page(size, encoding, meta)
+        old_time, old_encoding = best_time(lambda: legacy_encoding(content), args.repeats)
+        new_time, new_encoding = best_time(
+            lambda: detect_encoding(content, content_type, html=True), args.repeats
+        )
+        expected = content.decode(encoding)
+        same = content.decode(new_encoding, errors='replace') == expected
+        print(
+            f"{name:<26}{old_time * 1000:>15.1f}{new_time * 1000:>10.2f}{old_time / new_time:>9.0f}x  "
+            f"{old_encoding} -> {new_encoding} ({'yes' if same else 'NO'})"
+        )
+
+    check_download_cap()
+
+
+if __name__ == '__main__':
+    main()
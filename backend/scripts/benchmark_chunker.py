@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""对比长文本分段：原 Summarizer.split_text（只按“。”切分、按字符计长）与 chunker.iter_chunks
+（中英文句子边界、按 token 计数、相邻分段重叠、逐段产出）
+
+对中文、英文、中英混合和无标点文本，按输入大小逐级翻倍测量耗时，每 MB 耗时应基本不变（线性）；
+同时检查每段是否都在 token 上限内、整段文本按 1MB 块流式输入与一次性输入的分段结果是否一致；
+再把同一段文本切成 1MB / 4KB / 512B 的块输入，耗时应与块大小无关。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_chunker.py [--max-mb 8] [--max-tokens 4000] [--overlap 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.chunker import estimate_tokens, iter_chunks
+
+SENTENCE_ZH = '长文档需要先分段再交给模型总结，每段都不能超过模型的输入上限！分段时尽量不要把一句话拆开？'
+SENTENCE_EN = 'Long documents are split before summarization. Each chunk must fit the model context! Does it keep sentences whole? '
+BLOCK_SIZE = 1024 * 1024
+
+
+def make_text(kind: str, size: int) -> str:
+    if kind == 'zh':
+        unit = SENTENCE_ZH + '\n'
+    elif kind == 'en':
+        unit = SENTENCE_EN + '\n'
+    elif kind == 'mixed':
+        unit = SENTENCE_ZH + SENTENCE_EN + '\n'
+    else:
+        unit = 'no punctuation at all just words and more words '
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def legacy_split_text(text: str, max_length: int = 1000):
+    """原 Summarizer.split_text（去掉 async）"""
+    if len(text) <= max_length:
+        return [text]
+    segments = []
+    sentences = text.split('。')
+    current_segment = []
+    current_length = 0
+    for sentence in sentences:
+        sentence = sentence.strip() + '。'
+        while len(sentence) > max_length:
+            if current_segment:
+                segments.append(''.join(current_segment))
+                current_segment, current_length = [], 0
+            segments.append(sentence[:max_length])
+            sentence = sentence[max_length:]
+        if current_length + len(sentence) <= max_length:
+            current_segment.append(sentence)
+            current_length += len(sentence)
+        else:
+            if current_segment:
+                segments.append(''.join(current_segment))
+            current_segment = [sentence]
+            current_length = len(sentence)
+    if current_segment:
+        segments.append(''.join(current_segment))
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-mb', type=int, default=8, help='最大输入大小（MB），从 1MB 开始逐级翻倍')
+    parser.add_argument('--max-tokens', type=int, default=4000, help='每段 token 上限')
+    parser.add_argument('--overlap', type=int, default=200, help='相邻分段重叠的 token 数')
+    parser.add_argument('--legacy-chars', type=int, default=6000, help='原实现每段的字符上限')
+    args = parser.parse_args()
+
+    sizes = []
+    size = 1
+    while size <= args.max_mb:
+        sizes.append(size)
+        size *= 2
+
+    print(f"{'text':<8}{'MB':>4}{'legacy ms':>11}{'chunks':>8}{'max tok':>9}"
+          f"{'new ms':>9}{'ms/MB':>8}{'chunks':>8}{'max tok':>9}  streamed same")
+    failed = False
+    for kind in ('zh', 'en', 'mixed', 'nopunct'):
+        per_mb = []
+        for mb in sizes:
+            text = make_text(kind, mb * 1024 * 1024)
+
+            start = time.perf_counter()
+            legacy = legacy_split_text(text, args.legacy_chars)
+            legacy_time = time.perf_counter() - start
+            legacy_max = max(estimate_tokens(chunk) for chunk in legacy)
+
+            start = time.perf_counter()
+            chunks = list(iter_chunks(text, args.max_tokens, args.overlap))
+            new_time = time.perf_counter() - start
+            per_mb.append(new_time * 1000 / mb)
+            new_max = max(estimate_tokens(chunk) for chunk in chunks)
+
+            blocks = (text[i:i + BLOCK_SIZE] for i in range(0, len(text), BLOCK_SIZE))
+            same = list(iter_chunks(blocks, args.max_tokens, args.overlap)) == chunks
+            failed = failed or new_max > args.max_tokens or not same
+            print(
+                f"{kind:<8}{mb:>4}{legacy_time * 1000:>11.0f}{len(legacy):>8}{legacy_max:>9}"
+                f"{new_time * 1000:>9.0f}{per_mb[-1]:>8.0f}{len(chunks):>8}{new_max:>9}  "
+                f"{'yes' if same else 'NO'}"
+            )
+        growth = per_mb[-1] / per_mb[0]
+        print(f"{'':<8}ms/MB at {sizes[-1]} MB vs 1 MB: {growth:.2f}x ({'linear' if growth < 1.5 else 'SUPERLINEAR'})")
+        failed = failed or growth >= 1.5
+
+    print(f"\n{'text':<8}{'block':>9}{'ms':>9}{'vs 1MB':>8}  same chunks")
+    for kind in ('zh', 'en', 'nopunct'):
+        text = make_text(kind, 2 * 1024 * 1024)
+        baseline_time, baseline = None, None
+        for block in (BLOCK_SIZE, 4096, 512):
+            blocks = [text[i:i + block] for i in range(0, len(text), block)]
+            start = time.perf_counter()
+            chunks = list(iter_chunks(blocks, args.max_tokens, args.overlap))
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline_time, baseline = elapsed, chunks
+            ratio = elapsed / baseline_time
+            failed = failed or chunks != baseline or ratio >= 2
+            print(f"{kind:<8}{block:>9}{elapsed * 1000:>9.0f}{ratio:>7.2f}x  {'yes' if chunks == baseline else 'NO'}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
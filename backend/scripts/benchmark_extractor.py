@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""对比网页正文提取器（BeautifulSoup / readability）的速度和提取质量
+
+语料目录中每个 <name>.html 对应一个 <name>.txt，内容为人工标注的正文。
+质量按词级别（中文按字、英文按单词）的精确率 / 召回率 / F1 计算；
+速度分别在原始页面和放大后的大页面（页面主体重复 --inflate 次）上测量。
+readability 的平均 F1 低于 BeautifulSoup 时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_extractor.py [--corpus scripts/data/web_pages] [--repeats 20] [--inflate 50]
+"""
+import argparse
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.content_extractor import EXTRACTORS, get_content_extractor
+
+DEFAULT_CORPUS = os.path.join(BACKEND_DIR, 'scripts', 'data', 'web_pages')
+TOKEN_PATTERN = re.compile(r'[一-鿿]|[A-Za-z0-9]+')
+BODY_PATTERN = re.compile(r'(<body[^>]*>)(.*)(</body>)', re.IGNORECASE | re.DOTALL)
+
+
+def score(predicted: str, expected: str):
+    """词级别的精确率、召回率和 F1"""
+    predicted_tokens = Counter(TOKEN_PATTERN.findall(predicted))
+    expected_tokens = Counter(TOKEN_PATTERN.findall(expected))
+    common = sum((predicted_tokens & expected_tokens).values())
+    if not common:
+        return 0.0, 0.0, 0.0
+    precision = common / sum(predicted_tokens.values())
+    recall = common / sum(expected_tokens.values())
+    return precision, recall, 2 * precision * recall / (precision + recall)
+
+
+def inflate(html: str, times: int) -> str:
+    """把页面主体重复多次，模拟大页面"""
+    match = BODY_PATTERN.search(html)
+    if not match:
+        return html * times
+    return html[:match.start(2)] + match.group(2) * times + html[match.end(2):]
+
+
+def time_extract(extractor, html: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        extractor.extract(html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='语料目录（.html + 同名 .txt 标注）')
+    parser.add_argument('--repeats', type=int, default=20, help='每个页面的重复次数（取中位数）')
+    parser.add_argument('--inflate', type=int, default=50, help='大页面测试中页面主体的重复次数，0 表示不测')
+    args = parser.parse_args()
+
+    pages = []
+    for html_path in sorted(glob.glob(os.path.join(args.corpus, '*.html'))):
+        with open(html_path, encoding='utf-8') as f:
+            html = f.read()
+        expected = None
+        txt_path = html_path[:-5] + '.txt'
+        if os.path.exists(txt_path):
+            with open(txt_path, encoding='utf-8') as f:
+                expected = f.read()
+        pages.append((os.path.basename(html_path), html, expected))
+    if not pages:
+        sys.exit(f"No .html pages found in {args.corpus}")
+
+    names = list(EXTRACTORS)
+    extractors = {name: get_content_extractor(name) for name in names}
+    f1_scores = {name: [] for name in names}
+    totals = {name: 0.0 for name in names}
+    large_totals = {name: 0.0 for name in names}
+
+    header = f"{'page':<28}" + ''.join(f"{name + ' P/R/F1':>26}{name + ' ms':>18}" for name in names)
+    print(header)
+    for page_name, html, expected in pages:
+        row = f"{page_name:<28}"
+        for name in names:
+            extractor = extractors[name]
+            elapsed = time_extract(extractor, html, args.repeats)
+            totals[name] += elapsed
+            if expected is not None:
+                precision, recall, f1 = score(extractor.extract(html), expected)
+                f1_scores[name].append(f1)
+                row += f"{precision:>12.2f}{recall:>7.2f}{f1:>7.2f}"
+            else:
+                row += f"{'-':>26}"
+            row += f"{elapsed * 1000:>18.2f}"
+        print(row)
+
+    if args.inflate:
+        for _, html, _ in pages:
+            large = inflate(html, args.inflate)
+            for name in names:
+                large_totals[name] += time_extract(extractors[name], large, max(1, args.repeats // 10))
+
+    print()
+    for name in names:
+        mean_f1 = statistics.mean(f1_scores[name]) if f1_scores[name] else 0.0
+        line = f"{name:<14} mean F1 {mean_f1:.3f}   corpus {totals[name] * 1000:.1f} ms"
+        if args.inflate:
+            line += f"   inflated x{args.inflate} {large_totals[name] * 1000:.1f} ms"
+        print(line)
+
+    baseline, candidate = 'soup', 'readability'
+    if totals[candidate]:
+        print(f"\nspeedup ({candidate} vs {baseline}): corpus {totals[baseline] / totals[candidate]:.1f}x", end='')
+        if args.inflate and large_totals[candidate]:
+            print(f", inflated {large_totals[baseline] / large_totals[candidate]:.1f}x")
+        else:
+            print()
+    if f1_scores[candidate] and statistics.mean(f1_scores[candidate]) < statistics.mean(f1_scores[baseline]):
+        print(f"{candidate} is less accurate than {baseline} on this corpus")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""对比内容过滤的旧实现（逐条 re.sub + MD5 去重 + bleach）与单次扫描的过滤引擎
+
+在不同规模的敏感词表上测量耗时，并校验两者过滤、去重后的文本一致（不含最后的转义步骤）。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_filter.py [--text-kb 512] [--words 4,100,1000,5000]
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.content_filter import DEFAULT_AD_PATTERNS, DEFAULT_SENSITIVE_WORDS, ContentFilter
+
+
+def legacy_filter(text: str, sensitive_words, ad_patterns) -> str:
+    """原 DocumentParser._filter_content 的过滤和去重部分"""
+    for word in sensitive_words:
+        text = re.sub(r'\b' + re.escape(word) + r'\b', '[FILTERED]', text, flags=re.IGNORECASE)
+    for pattern in ad_patterns:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    unique_lines = []
+    seen = set()
+    for line in text.split('\n'):
+        line_hash = hashlib.md5(line.encode()).hexdigest()
+        if line_hash not in seen and line.strip():
+            seen.add(line_hash)
+            unique_lines.append(line)
+    return '\n'.join(unique_lines)
+
+
+def make_words(count: int, rng: random.Random):
+    words = set(DEFAULT_SENSITIVE_WORDS)
+    while len(words) < count:
+        words.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+
+def make_text(size_kb: int, words, rng: random.Random) -> str:
+    """英文单词、中文、敏感词和广告标识混排的多行文本，含重复行"""
+    vocabulary = ['summary', 'document', 'result', 'pipeline', 'worker', '内容', '总结', '网页']
+    lines = []
+    size = 0
+    while size < size_kb * 1024:
+        tokens = [rng.choice(vocabulary) for _ in range(12)]
+        if rng.random() < 0.3:
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(words).upper() if rng.random() < 0.5 else rng.choice(words))
+        if rng.random() < 0.1:
+            tokens.append(rng.choice(['Advertisement', 'sponsored', 'ads-container']))
+        line = ' '.join(tokens) if rng.random() > 0.1 or not lines else rng.choice(lines)
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines)
+
+
+def timed(func, *args, repeats: int = 3):
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--text-kb', type=int, default=512, help='测试文本大小（KB）')
+    parser.add_argument('--words', default='4,100,1000,5000', help='敏感词表规模，逗号分隔')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    try:
+        import bleach
+    except ImportError:
+        bleach = None
+        print("bleach is not installed, legacy timings exclude bleach.clean")
+
+    print(f"{'words':>8}{'legacy ms':>14}{'engine ms':>14}{'compile ms':>14}{'speedup':>10}  same output")
+    for count in [int(n) for n in args.words.split(',')]:
+        words = make_words(count, rng)
+        text = make_text(args.text_kb, words, rng)
+
+        legacy_time, legacy_result = timed(legacy_filter, text, words, DEFAULT_AD_PATTERNS, repeats=1 if count > 1000 else 3)
+        if bleach:
+            bleach_time, _ = timed(bleach.clean, legacy_result, repeats=1)
+            legacy_time += bleach_time
+
+        start = time.perf_counter()
+        content_filter = ContentFilter(words, DEFAULT_AD_PATTERNS)
+        compile_time = time.perf_counter() - start
+        engine_time, engine_result = timed(lambda t: content_filter.remove_duplicates(content_filter.filter(t)), text)
+
+        same = 'yes' if engine_result == legacy_result else 'NO'
+        print(
+            f"{count:>8}{legacy_time * 1000:>14.1f}{engine_time * 1000:>14.1f}{compile_time * 1000:>14.1f}"
+            f"{legacy_time / engine_time:>9.1f}x  {same}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""测试模型客户端的并发吞吐量
+
+启动本地模拟接口（scripts/llm_stub_server.py），在同一进程的常驻事件循环中
+同时发起多个总结请求，统计吞吐量和延迟。不需要网络和 API Key。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_llm_client.py [--requests 100] [--concurrency 20] [--latency 0.5]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+
+from app.config import settings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_server(port: int, latency: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'scripts', 'llm_stub_server.py'),
+         '--port', str(port), '--latency', str(latency)],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/stats', timeout=1.0)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("LLM stub server did not start")
+
+
+async def run_requests(service, total: int):
+    async def one(i: int) -> float:
+        start = time.perf_counter()
+        await service.summarize(f"第 {i} 篇测试文档。" * 50)
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*[one(i) for i in range(total)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='请求总数')
+    parser.add_argument('--concurrency', type=int, default=20, help='连接池大小和最大并发请求数')
+    parser.add_argument('--latency', type=float, default=0.5, help='模拟接口的单次延迟（秒）')
+    args = parser.parse_args()
+
+    port = free_port()
+    settings.ALI_API_BASE_URL = f'http://127.0.0.1:{port}/api/v1'
+    settings.ALI_API_KEY = settings.ALI_API_KEY or 'stub'
+    settings.LLM_MAX_CONNECTIONS = args.concurrency
+    settings.SUMMARY_MAP_CONCURRENCY = args.concurrency
+    settings.SUMMARY_CACHE_BACKEND = 'none'
+
+    from app.core.async_runner import run_async
+    from app.services.ali_summary_service import AliSummaryService
+
+    server = start_stub_server(port, args.latency)
+    try:
+        service = AliSummaryService()
+        start = time.perf_counter()
+        latencies = run_async(run_requests(service, args.requests))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(latencies)
+    print(f"requests:     {args.requests}")
+    print(f"elapsed:      {elapsed:.2f} s (serial would take ~{args.requests * args.latency:.1f} s)")
+    print(f"throughput:   {args.requests / elapsed:.1f} req/s")
+    print(f"latency p50:  {statistics.median(latencies) * 1000:.0f} ms")
+    print(f"latency p95:  {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""对比 OCR 图像预处理新旧实现的单页耗时和内存占用
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_preprocess.py [--pages 5] [--binarize] [--deskew]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance
+
+from app.services.document_parser import DocumentParser
+
+
+def make_page(seed: int = 0) -> Image.Image:
+    """生成一页 300 DPI 的 A4 扫描件样式图片（RGB，低对比度，带噪声）"""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (2480, 3508), (200, 200, 200))
+    draw = ImageDraw.Draw(image)
+    for y in range(200, 3300, 60):
+        x = 200
+        while x < 2200:
+            width = int(rng.integers(40, 200))
+            draw.rectangle([x, y, x + width, y + 30], fill=(90, 90, 90))
+            x += width + 30
+    noise = rng.integers(-20, 20, size=(3508, 2480, 1), dtype=np.int16)
+    array = np.clip(np.asarray(image, dtype=np.int16) + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(array)
+
+
+def legacy_pipeline(image: Image.Image) -> Image.Image:
+    """原实现：numpy/PIL 往返转换 + 两次 ImageEnhance，再由调用方 fromarray"""
+    img_array = np.array(image)
+    img = Image.fromarray(img_array)
+    img = ImageEnhance.Contrast(img).enhance(1.5)
+    img = ImageEnhance.Sharpness(img).enhance(1.5)
+    return Image.fromarray(np.array(img))
+
+
+def vectorized_pipeline(image: Image.Image, binarize: bool = False, deskew: bool = False) -> Image.Image:
+    """新实现：单缓冲区就地处理"""
+    return Image.fromarray(DocumentParser._preprocess_image(image, binarize=binarize, deskew=deskew))
+
+
+def current_rss() -> int:
+    """当前进程常驻内存（字节，仅 Linux）"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class RssSampler(threading.Thread):
+    """后台线程定期采样常驻内存，记录运行期间的峰值"""
+
+    def __init__(self, interval: float = 0.001):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, current_rss())
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, current_rss())
+
+
+def _peak_rss_worker(page_path: str, name: str, binarize: bool, deskew: bool, queue):
+    """在独立进程中运行一次预处理，测量相对基线的内存峰值增量（含 PIL 缓冲区）"""
+    image = Image.open(page_path)
+    image.load()
+    baseline = current_rss()
+    sampler = RssSampler()
+    sampler.start()
+    tracemalloc.start()
+    if name == 'legacy':
+        legacy_pipeline(image)
+    else:
+        vectorized_pipeline(image, binarize, deskew)
+    _, numpy_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak = sampler.stop()
+    queue.put(((peak - baseline) / (1024 * 1024), numpy_peak / (1024 * 1024)))
+
+
+def measure_memory(page_path: str, name: str, binarize: bool, deskew: bool):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_peak_rss_worker, args=(page_path, name, binarize, deskew, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def measure_time(func, pages, **kwargs):
+    timings = []
+    for page in pages:
+        start = time.perf_counter()
+        func(page, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=5, help='测试页数')
+    parser.add_argument('--binarize', action='store_true', help='新实现启用二值化')
+    parser.add_argument('--deskew', action='store_true', help='新实现启用纠偏')
+    args = parser.parse_args()
+
+    print(f"Generating {args.pages} synthetic A4 pages at 300 DPI...")
+    pages = [make_page(i) for i in range(args.pages)]
+    page_mb = pages[0].width * pages[0].height * 3 / (1024 * 1024)
+    print(f"Page size: {pages[0].size}, RGB buffer {page_mb:.1f} MB")
+
+    cases = [
+        ('legacy', legacy_pipeline, {}),
+        ('vectorized', vectorized_pipeline, {'binarize': args.binarize, 'deskew': args.deskew}),
+    ]
+    # 内存在独立进程中测量，页面先写入文件，避免生成页面时的内存峰值干扰结果
+    page_path = os.path.join(tempfile.mkdtemp(), 'page.png')
+    pages[0].save(page_path)
+
+    print(f"{'pipeline':<12}{'median ms':>12}{'max ms':>10}{'peak RSS +MB':>15}{'numpy peak MB':>16}")
+    for name, func, kwargs in cases:
+        timings = measure_time(func, pages, **kwargs)
+        rss_mb, numpy_mb = measure_memory(page_path, name, args.binarize, args.deskew)
+        print(
+            f"{name:<12}{statistics.median(timings) * 1000:>12.1f}{max(timings) * 1000:>10.1f}"
+            f"{rss_mb:>15.1f}{numpy_mb:>16.1f}"
+        )
+    os.remove(page_path)
+    os.rmdir(os.path.dirname(page_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""解析器与端到端流水线的基准测试
+
+用固定随机种子生成合成语料（文本 PDF、扫描 PDF、带表格的 DOCX、UTF-8 / GBK TXT、
+大 HTML 页面），分别测量各解析器和内容过滤的吞吐量、延迟分位数和内存峰值；
+再以 eager 模式运行 Celery 任务、以本地模拟接口代替大模型，测量完整流水线各阶段的耗时。
+结果连同运行环境保存为 JSON，可用 --compare 与之前的结果对比。
+
+扫描 PDF 需要本机安装 tesseract，未安装时跳过。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_suite.py [--scale 1] [--repeats 3] [--only parsers,pipeline]
+    python scripts/benchmark_suite.py --compare benchmark_results/<旧结果>.json
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import docx
+import fitz
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import settings
+from benchmark_llm_client import free_port, start_stub_server
+from benchmark_preprocess import RssSampler, current_rss
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmark_results')
+RESULT_FORMAT_VERSION = 1
+
+CORPUS_KINDS = ['text_pdf', 'scanned_pdf', 'docx', 'txt_utf8', 'txt_gbk', 'html']
+
+EN_WORDS = (
+    "summary document parser pipeline latency throughput worker queue cache result "
+    "page text table paragraph section report analysis revenue growth market customer"
+).split()
+ZH_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质导"
+PARAGRAPHS_PER_PAGE = 6
+
+
+def zh_sentence(rng: random.Random) -> str:
+    return ''.join(rng.choice(ZH_CHARS) for _ in range(rng.randint(15, 40))) + '。'
+
+
+def en_sentence(rng: random.Random) -> str:
+    words = [rng.choice(EN_WORDS) for _ in range(rng.randint(8, 20))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng: random.Random, zh: bool = True) -> str:
+    if zh:
+        return ''.join(zh_sentence(rng) for _ in range(rng.randint(3, 6)))
+    return ' '.join(en_sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+# ---------------------------------------------------------------- 语料生成
+
+def make_text_pdf(path: str, rng: random.Random, pages: int):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        text = '\n\n'.join(paragraph(rng, zh=False) for _ in range(PARAGRAPHS_PER_PAGE))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 790), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def make_scanned_pdf(path: str, rng: random.Random, pages: int):
+    """每页是一张 150 DPI 的文本图片，没有文本层"""
+    try:
+        font = ImageFont.load_default(size=20)
+    except TypeError:
+        font = ImageFont.load_default()
+    doc = fitz.open()
+    for _ in range(pages):
+        image = Image.new('L', (1240, 1754), 255)
+        draw = ImageDraw.Draw(image)
+        for row in range(45):
+            draw.text((80, 80 + row * 36), en_sentence(rng)[:90], fill=0, font=font)
+        with tempfile.NamedTemporaryFile(suffix='.png') as tmp:
+            image.save(tmp.name)
+            page = doc.new_page()
+            page.insert_image(page.rect, filename=tmp.name)
+    doc.save(path)
+    doc.close()
+
+
+def make_docx(path: str, rng: random.Random, pages: int):
+    document = docx.Document()
+    for _ in range(pages):
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            document.add_paragraph(paragraph(rng))
+        table = document.add_table(rows=10, cols=5)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = ''.join(rng.choice(ZH_CHARS) for _ in range(rng.randint(2, 8)))
+    document.save(path)
+
+
+def make_txt(path: str, rng: random.Random, pages: int, encoding: str):
+    text = '\n\n'.join(paragraph(rng) for _ in range(pages * PARAGRAPHS_PER_PAGE))
+    with open(path, 'w', encoding=encoding) as f:
+        f.write(text)
+
+
+def make_html(path: str, rng: random.Random, pages: int):
+    """带导航、广告、脚本和大量正文的页面"""
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Benchmark Page</title>',
+        '<style>body { font-family: sans-serif; }</style><script>var x = 1;</script></head><body>',
+        '<header><nav>' + ''.join(f'<a href="/n{i}">导航{i}</a>' for i in range(50)) + '</nav></header>',
+        '<div class="ads-container">advertisement sponsored promotion</div>',
+        '<main><article>',
+    ]
+    for i in range(pages * PARAGRAPHS_PER_PAGE):
+        if i % 10 == 0:
+            parts.append(f'<h2>{zh_sentence(rng)}</h2>')
+        parts.append(f'<p>{paragraph(rng)}</p>')
+        if i % 25 == 0:
+            parts.append('<aside class="banner-ads">sponsored content</aside>')
+    parts.append('</article></main>')
+    parts.append('<footer>' + ''.join(f'<p>页脚链接 {i}</p>' for i in range(30)) + '</footer></body></html>')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+
+
+def generate_corpus(corpus_dir: str, files_per_kind: int, scale: int, seed: int) -> dict:
+    """生成语料，返回 {类型: [文件路径]}；相同参数生成的语料完全相同"""
+    generators = {
+        'text_pdf': ('pdf', lambda p, r: make_text_pdf(p, r, 20 * scale)),
+        'scanned_pdf': ('pdf', lambda p, r: make_scanned_pdf(p, r, 2 * scale)),
+        'docx': ('docx', lambda p, r: make_docx(p, r, 10 * scale)),
+        'txt_utf8': ('txt', lambda p, r: make_txt(p, r, 50 * scale, 'utf-8')),
+        'txt_gbk': ('txt', lambda p, r: make_txt(p, r, 50 * scale, 'gbk')),
+        'html': ('html', lambda p, r: make_html(p, r, 50 * scale)),
+    }
+    corpus = {}
+    for kind, (extension, generate) in generators.items():
+        corpus[kind] = []
+        for i in range(files_per_kind):
+            path = os.path.join(corpus_dir, f'{kind}_{i}.{extension}')
+            generate(path, random.Random(f'{seed}-{kind}-{i}'))
+            corpus[kind].append(path)
+    return corpus
+
+
+# ---------------------------------------------------------------- 统计
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def latency_stats(timings) -> dict:
+    values = sorted(timings)
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.mean(values) * 1000, 2) if values else 0.0,
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def measure(func, inputs, repeats: int, sizes) -> dict:
+    """对每个输入重复调用 func，统计延迟、吞吐量和运行期间的内存峰值增量"""
+    func(inputs[0])  # 预热：导入、连接池、缓存的字体等
+    timings = []
+    rss_start = current_rss()
+    sampler = RssSampler(interval=0.005)
+    sampler.start()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for item in inputs:
+            item_start = time.perf_counter()
+            func(item)
+            timings.append(time.perf_counter() - item_start)
+    elapsed = time.perf_counter() - start
+    peak = sampler.stop()
+    total_bytes = sum(sizes) * repeats
+    return {
+        **latency_stats(timings),
+        'throughput_per_s': round(len(timings) / elapsed, 2),
+        'throughput_mb_s': round(total_bytes / elapsed / 1024 / 1024, 2),
+        'peak_rss_delta_mb': round((peak - rss_start) / 1024 / 1024, 1),
+    }
+
+
+# ---------------------------------------------------------------- 解析器
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: str):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_parsers(corpus: dict, corpus_dir: str, repeats: int) -> dict:
+    from app.services.document_parser import DocumentParser
+
+    parser = DocumentParser()
+    results = {}
+    for kind in CORPUS_KINDS:
+        paths = corpus[kind]
+        if kind == 'scanned_pdf' and not shutil.which('tesseract'):
+            results[kind] = {'skipped': 'tesseract is not installed'}
+            continue
+        print(f"  parser {kind} ({len(paths)} files x {repeats})", flush=True)
+        sizes = [os.path.getsize(p) for p in paths]
+        if kind == 'html':
+            # 经本地 HTTP 服务走完整的 parse_url 流程（下载、正文提取、过滤）
+            server = serve_directory(corpus_dir)
+            base = f'http://127.0.0.1:{server.server_address[1]}/'
+            try:
+                urls = [base + os.path.basename(p) for p in paths]
+                results[kind] = measure(parser.parse_url, urls, repeats, sizes)
+            finally:
+                server.shutdown()
+        else:
+            # 绕过解析结果缓存，只测解析本身
+            results[kind] = measure(parser._parse_file, paths, repeats, sizes)
+    return results
+
+
+def bench_filter(corpus: dict, repeats: int) -> dict:
+    """内容过滤单独计时，输入为 UTF-8 文本语料"""
+    from app.services.document_parser import DocumentParser
+
+    parser = DocumentParser()
+    texts = []
+    for path in corpus['txt_utf8']:
+        with open(path, encoding='utf-8') as f:
+            texts.append(f.read())
+    print(f"  filter ({len(texts)} texts x {repeats})", flush=True)
+    return {'filter_content': measure(parser._filter_content, texts, repeats, [len(t.encode()) for t in texts])}
+
+
+# ---------------------------------------------------------------- 端到端流水线
+
+class StageTimer:
+    """记录各阶段每次调用的耗时"""
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage: str, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return wrapper
+
+    def wrap_async(self, stage: str, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return wrapper
+
+
+def bench_pipeline(corpus: dict, corpus_dir: str, repeats: int, latency: float) -> dict:
+    """eager 模式运行 process_and_summarize，大模型请求发往本地模拟接口；HTML 语料以 URL 任务提交"""
+    port = free_port()
+    settings.USE_LLM = True
+    settings.ALI_API_BASE_URL = f'http://127.0.0.1:{port}/api/v1'
+    settings.ALI_API_KEY = settings.ALI_API_KEY or 'stub'
+
+    from app.celery_app import celery_app
+    from app.core import tasks
+
+    celery_app.conf.update(task_always_eager=True, result_backend='cache+memory://')
+    timer = StageTimer()
+    parser = tasks.get_document_parser()
+    parser.parse_file = timer.wrap('parse', parser.parse_file)
+    service = tasks.get_summary_service()
+    parser.parse_url = timer.wrap('fetch', parser.parse_url)
+    service.summarize = timer.wrap_async('summarize', service.summarize)
+
+    upload_dir = tempfile.mkdtemp(prefix='bench_uploads_')
+    kinds = [k for k in CORPUS_KINDS if k != 'scanned_pdf' or shutil.which('tesseract')]
+    html_server = serve_directory(corpus_dir)
+    html_base = f'http://127.0.0.1:{html_server.server_address[1]}/'
+    server = start_stub_server(port, latency)
+    results = {'stub_latency_s': latency, 'kinds': {}}
+    try:
+        for kind in kinds:
+            print(f"  pipeline {kind} ({len(corpus[kind])} files x {repeats})", flush=True)
+            timer.timings.clear()
+            totals = []
+            rss_start = current_rss()
+            sampler = RssSampler(interval=0.005)
+            sampler.start()
+            for r in range(repeats):
+                for i, source in enumerate(corpus[kind]):
+                    job = dict(task_id=f'bench-{kind}-{r}-{i}', file_paths=[], text=None, url=None)
+                    if kind == 'html':
+                        job['url'] = html_base + os.path.basename(source)
+                    else:
+                        # 任务结束时会删除上传文件，每次复制一份
+                        upload = os.path.join(upload_dir, f'{r}_{os.path.basename(source)}')
+                        shutil.copyfile(source, upload)
+                        job['file_paths'] = [upload]
+                    start = time.perf_counter()
+                    result = tasks.process_and_summarize.apply(kwargs=job).get()
+                    totals.append(time.perf_counter() - start)
+                    if result.get('status') not in ('success', 'processing'):
+                        raise RuntimeError(f"Pipeline failed for {source}: {result}")
+            peak = sampler.stop()
+            results['kinds'][kind] = {
+                'total': latency_stats(totals),
+                **{stage: latency_stats(values) for stage, values in timer.timings.items()},
+                'peak_rss_delta_mb': round((peak - rss_start) / 1024 / 1024, 1),
+            }
+    finally:
+        server.terminate()
+        server.wait()
+        html_server.shutdown()
+        shutil.rmtree(upload_dir, ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------- 结果
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ''
+
+
+def environment(args) -> dict:
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+        'settings': {
+            name: getattr(settings, name)
+            for name in ['OCR_WORKERS', 'OCR_BACKEND', 'PDF_RENDER_WINDOW', 'SUMMARY_CHUNK_TOKENS', 'SUMMARY_CHUNK_OVERLAP_TOKENS', 'SUMMARY_MAP_CONCURRENCY']
+        },
+    }
+
+
+def flatten(data: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in data.items():
+        name = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict):
+    """逐项对比两次结果中的延迟、吞吐量和内存指标"""
+    old, new = flatten(baseline['results']), flatten(current['results'])
+    print(f"\ncompare with {baseline['environment'].get('commit')} ({baseline['environment'].get('timestamp')})")
+    print(f"{'metric':<55}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(old.keys() & new.keys()):
+        if not name.endswith(('_ms', '_per_s', '_mb_s', '_mb')):
+            continue
+        before, after = old[name], new[name]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+        print(f"{name:<55}{before:>12.2f}{after:>12.2f}{change:>10}")
+
+
+def print_results(results: dict):
+    for section, data in results.items():
+        print(f"\n[{section}]")
+        for name, value in flatten(data).items():
+            if name.endswith(('p50_ms', 'p95_ms', 'throughput_per_s', 'throughput_mb_s', 'peak_rss_delta_mb')):
+                print(f"  {name:<50}{value:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1, help='语料规模倍数（影响每个文件的页数）')
+    parser.add_argument('--files', type=int, default=3, help='每种语料的文件数')
+    parser.add_argument('--repeats', type=int, default=3, help='每个文件的重复次数')
+    parser.add_argument('--seed', type=int, default=42, help='语料随机种子')
+    parser.add_argument('--latency', type=float, default=0.2, help='模拟大模型接口的单次延迟（秒）')
+    parser.add_argument('--only', default='parsers,filter,pipeline', help='要运行的部分，逗号分隔')
+    parser.add_argument('--corpus-dir', help='语料目录（默认使用临时目录，运行结束后删除）')
+    parser.add_argument('--output', help='结果文件路径（默认 benchmark_results/<时间>_<提交>.json）')
+    parser.add_argument('--compare', help='与之前保存的结果文件对比')
+    args = parser.parse_args()
+
+    # 基准测试不读写结果缓存，日志只保留警告
+    settings.EXTRACTION_CACHE_BACKEND = 'none'
+    settings.SUMMARY_CACHE_BACKEND = 'none'
+    settings.URL_CACHE_BACKEND = 'none'
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ['app', 'app.core.tasks', 'celery', 'celery.task', 'httpx']:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    sections = set(args.only.split(','))
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='bench_corpus_')
+    os.makedirs(corpus_dir, exist_ok=True)
+    try:
+        print(f"generating corpus in {corpus_dir}", flush=True)
+        corpus = generate_corpus(corpus_dir, args.files, args.scale, args.seed)
+        results = {}
+        if 'parsers' in sections:
+            results['parsers'] = bench_parsers(corpus, corpus_dir, args.repeats)
+        if 'filter' in sections:
+            results['filter'] = bench_filter(corpus, args.repeats)
+        if 'pipeline' in sections:
+            results['pipeline'] = bench_pipeline(corpus, corpus_dir, args.repeats, args.latency)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report = {'format_version': RESULT_FORMAT_VERSION, 'environment': environment(args), 'results': results}
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['environment']['commit'] or 'unknown'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_results(results)
+    print(f"\nresults saved to {output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""对比大 TXT 文件的读取方式：原实现（整文件按 UTF-8 读，失败后整文件按 GBK 重读）、
+按样本检测编码后逐块解码再合并（_parse_txt）、只逐块消费不合并（iter_txt）
+
+每种方式在独立进程中运行，记录耗时和常驻内存峰值增量，并校验读出的文本与原实现一致。
+测试文件包括开头一大段纯 ASCII、后面才出现中文的 GBK 文件，用于确认按多段样本检测编码。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_txt_reader.py [--size-mb 100] [--keep]
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+LINE_ZH = '第{}行：超大的日志和小说文件需要逐块读取，避免整文件解码两次。\r\n'
+LINE_EN = 'line {}: plain ASCII log output that says nothing about the encoding\r\n'
+
+
+def write_file(path: str, size: int, encoding: str, ascii_prefix: int = 0):
+    written = 0
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        i = 0
+        while written < ascii_prefix:
+            line = LINE_EN.format(i)
+            f.write(line)
+            written += len(line)
+            i += 1
+        while written < size:
+            line = LINE_ZH.format(i)
+            f.write(line)
+            written += len(line.encode(encoding))
+            i += 1
+
+
+def legacy_parse_txt(file_path: str) -> str:
+    """原 DocumentParser._parse_txt"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except UnicodeDecodeError:
+        with open(file_path, 'r', encoding='gbk') as file:
+            return file.read()
+
+
+def _worker(mode: str, file_path: str, queue):
+    from benchmark_preprocess import RssSampler, current_rss
+    from app.services.text_reader import detect_file_encoding, iter_text_file
+
+    baseline = current_rss()
+    sampler = RssSampler(interval=0.005)
+    sampler.start()
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    if mode == 'legacy':
+        digest.update(legacy_parse_txt(file_path).encode('utf-8'))
+    elif mode == 'join':
+        digest.update(''.join(iter_text_file(file_path, detect_file_encoding(file_path))).encode('utf-8'))
+    else:
+        for chunk in iter_text_file(file_path, detect_file_encoding(file_path)):
+            digest.update(chunk.encode('utf-8'))
+    elapsed = time.perf_counter() - start
+    peak = sampler.stop()
+    queue.put((elapsed, (peak - baseline) / (1024 * 1024), digest.hexdigest()))
+
+
+def run(mode: str, file_path: str):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_worker, args=(mode, file_path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=100, help='测试文件大小（MB）')
+    parser.add_argument('--keep', action='store_true', help='保留生成的测试文件')
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    directory = tempfile.mkdtemp(prefix='txt_bench_')
+    cases = [
+        ('utf-8', 'utf-8', 0),
+        ('gbk', 'gbk', 0),
+        ('gbk, 1MB ascii first', 'gbk', 1024 * 1024),
+    ]
+    try:
+        print(f"{'file':<24}{'mode':<10}{'seconds':>10}{'peak RSS MB':>14}  same text")
+        for name, encoding, ascii_prefix in cases:
+            path = os.path.join(directory, f"{name.split(',')[0]}_{ascii_prefix}.txt")
+            write_file(path, size, encoding, ascii_prefix)
+            legacy_digest = None
+            for mode in ('legacy', 'join', 'stream'):
+                elapsed, peak, digest = run(mode, path)
+                legacy_digest = legacy_digest or digest
+                print(f"{name:<24}{mode:<10}{elapsed:>10.2f}{peak:>14.1f}  {'yes' if digest == legacy_digest else 'NO'}")
+    finally:
+        if args.keep:
+            print(f"files kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
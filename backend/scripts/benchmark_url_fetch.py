@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""对比逐个抓取（parse_url 循环）和并发抓取（parse_urls）多个网页的耗时
+
+本地 HTTP 服务按请求参数延迟返回页面，并记录同时处理的最大请求数，用于确认单主机并发限制生效。
+并发抓取的总耗时应接近最慢的一个页面，而不是所有页面之和。
+
+用法（在 backend 目录下）：
+    python scripts/benchmark_url_fetch.py [--urls 10] [--delay-ms 200-800] [--per-host 2,10]
+"""
+import argparse
+import http.server
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+
+
+class DelayedPageHandler(http.server.BaseHTTPRequestHandler):
+    """按 ?delay=<ms> 延迟后返回一个简单页面，页面正文包含请求路径"""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            query = parse_qs(urlparse(self.path).query)
+            time.sleep(int(query.get('delay', ['0'])[0]) / 1000)
+            path = urlparse(self.path).path
+            paragraph = f"This is the article body of {path}, written for the fetch benchmark. " * 5
+            body = f"<html><body><article><h1>{path}</h1><p>{paragraph}</p></article></body></html>".encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PageServer(http.server.ThreadingHTTPServer):
+    # 默认的 listen backlog 只有 5，并发连接多时会被丢弃并等待 SYN 重传
+    request_queue_size = 128
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=10, help='每个任务的 URL 数')
+    parser.add_argument('--delay-ms', default='200-800', help='每个页面的响应延迟范围（毫秒）')
+    parser.add_argument('--per-host', default='2,10', help='要测试的单主机并发上限，逗号分隔')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    # 不使用网页缓存，每次都真正抓取
+    settings.URL_CACHE_BACKEND = 'none'
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from app.services.document_parser import DocumentParser
+
+    server = PageServer(('127.0.0.1', 0), DelayedPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    rng = random.Random(args.seed)
+    low, high = (int(v) for v in args.delay_ms.split('-'))
+    delays = [rng.randint(low, high) for _ in range(args.urls)]
+    urls = [f"{base}/page/{i}?delay={delay}" for i, delay in enumerate(delays)]
+    print(f"{len(urls)} URLs, slowest {max(delays)} ms, sum {sum(delays)} ms")
+
+    try:
+        document_parser = DocumentParser()
+        start = time.perf_counter()
+        sequential = [document_parser.parse_url(url) for url in urls]
+        print(f"{'sequential parse_url':<28}{(time.perf_counter() - start) * 1000:>10.0f} ms   peak concurrency {DelayedPageHandler.peak}")
+
+        for per_host in [int(v) for v in args.per_host.split(',')]:
+            settings.URL_FETCH_PER_HOST = per_host
+            document_parser = DocumentParser()
+            DelayedPageHandler.peak = 0
+            start = time.perf_counter()
+            concurrent = document_parser.parse_urls(urls)
+            elapsed = time.perf_counter() - start
+            in_order = concurrent == sequential and all(f"/page/{i}" in c for i, c in enumerate(concurrent))
+            print(
+                f"{f'parse_urls (per host {per_host})':<28}{elapsed * 1000:>10.0f} ms   "
+                f"peak concurrency {DelayedPageHandler.peak}   same results in order: {'yes' if in_order else 'NO'}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""检查 HTTP 客户端的连接池上限确实生效
+
+httpx.AsyncClient 显式传入 transport 时会忽略 limits 参数，连接池退回默认的 100 个连接。
+对模型客户端（DashScopeClient）和网页抓取客户端（AsyncURLFetcher），
+启动一个本地 HTTP 服务（每个请求延迟返回并统计同时打开的连接数），用较小的连接上限
+同时发起多倍的请求：连接池的配置和服务端看到的最大并发连接数都不能超过上限，
+否则以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_connection_pools.py [--max-connections 3] [--requests 12]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_client import DashScopeClient
+from app.services.url_fetcher import AsyncURLFetcher
+
+REPLY = json.dumps({
+    'output': {'choices': [{'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': 'ok'}}]},
+}).encode('utf-8')
+
+
+class CountingServer:
+    """保持连接（keep-alive）的最小 HTTP 服务，记录同时打开的最大连接数"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.open = 0
+        self.peak = 0
+
+    async def handle(self, reader, writer):
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n'):
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(self.latency)
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    + f'Content-Length: {len(REPLY)}\r\n\r\n'.encode() + REPLY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.open -= 1
+            writer.close()
+
+
+def pool_limits(client) -> tuple:
+    pool = client._client._transport._pool
+    return pool._max_connections, pool._max_keepalive_connections
+
+
+async def check_llm_client(base_url: str, server: CountingServer, max_connections: int, requests: int) -> bool:
+    client = DashScopeClient(api_key='stub', base_url=base_url, max_connections=max_connections)
+    server.peak = 0
+    try:
+        limits = pool_limits(client)
+        await asyncio.gather(*(
+            client.generate('stub', [{'role': 'user', 'content': 'hi'}], 10, 0.3) for _ in range(requests)
+        ))
+    finally:
+        await client.aclose()
+    ok = limits == (max_connections, max_connections) and server.peak <= max_connections
+    print(f"DashScopeClient: pool {limits}, peak connections {server.peak}: {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+async def check_url_fetcher(base_url: str, server: CountingServer, max_connections: int, requests: int) -> bool:
+    # 每主机名额不小于总请求数，只让全局连接池起限制作用
+    fetcher = AsyncURLFetcher(max_connections=max_connections, per_host=requests)
+    # 绕过全局信号量，只检查连接池本身的上限
+    fetcher._global_slots = asyncio.Semaphore(requests)
+    server.peak = 0
+    try:
+        limits = pool_limits(fetcher)
+        pages = await fetcher.fetch_all([(f'{base_url}/page/{i}', None) for i in range(requests)])
+    finally:
+        await fetcher.aclose()
+    errors = [page for page in pages if isinstance(page, Exception)]
+    ok = not errors and limits == (max_connections, max_connections) and server.peak <= max_connections
+    print(f"AsyncURLFetcher: pool {limits}, peak connections {server.peak}, errors {len(errors)}: "
+          f"{'OK' if ok else 'FAIL'}")
+    return ok
+
+
+async def run(max_connections: int, requests: int) -> bool:
+    server = CountingServer(latency=0.2)
+    listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        llm_ok = await check_llm_client(base_url, server, max_connections, requests)
+        fetcher_ok = await check_url_fetcher(base_url, server, max_connections, requests)
+        return llm_ok and fetcher_ok
+    finally:
+        listener.close()
+        await listener.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-connections', type=int, default=3, help='连接池上限')
+    parser.add_argument('--requests', type=int, default=12, help='同时发起的请求数')
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.max_connections, args.requests))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""检查正文提取器不会把包住整篇正文的外层容器当作侧栏、广告删掉
+
+每个用例把同一篇文章放进 class / id 不同的外层容器（如 container has-sidebar、threads、
+downloads、site-header-wrap），旁边再放一个真正的侧栏。readability 提取结果对正文的召回率
+低于 --min-recall，或混入了侧栏内容时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_content_extractor.py [--min-recall 0.9]
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+from app.services.content_extractor import get_content_extractor
+from benchmark_extractor import score
+
+PARAGRAPHS = [
+    '城市更新不只是拆旧建新，更重要的是保留街区原有的生活方式，让老居民和新业态能够共存。',
+    '调研发现，多数居民最关心的是停车、养老和菜市场，而不是外立面是否统一，规划应当先回应这些需求。',
+    '在试点街道，改造方案经过三轮公示，居民提出的两百多条意见中有一半以上被采纳，施工期间投诉明显减少。',
+    'The pilot also tracked small businesses along the street. Most of them stayed open during construction, '
+    'and foot traffic recovered within three months after the work was finished.',
+    '专家建议，后续项目应当建立长期的回访机制，把居民满意度纳入考核，而不是以完工作为终点。',
+]
+SIDEBAR = '热门推荐 点击排行 广告合作 联系我们 关注公众号'
+
+# (用例名, 外层容器的属性)
+WRAPPERS = [
+    ('class="container has-sidebar"', 'class="container has-sidebar"'),
+    ('class="threads"', 'class="threads"'),
+    ('id="downloads"', 'id="downloads"'),
+    ('class="site-header-wrap"', 'class="site-header-wrap"'),
+    ('class="comments-wrap" + <article>', 'class="comments-wrap"'),
+]
+
+
+def make_page(attributes: str, use_article: bool) -> str:
+    body = ''.join(f'<p>{text}</p>' for text in PARAGRAPHS)
+    if use_article:
+        body = f'<article>{body}</article>'
+    sidebar = ''.join(f'<li><a href="/{i}">{word}</a></li>' for i, word in enumerate(SIDEBAR.split()))
+    return (
+        '<html><head><title>城市更新</title></head><body>'
+        f'<div {attributes}><h1>城市更新的下一步</h1>{body}'
+        f'<div class="sidebar"><ul>{sidebar}</ul></div></div>'
+        '</body></html>'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--min-recall', type=float, default=0.9, help='正文召回率下限')
+    args = parser.parse_args()
+
+    extractor = get_content_extractor('readability')
+    expected = '\n'.join(PARAGRAPHS)
+    failed = False
+    print(f"{'wrapper':<38}{'chars':>7}{'recall':>8}  sidebar  status")
+    for name, attributes in WRAPPERS:
+        text = extractor.extract(make_page(attributes, use_article='article' in name))
+        _, recall, _ = score(text, expected)
+        leaked = SIDEBAR.split()[0] in text
+        ok = recall >= args.min_recall and not leaked
+        failed = failed or not ok
+        print(f"{name:<38}{len(text):>7}{recall:>8.2f}  {'yes' if leaked else 'no':<7}  {'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""检查多文件任务的进度按任务汇总，而不是在各文件之间跳动
+
+多文件任务的各解析子任务并行运行，进度都写到同一个父任务 ID 下。这里用内存结果后端模拟
+两个子任务交替上报页数：每次上报后从结果后端读到的进度都应包含全部文件（files_total 不被覆盖），
+总页数、已完成文件数与各文件上报的一致，未完成时有剩余时间估计，全部完成后阶段为 parsed；
+最后在 eager 模式下提交一个包含两个文件的任务，检查各文件内容都进入了结果。
+任一检查不通过时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_file_progress.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.core.progress import FileProgressReporter, ProgressReporter, init_file_progress
+
+FILES = ['first.pdf', 'second.pdf']
+
+
+def read_progress(task_id: str) -> dict:
+    return celery_app.backend.get_task_meta(task_id)['result']
+
+
+def check_interleaved() -> bool:
+    task_id = str(uuid.uuid4())
+    backend = celery_app.backend
+    parent = ProgressReporter(task_id, backend)
+    parent.update('parsing', **init_file_progress(backend, task_id, FILES, parent.started_at))
+    reporters = [FileProgressReporter(task_id, i, len(FILES), name, backend, min_interval=0)
+                 for i, name in enumerate(FILES)]
+
+    # (文件序号, 上报内容, 期望的 files_done, pages_done, pages_total)
+    steps = [
+        (0, dict(pages_done=5, pages_total=10), 0, 5, 10),
+        (1, dict(pages_done=1, pages_total=4), 0, 6, 14),
+        (0, dict(pages_done=10, pages_total=10), 0, 11, 14),
+        (0, dict(done=True), 1, 11, 14),
+        (1, dict(pages_done=3, pages_total=4), 1, 13, 14),
+        (1, dict(done=True), 2, 13, 14),
+    ]
+    ok = True
+    for index, report, files_done, pages_done, pages_total in steps:
+        reporters[index].report(**report)
+        progress = read_progress(task_id)
+        finished = files_done == len(FILES)
+        step_ok = (
+            progress.get('files_total') == len(FILES)
+            and [file['file_name'] for file in progress.get('files', [])] == FILES
+            and progress.get('files_done') == files_done
+            and progress.get('pages_done') == pages_done
+            and progress.get('pages_total') == pages_total
+            and progress.get('stage') == ('parsed' if finished else 'parsing')
+            and ('eta_seconds' in progress) != finished
+        )
+        ok = ok and step_ok
+        print(f"file {index} reports {report}: stage {progress.get('stage')}, "
+              f"files {progress.get('files_done')}/{progress.get('files_total')}, "
+              f"pages {progress.get('pages_done')}/{progress.get('pages_total')}, "
+              f"eta {progress.get('eta_seconds')}: {'OK' if step_ok else 'FAIL'}")
+    return ok
+
+
+def check_pipeline() -> bool:
+    from app.core import tasks
+
+    work_dir = tempfile.mkdtemp(prefix='file_progress_check_')
+    try:
+        task_id = str(uuid.uuid4())
+        paths = []
+        for name in ('a.txt', 'b.txt'):
+            path = os.path.join(work_dir, f"{task_id}_{name}")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f'{name} 的内容\n')
+            paths.append(path)
+        tasks.process_and_summarize.apply(kwargs=dict(
+            task_id=task_id, file_paths=paths, text=None, url=None
+        ))
+        result = read_progress(task_id)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    summary = result.get('summary') or ''
+    ok = result.get('status') == 'success' and 'a.txt 的内容' in summary and 'b.txt 的内容' in summary
+    print(f"two-file task: status {result.get('status')}: {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    settings.USE_LLM = False
+    settings.EXTRACTION_CACHE_BACKEND = 'none'
+    celery_app.conf.update(task_always_eager=True, result_backend='cache+memory://')
+    interleaved_ok = check_interleaved()
+    pipeline_ok = check_pipeline()
+    sys.exit(0 if interleaved_ok and pipeline_ok else 1)
+
+
+if __name__ == '__main__':
+    main()
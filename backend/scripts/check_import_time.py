@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""检查 API / Celery 入口模块的导入耗时预算
+
+在全新的子进程中多次导入指定模块，取耗时中位数与预算比较，同时确认
+PyMuPDF、tesseract、dashscope 等重量级依赖没有在导入时被加载。
+超出预算或加载了重量级依赖时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_import_time.py [--budget 1.5] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口模块，导入时不应加载重量级依赖
+ENTRY_MODULES = ['app.main', 'app.celery_app', 'app.core.tasks']
+
+HEAVY_MODULES = [
+    'fitz',
+    'pdf2image',
+    'pytesseract',
+    'tesserocr',
+    'dashscope',
+    'youtube_dl',
+    'bleach',
+    'bs4',
+    'docx',
+    'numpy',
+    'app.services.document_parser',
+    'app.services.ali_summary_service',
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int):
+    timings, heavy = [], set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(data['elapsed'])
+        heavy.update(data['heavy'])
+    return statistics.median(timings), sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=1.5, help='每个入口模块的导入耗时预算（秒）')
+    parser.add_argument('--runs', type=int, default=5, help='每个模块的测量次数')
+    args = parser.parse_args()
+
+    failed = False
+    for module in ENTRY_MODULES:
+        elapsed, heavy = measure(module, args.runs)
+        status = 'OK'
+        if elapsed > args.budget:
+            status = 'OVER BUDGET'
+            failed = True
+        if heavy:
+            status = f"HEAVY IMPORTS: {', '.join(heavy)}"
+            failed = True
+        print(f"{module:<20}{elapsed * 1000:>8.0f} ms  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""检查分段总结中一个片段失败时，其余仍在进行的模型请求会被取消
+
+用假的模型客户端代替真实接口：含失败标记的片段很快返回错误，其余片段的请求要等待较长时间。
+总结应在失败后立即结束（早于其余请求完成），且所有仍在进行的请求都被取消、没有请求继续完成，
+否则以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_map_reduce_cancel.py [--chunks 8] [--slow 2.0]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.ali_summary_service import AliSummaryService
+
+FAILING_MARK = '这一段会失败'
+
+
+class FakeClient:
+    def __init__(self, slow: float):
+        self.slow = slow
+        self.completed = 0
+        self.cancelled = 0
+
+    async def generate(self, model, messages, max_tokens, temperature) -> str:
+        if FAILING_MARK in messages[-1]['content']:
+            await asyncio.sleep(0.05)
+            raise RuntimeError('模拟的接口错误')
+        try:
+            await asyncio.sleep(self.slow)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.completed += 1
+        return '片段摘要'
+
+
+async def run(chunks: int, slow: float):
+    service = AliSummaryService()
+    client = FakeClient(slow)
+    service._get_client = lambda: client
+    # 所有片段同时请求，失败发生时其余请求都在进行中
+    settings.SUMMARY_MAP_CONCURRENCY = 1000
+    settings.SUMMARY_CACHE_BACKEND = 'none'
+    # 文本远超单次请求的上限，分成多个片段分别请求，含失败标记的片段在中间
+    piece = '长文档中的一句话。' * (service._chunk_budget() // 2)
+    pieces = [piece] * chunks
+    pieces[chunks // 2] = FAILING_MARK + piece
+    start = time.perf_counter()
+    error = None
+    try:
+        await service.summarize('\n'.join(pieces))
+    except Exception as e:
+        error = e
+    elapsed = time.perf_counter() - start
+    # 留出时间让未被取消的请求完成，以便统计
+    await asyncio.sleep(slow + 0.5)
+    return error, elapsed, client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=8, help='文本段数（每段再按 token 上限切成若干片段）')
+    parser.add_argument('--slow', type=float, default=2.0, help='其余请求的耗时（秒）')
+    args = parser.parse_args()
+
+    error, elapsed, client = asyncio.run(run(args.chunks, args.slow))
+    print(f"error: {error}")
+    print(f"failed after {elapsed:.2f}s, slow requests completed {client.completed}, cancelled {client.cancelled}")
+    ok = error is not None and elapsed < args.slow and client.completed == 0 and client.cancelled > 0
+    print('OK' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""检查 OCR 工作进程崩溃时，崩溃的页面不会在当前进程（Celery worker）中重试
+
+用一个假的 OCR 函数代替真实识别：遇到指定页面时工作进程直接退出（模拟段错误或内存不足被杀），
+在当前进程中被调用时只做记录、不崩溃。通过 DocumentParser._ocr_pages 识别一批页面：
+所有页面都应按页序产出，崩溃页面记为失败（None），其他页面正常识别（包括与崩溃页面同时
+在途、随进程池一起失败后重试的页面），且没有任何页面在当前进程中识别，否则以非零状态码退出，
+可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_ocr_pool_crash.py [--pages 24] [--workers 4] [--crash-page 5]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from app.services import document_parser
+from app.services.document_parser import DocumentParser
+
+PARENT_PID = os.getpid()
+CRASH_WIDTH = 0
+
+
+def fake_ocr_page(image: Image.Image) -> str:
+    """页面序号编码在图像宽度中（宽度 = 序号 + 1）"""
+    if os.getpid() == PARENT_PID:
+        return 'IN-PARENT'
+    if image.width == CRASH_WIDTH:
+        os._exit(1)
+    return f'page {image.width - 1}'
+
+
+def main():
+    global CRASH_WIDTH
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=24, help='页数')
+    parser.add_argument('--workers', type=int, default=4, help='OCR 进程数')
+    parser.add_argument('--crash-page', type=int, default=5, help='导致工作进程崩溃的页面序号（从 0 开始）')
+    args = parser.parse_args()
+    CRASH_WIDTH = args.crash_page + 1
+
+    # 进程池以 fork 方式创建，子进程中同样使用假的 OCR 函数；不创建真实的 OCR 后端
+    document_parser._ocr_page = fake_ocr_page
+    document_parser._init_ocr_worker = lambda: None
+    ocr = DocumentParser.__new__(DocumentParser)
+    ocr.ocr_workers = args.workers
+
+    images = [Image.new('L', (i + 1, 1)) for i in range(args.pages)]
+    try:
+        results = list(ocr._ocr_pages(iter(images), args.pages))
+    finally:
+        document_parser._discard_ocr_executor()
+
+    expected = [(i, None if i == args.crash_page else f'page {i}') for i in range(args.pages)]
+    in_parent = sum(1 for _, text in results if text == 'IN-PARENT')
+    failed = [i for i, text in results if text is None]
+    print(f"pages {len(results)}, failed pages {failed}, recognized in parent process {in_parent}")
+    ok = results == expected
+    print('OK' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""检查重复上传同一文件时总结缓存能够命中
+
+上传文件保存为 {task_id}_{原文件名}，每次任务 ID 都不同。eager 模式下用两个不同的任务 ID
+提交同一个文件，大模型请求发往本地模拟接口，缓存使用临时目录中的磁盘缓存；
+第二次的结果不是 cached=True，或模拟接口收到了第二次请求时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_summary_cache.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+from app.config import settings
+from benchmark_llm_client import free_port, start_stub_server
+
+CONTENT = '重复上传的文件应当命中总结缓存，文件名中的任务 ID 不能进入缓存键。\n' * 20
+
+
+def run_upload(tasks, upload_dir: str, source: str) -> dict:
+    from app.celery_app import celery_app
+    from app.services.result_cache import hash_file
+
+    task_id = str(uuid.uuid4())
+    upload = os.path.join(upload_dir, f"{task_id}_{os.path.basename(source)}")
+    shutil.copyfile(source, upload)
+    tasks.process_and_summarize.apply(kwargs=dict(
+        task_id=task_id, file_paths=[upload], text=None, url=None, file_hashes=[hash_file(upload)]
+    ))
+    return celery_app.backend.get_task_meta(task_id)['result']
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='summary_cache_check_')
+    port = free_port()
+    settings.USE_LLM = True
+    settings.ALI_API_BASE_URL = f'http://127.0.0.1:{port}/api/v1'
+    settings.ALI_API_KEY = settings.ALI_API_KEY or 'stub'
+    settings.CACHE_DIR = os.path.join(work_dir, 'cache')
+    settings.EXTRACTION_CACHE_BACKEND = 'disk'
+    settings.SUMMARY_CACHE_BACKEND = 'disk'
+
+    from app.celery_app import celery_app
+    from app.core import tasks
+
+    celery_app.conf.update(task_always_eager=True, result_backend='cache+memory://')
+    source = os.path.join(work_dir, 'report.txt')
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write(CONTENT)
+
+    server = start_stub_server(port, 0.0)
+    try:
+        first = run_upload(tasks, work_dir, source)
+        second = run_upload(tasks, work_dir, source)
+        requests = httpx.get(f'http://127.0.0.1:{port}/stats').json()['requests']
+    finally:
+        server.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"first upload:  status {first.get('status')}, cached {first.get('cached')}")
+    print(f"second upload: status {second.get('status')}, cached {second.get('cached')}")
+    print(f"model requests: {requests}")
+    ok = (first.get('status') == second.get('status') == 'success'
+          and second.get('cached') is True and second.get('summary') == first.get('summary') and requests == 1)
+    print('OK' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
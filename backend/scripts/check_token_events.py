@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""检查总结增量文本的推送不阻塞 worker 的常驻事件循环
+
+在常驻事件循环中模拟流式生成（每隔几毫秒产出一段增量文本），通过 TokenPublisher 推送，
+Redis 发布用一个很慢的函数代替；同时在同一循环上测量调度延迟。
+推送的文本拼接后应与生成的一致、发布次数远少于增量文本段数、发布不在事件循环线程中执行，
+且事件循环的最大延迟远小于一次发布的耗时，否则以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_token_events.py [--deltas 200] [--publish-delay 0.3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import events
+from app.core.async_runner import get_event_loop, run_async
+
+
+async def generate(publisher, deltas: int) -> str:
+    parts = []
+    for i in range(deltas):
+        delta = f'第{i}段。'
+        parts.append(delta)
+        publisher(delta)
+        await asyncio.sleep(0.005)
+    return ''.join(parts)
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def run(publisher, deltas: int):
+    stop = asyncio.Event()
+    lag = asyncio.ensure_future(measure_lag(stop))
+    text = await generate(publisher, deltas)
+    stop.set()
+    return text, await lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deltas', type=int, default=200, help='增量文本段数')
+    parser.add_argument('--publish-delay', type=float, default=0.3, help='模拟的单次发布耗时（秒）')
+    args = parser.parse_args()
+
+    published = []
+    loop_thread = []
+
+    def slow_publish(task_id, event_type, **data):
+        time.sleep(args.publish_delay)
+        published.append((data['text'], threading.current_thread() is loop_thread[0]))
+
+    events.publish_event = slow_publish
+    get_event_loop().call_soon_threadsafe(lambda: loop_thread.append(threading.current_thread()))
+
+    publisher = events.TokenPublisher('check', 0.2)
+    try:
+        text, lag = run_async(run(publisher, args.deltas))
+    finally:
+        publisher.close()
+
+    on_loop = sum(1 for _, in_loop in published if in_loop)
+    same = ''.join(part for part, _ in published) == text
+    print(f"deltas {args.deltas}, publishes {len(published)}, on event loop {on_loop}, "
+          f"max loop lag {lag * 1000:.0f} ms, text {'same' if same else 'DIFFERENT'}")
+    ok = same and on_loop == 0 and len(published) < args.deltas / 10 and lag < args.publish_delay / 3
+    print('OK' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""检查 TXT 编码检测只看样本时，样本之外的 GBK 内容不会被替换成 U+FFFD
+
+构造几个文件：编码检测样本（开头和均匀分布的几段）内全是 ASCII 或 UTF-8，GBK 内容只出现在样本之间
+和文件末尾。逐块读取（iter_text_file，用很小的块覆盖块边界上的多字节字符和 \\r\\n）和整体解码
+（decode_text）的结果应与原实现（UTF-8 失败后整文件按 GBK 重读）一致；真正的非法字节只替换、不报错。
+任一用例不符合时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python scripts/check_txt_encoding.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.charset import DETECTION_SAMPLE_BYTES, decode_text
+from app.services.text_reader import SAMPLE_WINDOWS, detect_file_encoding, iter_text_file
+
+LINE_EN = 'line {}: plain ASCII text inside the detection sample\r\n'
+LINE_ZH = '第{}行：样本之外的中文内容不能变成替换字符。\r\n'
+FILE_SIZE = 2 * 1024 * 1024
+
+
+def legacy_read(path: str) -> str:
+    """原 DocumentParser._parse_txt"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        with open(path, 'r', encoding='gbk') as f:
+            return f.read()
+
+
+def outside_samples():
+    """两个样本窗口之间和文件末尾的位置（相对文件大小的比例）"""
+    step = 1 / (SAMPLE_WINDOWS + 1)
+    return [step / 2, 1 - step / 4]
+
+
+def write_file(path: str, head_line: str, head_encoding: str):
+    """样本覆盖的位置写 head_line，样本之外的几处写 GBK 中文"""
+    inserts = [int(FILE_SIZE * ratio) for ratio in outside_samples()]
+    written, i = 0, 0
+    with open(path, 'wb') as f:
+        while written < FILE_SIZE:
+            if inserts and written >= inserts[0]:
+                inserts.pop(0)
+                data = ''.join(LINE_ZH.format(i + j) for j in range(20)).encode('gbk')
+            else:
+                data = head_line.format(i).encode(head_encoding)
+            f.write(data)
+            written += len(data)
+            i += 1
+
+
+def main():
+    directory = tempfile.mkdtemp(prefix='txt_encoding_check_')
+    failed = False
+    try:
+        path = os.path.join(directory, 'ascii_gbk.txt')
+        write_file(path, LINE_EN, 'ascii')
+        expected = legacy_read(path)
+        detected = detect_file_encoding(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        results = {
+            'iter_text_file': ''.join(iter_text_file(path)),
+            'iter_text_file, 4KB blocks': ''.join(iter_text_file(path, block_size=4093)),
+            'decode_text': decode_text(content).replace('\r\n', '\n'),
+        }
+        for mode, text in results.items():
+            ok = text == expected and '�' not in text
+            failed = failed or not ok
+            print(f"ascii head, gbk outside sample (sampled as {detected}), {mode}: {'OK' if ok else 'FAIL'}")
+
+        # UTF-8 中文开头、样本之外混入 GBK：出错位置之前的 UTF-8 和第一处 GBK 内容都应正确解码
+        path = os.path.join(directory, 'utf8_gbk.txt')
+        write_file(path, '第{}行：UTF-8 中文开头。\n', 'utf-8')
+        with open(path, 'rb') as f:
+            content = f.read()
+        # 第一行 GBK 内容的起止位置：之前按 UTF-8 解码，这一行按 GBK 解码
+        start = content.rindex(b'\n', 0, content.index('：样本之外'.encode('gbk'))) + 1
+        end = content.index(b'\r\n', start)
+        expected = content[:start].decode('utf-8') + content[start:end].decode('gbk')
+        text = ''.join(iter_text_file(path, block_size=4093))
+        ok = text.startswith(expected)
+        failed = failed or not ok
+        print(f"utf-8 head, gbk outside sample (sampled as {detect_file_encoding(path)}): {'OK' if ok else 'FAIL'}")
+
+        # 真正的非法字节：不报错，替换为 U+FFFD
+        path = os.path.join(directory, 'invalid.txt')
+        with open(path, 'wb') as f:
+            f.write(b'plain ascii ' * (DETECTION_SAMPLE_BYTES // 4) + b'\x81\x20\xff broken')
+        text = ''.join(iter_text_file(path))
+        ok = '�' in text and text.endswith(' broken')
+        failed = failed or not ok
+        print(f"invalid bytes outside sample: {'OK' if ok else 'FAIL'}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""本地模拟 DashScope 文本生成接口，用于离线测试和压测
+
+返回格式与 DashScope 原生接口一致，回复内容为输入的前若干个字符。
+请求头带 X-DashScope-SSE: enable 时以 SSE 分段返回增量内容。
+将 ALI_API_BASE_URL 设为 http://127.0.0.1:<port>/api/v1 即可让服务改用本地模拟接口。
+
+用法（在 backend 目录下）：
+    python scripts/llm_stub_server.py [--port 8099] [--latency 0.5]
+"""
+import argparse
+import asyncio
+import json
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="LLM Stub Server")
+app.state.latency = 0.5
+app.state.reply_length = 200
+app.state.requests = 0
+app.state.stream_chunk = 8
+
+
+def make_reply(messages) -> str:
+    prompt = messages[-1]['content'] if messages else ''
+    return f"[stub] {prompt[:app.state.reply_length]}"
+
+
+@app.post("/api/v1/services/aigc/text-generation/generation")
+async def generation(request: Request):
+    body = await request.json()
+    app.state.requests += 1
+    messages = body.get('input', {}).get('messages', [])
+    if not messages:
+        return JSONResponse(status_code=400, content={
+            "code": "InvalidParameter",
+            "message": "messages is required",
+            "request_id": str(uuid.uuid4()),
+        })
+
+    reply = make_reply(messages)
+    if request.headers.get('X-DashScope-SSE') == 'enable':
+        return StreamingResponse(stream_reply(reply), media_type="text/event-stream")
+
+    await asyncio.sleep(app.state.latency)
+    return {
+        "output": {
+            "choices": [{
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": reply},
+            }]
+        },
+        "usage": {"input_tokens": len(messages[-1]['content']), "output_tokens": len(reply)},
+        "request_id": str(uuid.uuid4()),
+    }
+
+
+async def stream_reply(reply: str):
+    """把模拟延迟平摊到每个分段上，逐段返回增量内容"""
+    request_id = str(uuid.uuid4())
+    size = app.state.stream_chunk
+    pieces = [reply[i:i + size] for i in range(0, len(reply), size)] or ['']
+    for i, piece in enumerate(pieces):
+        await asyncio.sleep(app.state.latency / len(pieces))
+        finish_reason = "stop" if i == len(pieces) - 1 else "null"
+        data = {
+            "output": {
+                "choices": [{
+                    "finish_reason": finish_reason,
+                    "message": {"role": "assistant", "content": piece},
+                }]
+            },
+            "request_id": request_id,
+        }
+        yield f"id:{i + 1}\nevent:result\n:HTTP_STATUS/200\ndata:{json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/stats")
+async def stats():
+    return {"requests": app.state.requests}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.5, help='每个请求的模拟延迟（秒）')
+    parser.add_argument('--reply-length', type=int, default=200, help='回复中截取的输入字符数')
+    args = parser.parse_args()
+
+    app.state.latency = args.latency
+    app.state.reply_length = args.reply_length
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
-from bs4 import BeautifulSoup
 import requests
 import PyPDF2
 import docx
 import io
 import logging
 
+from app.services.charset import decode_text, sniff_encoding
+from app.services.content_extractor import get_content_extractor
+
 logger = logging.getLogger(__name__)
 
 class ParserService:
@@ -13,17 +15,8 @@ class ParserService:
         """解析网页内容"""
         try:
             response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # 移除脚本和样式
-            for script in soup(["script", "style"]):
-                script.decompose()
-            # 获取文本
-            text = soup.get_text()
-            # 清理文本
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            return text
+            # 与 DocumentParser 使用同一个正文提取器
+            return get_content_extractor().extract(response.text)
         except Exception as e:
             return f"解析URL失败: {str(e)}"
 
@@ -53,22 +46,11 @@ class ParserService:
 
     @staticmethod
     def parse_txt(file_bytes):
-        """解析TXT文件内容"""
+        """解析TXT文件内容：按开头的样本检测编码，只解码一次"""
         try:
-            logger.info("Attempting to parse TXT file")
-            try:
-                text = file_bytes.decode('utf-8')
-                logger.info("Successfully decoded TXT file with UTF-8")
-                return text
-            except UnicodeDecodeError:
-                logger.info("UTF-8 decode failed, trying GBK")
-                try:
-                    text = file_bytes.decode('gbk')
-                    logger.info("Successfully decoded TXT file with GBK")
-                    return text
-                except Exception as e:
-                    logger.error(f"GBK decode failed: {str(e)}")
-                    return f"解析TXT文件失败: {str(e)}"
+            encoding = sniff_encoding(file_bytes)
+            logger.info(f"Decoding TXT file as {encoding}")
+            return decode_text(file_bytes, encoding)
         except Exception as e:
             logger.error(f"Error parsing TXT file: {str(e)}")
-            return f"解析TXT文件失败: {str(e)}" 
\ No newline at end of file
+            return f"解析TXT文件失败: {str(e)}"
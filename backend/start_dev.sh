@@ -25,7 +25,7 @@ rm -f logs/celery.pid
 # 启动 Celery Worker
 celery -A app.celery_app worker \
     --loglevel=DEBUG \
-    -Q default \
+    -Q default,llm,fetch,parse,ocr \
     --pool=solo \
     --concurrency=1 \
     --max-tasks-per-child=200 \